@@ -0,0 +1,134 @@
+# Paramètres de l'application, surchargeables par variables d'environnement.
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_str(name: str, default: str | None = None) -> str | None:
+    return os.getenv(name) or default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_list(name: str, default: list[str]) -> list[str]:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Cache des embeddings de champs (field_mapper).
+# Nombre maximal de vecteurs gardés en mémoire (LRU).
+EMBEDDING_CACHE_SIZE = _env_int("EMBEDDING_CACHE_SIZE", 4096)
+# Fichier .npy optionnel (memory-mapped) pour conserver le cache entre redémarrages.
+EMBEDDING_CACHE_PATH = _env_str("EMBEDDING_CACHE_PATH")
+
+# Encodeur du field_mapper : "sentence-transformers" (référence, PyTorch),
+# "onnx" (export int8, voir app.services.encoders) ou "remote" (processus
+# d'encodage partagé), et threads intra-op (0 = défaut).
+EMBEDDING_BACKEND = _env_str("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_ONNX_PATH = _env_str("EMBEDDING_ONNX_PATH", "models/minilm-int8")
+EMBEDDING_THREADS = _env_int("EMBEDDING_THREADS", 0)
+# Micro-batching des appels à l'encodeur entre requêtes concurrentes : fenêtre
+# d'attente (ms, 0 = désactivé) et nombre de textes déclenchant l'encodage.
+EMBEDDING_BATCH_WINDOW_MS = _env_int("EMBEDDING_BATCH_WINDOW_MS", 2)
+EMBEDDING_BATCH_MAX_SIZE = _env_int("EMBEDDING_BATCH_MAX_SIZE", 256)
+# Backend "remote" : socket Unix du processus d'encodage partagé par les workers
+# (python -m app.services.embedding_server) et modèle chargé par ce processus.
+EMBEDDING_SOCKET = _env_str("EMBEDDING_SOCKET", "/tmp/form-auto-encoder.sock")
+EMBEDDING_SERVER_BACKEND = _env_str("EMBEDDING_SERVER_BACKEND", "sentence-transformers")
+
+# Mapping mémorisé par site et par empreinte de formulaire (field_mapper).
+# Couples (site, empreinte) gardés en mémoire (0 = désactivé) et base SQLite
+# partagée entre workers.
+MAPPING_MEMO_SIZE = _env_int("MAPPING_MEMO_SIZE", 2048)
+MAPPING_MEMO_PATH = _env_str("MAPPING_MEMO_PATH", "data/mapping_memo.sqlite3")
+# Templates de formulaires partagés entre sites (Shopify, HubSpot...) : nombre
+# gardé en mémoire (0 = désactivé) et similarité de Jaccard minimale des champs.
+TEMPLATE_REGISTRY_SIZE = _env_int("TEMPLATE_REGISTRY_SIZE", 4096)
+TEMPLATE_SIMILARITY = _env_float("TEMPLATE_SIMILARITY", 0.8)
+
+# Pool de navigateurs Selenium (scraper, autofiller).
+DRIVER_POOL_MIN_SIZE = _env_int("DRIVER_POOL_MIN_SIZE", 0)
+DRIVER_POOL_MAX_SIZE = _env_int("DRIVER_POOL_MAX_SIZE", 2)
+# Nombre de pages servies avant de recycler un navigateur.
+DRIVER_POOL_MAX_PAGES = _env_int("DRIVER_POOL_MAX_PAGES", 50)
+# Attente maximale (secondes) pour obtenir un navigateur libre.
+DRIVER_POOL_ACQUIRE_TIMEOUT = _env_int("DRIVER_POOL_ACQUIRE_TIMEOUT", 30)
+
+# Préchauffage (modèle d'embeddings, chromedriver, pool) au démarrage de l'API.
+WARMUP_ON_STARTUP = _env_int("WARMUP_ON_STARTUP", 1) == 1
+
+# Client HTTP partagé (scraper) : connexions keep-alive réutilisées par hôte.
+HTTP_POOL_CONNECTIONS = _env_int("HTTP_POOL_CONNECTIONS", 32)
+HTTP_POOL_MAXSIZE = _env_int("HTTP_POOL_MAXSIZE", 8)
+HTTP_RETRIES = _env_int("HTTP_RETRIES", 2)
+
+# Cache des pages récupérées (HTML final, statut, rendu Selenium ou non).
+PAGE_CACHE_SIZE = _env_int("PAGE_CACHE_SIZE", 256)
+# Durée (secondes) pendant laquelle une page est resservie sans revalidation.
+PAGE_CACHE_TTL = _env_int("PAGE_CACHE_TTL", 300)
+
+# Parseur HTML utilisé par la détection et l'extraction : "bs4" (référence) ou "lxml" (rapide).
+PARSER_BACKEND = _env_str("PARSER_BACKEND", "bs4")
+
+# Lecture en streaming des pages (scraper).
+# Taille maximale téléchargée par page, en octets.
+MAX_PAGE_BYTES = _env_int("MAX_PAGE_BYTES", 5 * 1024 * 1024)
+# Octets lus après la fermeture du formulaire principal quand seuls les champs sont utiles.
+STREAM_FORM_MARGIN_BYTES = _env_int("STREAM_FORM_MARGIN_BYTES", 16 * 1024)
+
+# Décision de rendu Selenium : domaines mémorisés et nombre de rendus sans champ
+# supplémentaire après lequel un domaine n'est plus rendu.
+RENDER_MEMORY_SIZE = _env_int("RENDER_MEMORY_SIZE", 1024)
+RENDER_MEMORY_MIN_SAMPLES = _env_int("RENDER_MEMORY_MIN_SAMPLES", 3)
+
+# Capture des pages rendues : "snapshot" (document, frames de même origine et
+# shadow roots en un seul script) ou "frames" (ancien parcours frame par frame).
+SELENIUM_CAPTURE_MODE = _env_str("SELENIUM_CAPTURE_MODE", "snapshot")
+
+# Profil des navigateurs Selenium : "lean" (headless, chargement "eager",
+# ressources lourdes et traceurs bloqués) ou "full" (profil historique).
+RENDER_PROFILE = _env_str("RENDER_PROFILE", "lean")
+# Motifs d'URL bloqués par le profil "lean" (syntaxe Network.setBlockedURLs,
+# séparés par des virgules).
+RENDER_BLOCKLIST = _env_list(
+    "RENDER_BLOCKLIST",
+    [
+        # Images, polices, médias
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+        # Mesure d'audience et publicité
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*adservice.google.*", "*facebook.net*",
+        "*connect.facebook.com*", "*hotjar.com*", "*clarity.ms*", "*criteo.com*",
+        "*criteo.net*", "*scorecardresearch.com*", "*taboola.com*", "*outbrain.com*",
+    ],
+)
+
+# Autofill : remplissage de tous les champs en un seul script (1), ou champ par
+# champ avec send_keys (0). En mode groupé, send_keys reste le recours.
+AUTOFILL_BULK_FILL = _env_int("AUTOFILL_BULK_FILL", 1) == 1
+# Domaines dont on mémorise le sélecteur du bouton de consentement aux cookies.
+CONSENT_CACHE_SIZE = _env_int("CONSENT_CACHE_SIZE", 1024)
+
+# Pipeline asynchrone des routes /form.
+# Threads dédiés au réseau, au parsing/mapping (0 = nombre de cœurs).
+IO_WORKERS = _env_int("IO_WORKERS", 32)
+CPU_WORKERS = _env_int("CPU_WORKERS", 0)
+# Requêtes /form traitées simultanément ; au-delà, réponse 503 avec Retry-After.
+MAX_INFLIGHT_REQUESTS = _env_int("MAX_INFLIGHT_REQUESTS", 64)
+RETRY_AFTER_SECONDS = _env_int("RETRY_AFTER_SECONDS", 2)
+
+# Endpoint /form/map/batch.
+# Pages traitées en parallèle par défaut, plafond accepté et taille maximale d'un lot.
+BATCH_PARALLELISM = _env_int("BATCH_PARALLELISM", 8)
+BATCH_MAX_PARALLELISM = _env_int("BATCH_MAX_PARALLELISM", 32)
+BATCH_MAX_URLS = _env_int("BATCH_MAX_URLS", 5000)
@@ -1,14 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import WARMUP_ON_STARTUP
 from app.routers.autofill import router as autofill_router
 from app.routers.form_analyzer import router as form_analyze_router
 from app.routers.form_detect import router as form_detect_router
+from app.routers.form_inspect import router as form_inspect_router
 from app.routers.form_map import router as form_map_router
 from app.routers.health import router as health_router
 from app.routers.user_data import router as user_router
+from app.services.warmup import skip_warmup, start_warmup
+
+
+# Préchauffage en tâche de fond : modèle d'embeddings et chromedriver sont
+# chargés en parallèle pendant que /ready répond 503, puis 200 une fois fini.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not WARMUP_ON_STARTUP:
+        skip_warmup()
+        yield
+        return
+    task = start_warmup()
+    yield
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
+
 
-app = FastAPI(title="Web Form Detector", version="0.1.0")
+app = FastAPI(title="Web Form Detector", version="0.1.0", lifespan=lifespan)
 
 # CORS pour permettre l'extension de communiquer
 app.add_middleware(
@@ -25,4 +47,5 @@ app.include_router(user_router)
 app.include_router(form_detect_router)
 app.include_router(form_analyze_router)
 app.include_router(form_map_router)
+app.include_router(form_inspect_router)
 app.include_router(autofill_router)
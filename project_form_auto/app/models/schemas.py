@@ -1,12 +1,26 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional
 
+# Parseurs HTML disponibles (voir app.services.parsed_page).
+ParserName = Literal["bs4", "lxml"]
+
 class HealthResponse(BaseModel):
     status: str = Field(..., example="ok")
 
 
+class ComponentStatus(BaseModel):
+    status: str = Field(..., description="pending, ready, failed ou skipped")
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadyResponse(BaseModel):
+    ready: bool
+    components: dict[str, ComponentStatus]
+
+
 class DetectRequest(BaseModel):
     url: HttpUrl = Field(..., description="URL de la page à analyser")
 
@@ -19,6 +33,8 @@ class DetectResponse(BaseModel):
     has_inputs: bool
     probable_form: bool
     reasons: list[str]
+    rendered: bool = Field(False, description="Whether the page went through the headless browser")
+    render_reason: Optional[str] = Field(None, description="Why the page was (or was not) rendered")
 
 class FormField(BaseModel):
     tag: str
@@ -27,6 +43,8 @@ class FormField(BaseModel):
     id: Optional[str] = None
     placeholder: Optional[str] = None
     label: Optional[str] = None
+    autocomplete: Optional[str] = None
+    aria_label: Optional[str] = None
 
 
 class FormAnalyzeResponse(BaseModel):
@@ -114,6 +132,32 @@ class FormMapResponse(BaseModel):
     fields: list[MappedFormField]
 
 
+class FormMapBatchRequest(BaseModel):
+    urls: list[str] = Field(..., min_length=1)
+    user_data: UserData
+    parallelism: Optional[int] = Field(
+        None, ge=1, description="Pages processed concurrently (defaults to BATCH_PARALLELISM)"
+    )
+
+
+class FormMapBatchError(BaseModel):
+    """Line of a ``/form/map/batch`` stream for a URL that could not be mapped."""
+
+    url: str
+    status_code: int
+    error: str
+
+
+class FormInspectResponse(BaseModel):
+    """Detection, analysis and mapping of one page, from a single fetch and parse."""
+
+    url: str
+    http_status: int
+    detect: DetectResponse
+    analyze: FormAnalyzeResponse
+    map: FormMapResponse
+
+
 # -------------------------------------------------------------------------------------------------
 # Models related to automatic form filling
 # -------------------------------------------------------------------------------------------------
@@ -6,17 +6,19 @@ found on the page. The response includes details about each field and whether
 it was successfully filled.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from app.models.schemas import AutoFillRequest, AutoFillResponse
+from app.routers.dependencies import admission_control
 from app.services.autofiller import autofill_form
+from app.services.executors import run_render
 
 
 router = APIRouter(prefix="/form", tags=["form"])
 
 
-@router.post("/autofill", response_model=AutoFillResponse)
-def autofill_endpoint(req: AutoFillRequest) -> AutoFillResponse:
+@router.post("/autofill", response_model=AutoFillResponse, dependencies=[Depends(admission_control)])
+async def autofill_endpoint(req: AutoFillRequest) -> AutoFillResponse:
     """
     Attempt to automatically fill form fields on the specified page.
 
@@ -36,7 +38,7 @@ def autofill_endpoint(req: AutoFillRequest) -> AutoFillResponse:
         filled, along with detailed information for each field encountered.
     """
     try:
-        fields = autofill_form(req.url, req.user_data)
+        fields = await run_render(autofill_form, req.url, req.user_data)
     except Exception as e:
         # Wrap any exception from the automation layer in a 502 so clients
         # understand the request was valid but the upstream service failed.
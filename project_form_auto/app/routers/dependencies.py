@@ -0,0 +1,20 @@
+# Dépendances partagées par les routes /form.
+
+from fastapi import HTTPException, status
+
+from app.services.executors import REQUEST_LIMITER
+
+
+# Contrôle d'admission : au-delà de MAX_INFLIGHT_REQUESTS requêtes en cours, on
+# répond immédiatement 503 + Retry-After plutôt que de laisser la file grossir.
+async def admission_control():
+    if not REQUEST_LIMITER.try_acquire():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, retry later",
+            headers={"Retry-After": str(REQUEST_LIMITER.retry_after)},
+        )
+    try:
+        yield
+    finally:
+        REQUEST_LIMITER.release()
@@ -1,14 +1,21 @@
 import requests
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 
-from app.models.schemas import DetectRequest, FormAnalyzeResponse
+from app.models.schemas import DetectRequest, FormAnalyzeResponse, ParserName
+from app.routers.dependencies import admission_control
+from app.services.executors import run_cpu
 from app.services.form_analyzer import extract_form_fields
-from app.services.scraper import fetch_html
+from app.services.scraper import fetch_html_async
 
 router = APIRouter(prefix="/form", tags=["form"])
 
-@router.post("/analyze", response_model=FormAnalyzeResponse)
-def analyze_form(request: DetectRequest) -> FormAnalyzeResponse:
+
+@router.post("/analyze", response_model=FormAnalyzeResponse, dependencies=[Depends(admission_control)])
+async def analyze_form(
+    request: DetectRequest,
+    cache_control: str | None = Header(default=None),
+    parser: ParserName | None = Query(default=None, description="Parseur HTML (bs4 ou lxml)"),
+) -> FormAnalyzeResponse:
     """
     Analyze a given URL and extract user‑fillable form fields.
 
@@ -20,14 +27,14 @@ def analyze_form(request: DetectRequest) -> FormAnalyzeResponse:
     of the discovered fields, and the list of extracted fields.
     """
     try:
-        _, html = fetch_html(str(request.url))
+        _, html = await fetch_html_async(str(request.url), cache_control=cache_control, fields_only=True)
     except requests.RequestException as e:
         # Surface network errors as a 502 Bad Gateway so clients can distinguish
         # between invalid URLs and server issues.
         raise HTTPException(status_code=502, detail=str(e)) from e
 
     # Delegate HTML parsing and field extraction to the form analyzer service.
-    fields = extract_form_fields(html)
+    fields = await run_cpu(extract_form_fields, html, parser)
 
     return FormAnalyzeResponse(
         url=str(request.url),
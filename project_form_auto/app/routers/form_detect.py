@@ -1,31 +1,39 @@
 import requests
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 
-from app.models.schemas import DetectRequest, DetectResponse
+from app.models.schemas import DetectRequest, DetectResponse, ParserName
+from app.routers.dependencies import admission_control
+from app.services.executors import run_cpu
 from app.services.form_detector import detect_form
-from app.services.scraper import fetch_html
+from app.services.scraper import fetch_page_async
 
 router = APIRouter(prefix="/form", tags=["form"])
 
 
-@router.post("/detect", response_model=DetectResponse)
-def detect(request: DetectRequest) -> DetectResponse:
+@router.post("/detect", response_model=DetectResponse, dependencies=[Depends(admission_control)])
+async def detect(
+    request: DetectRequest,
+    cache_control: str | None = Header(default=None),
+    parser: ParserName | None = Query(default=None, description="Parseur HTML (bs4 ou lxml)"),
+) -> DetectResponse:
     try:
-        status, html = fetch_html(str(request.url))
+        page = await fetch_page_async(str(request.url), cache_control=cache_control)
     except requests.HTTPError as e:
         status_code = getattr(e.response, "status_code", 400)
         raise HTTPException(status_code=status_code, detail=f"HTTP error while fetching page: {e}") from e
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=f"Network error while fetching page: {e}") from e
 
-    result = detect_form(html)
+    result = await run_cpu(detect_form, page.html, parser)
 
     return DetectResponse(
         url=str(request.url),
-        http_status=status,
+        http_status=page.status,
         has_form=result["has_form"],
         forms_count=result["forms_count"],
         has_inputs=result["has_inputs"],
         probable_form=result["probable_form"],
         reasons=result["reasons"],
+        rendered=page.rendered,
+        render_reason=page.render_reason,
     )
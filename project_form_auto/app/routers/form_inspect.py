@@ -0,0 +1,76 @@
+import requests
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app.models.schemas import (
+    DetectResponse,
+    FormAnalyzeResponse,
+    FormInspectResponse,
+    FormMapRequest,
+    FormMapResponse,
+    ParserName,
+)
+from app.routers.dependencies import admission_control
+from app.services.executors import run_cpu
+from app.services.field_mapper import build_mapped_fields
+from app.services.form_analyzer import extract_form_fields
+from app.services.form_detector import detect_form
+from app.services.parsed_page import parse_page
+from app.services.scraper import fetch_page_async
+
+router = APIRouter(prefix="/form", tags=["form"])
+
+
+# Partie CPU de /form/inspect : un seul parse partagé par les trois étapes.
+def _inspect_page(html: str, parser: str | None, url: str):
+    page = parse_page(html, parser)
+    detection = detect_form(page)
+    fields = extract_form_fields(page)
+    return detection, fields, build_mapped_fields(fields, url)
+
+
+@router.post("/inspect", response_model=FormInspectResponse, dependencies=[Depends(admission_control)])
+async def inspect_form(
+    req: FormMapRequest,
+    cache_control: str | None = Header(default=None),
+    parser: ParserName | None = Query(default=None, description="Parseur HTML (bs4 ou lxml)"),
+) -> FormInspectResponse:
+    """
+    Detect, analyze and map the forms of a page in a single call.
+
+    The page is fetched once and parsed once into a ``ParsedPage`` that the
+    detector, the analyzer and the mapper all read from. The response
+    bundles what ``/form/detect``, ``/form/analyze`` and ``/form/map`` would
+    return for the same URL.
+    """
+    try:
+        page = await fetch_page_async(req.url, cache_control=cache_control)
+    except requests.HTTPError as e:
+        status_code = getattr(e.response, "status_code", 400)
+        raise HTTPException(status_code=status_code, detail=f"HTTP error while fetching page: {e}") from e
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Network error while fetching page: {e}") from e
+
+    detection, fields, mapped_fields = await run_cpu(_inspect_page, page.html, parser, req.url)
+
+    return FormInspectResponse(
+        url=req.url,
+        http_status=page.status,
+        detect=DetectResponse(
+            url=req.url,
+            http_status=page.status,
+            rendered=page.rendered,
+            render_reason=page.render_reason,
+            **detection,
+        ),
+        analyze=FormAnalyzeResponse(
+            url=req.url,
+            fields_count=len(fields),
+            fields=fields,
+        ),
+        map=FormMapResponse(
+            url=req.url,
+            total_fields=len(mapped_fields),
+            matched_fields=sum(1 for f in mapped_fields if f.matched_key),
+            fields=mapped_fields,
+        ),
+    )
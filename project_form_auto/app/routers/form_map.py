@@ -1,51 +1,126 @@
+import asyncio
+
 import requests
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from app.config import BATCH_MAX_PARALLELISM, BATCH_MAX_URLS, BATCH_PARALLELISM
 from app.models.schemas import (
+    FormMapBatchError,
+    FormMapBatchRequest,
     FormMapRequest,
     FormMapResponse,
-    MappedFormField,
+    ParserName,
 )
-from app.services.field_mapper import match_field_to_user_key
+from app.routers.dependencies import admission_control
+from app.services.executors import REQUEST_LIMITER, run_cpu
+from app.services.field_mapper import build_mapped_fields
 from app.services.form_analyzer import extract_form_fields
-from app.services.scraper import fetch_html
+from app.services.scraper import fetch_page_async
 
 router = APIRouter(prefix="/form", tags=["form"])
 
 
-@router.post("/map", response_model=FormMapResponse)
-def map_form_fields(req: FormMapRequest) -> FormMapResponse:
+# Téléchargement, extraction et mapping d'une page : partagé par /map et /map/batch.
+# Une page qui n'a pu être ni téléchargée ni rendue lève une HTTPException
+# portant le statut de l'échec.
+async def _map_url(url: str, cache_control: str | None, parser: str | None) -> FormMapResponse:
+    page = await fetch_page_async(url, cache_control=cache_control, fields_only=True)
+    if page.fetch_error is not None and not page.rendered:
+        raise HTTPException(status_code=page.status, detail=page.fetch_error)
+
+    fields = await run_cpu(extract_form_fields, page.html, parser)
+    mapped_fields = await run_cpu(build_mapped_fields, fields, url)
+    matched_count = sum(1 for f in mapped_fields if f.matched_key)
+
+    return FormMapResponse(
+        url=url,
+        total_fields=len(mapped_fields),
+        matched_fields=matched_count,
+        fields=mapped_fields,
+    )
+
+
+@router.post("/map", response_model=FormMapResponse, dependencies=[Depends(admission_control)])
+async def map_form_fields(
+    req: FormMapRequest,
+    cache_control: str | None = Header(default=None),
+    parser: ParserName | None = Query(default=None, description="Parseur HTML (bs4 ou lxml)"),
+) -> FormMapResponse:
     try:
-        _, html = fetch_html(req.url)
+        return await _map_url(req.url, cache_control, parser)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=str(e)) from e
 
-    fields = extract_form_fields(html)
 
-    mapped_fields: list[MappedFormField] = []
+# Une ligne NDJSON par URL : la réponse de /form/map ou l'erreur rencontrée.
+async def _map_batch_line(url: str, cache_control: str | None, parser: str | None) -> str:
+    try:
+        result = await _map_url(url, cache_control, parser)
+    except HTTPException as e:
+        result = FormMapBatchError(url=url, status_code=e.status_code, error=str(e.detail))
+    except requests.RequestException as e:
+        result = FormMapBatchError(url=url, status_code=502, error=str(e))
+    except Exception as e:
+        # Une page en échec ne doit pas interrompre le lot.
+        result = FormMapBatchError(url=url, status_code=500, error=str(e) or type(e).__name__)
+    return result.model_dump_json() + "\n"
 
-    for field in fields:
-        matched_key, confidence, reason = match_field_to_user_key(field)
 
-        mapped_fields.append(
-            MappedFormField(
-                tag=field.tag,
-                type=field.type,
-                name=field.name,
-                id=field.id,
-                placeholder=field.placeholder,
-                label=field.label,
-                matched_key=matched_key,
-                confidence=confidence,
-                reason=reason,
-            )
-        )
+@router.post("/map/batch", dependencies=[Depends(admission_control)])
+async def map_form_fields_batch(
+    req: FormMapBatchRequest,
+    cache_control: str | None = Header(default=None),
+    parser: ParserName | None = Query(default=None, description="Parseur HTML (bs4 ou lxml)"),
+) -> StreamingResponse:
+    """
+    Map the form fields of many pages in one call.
 
-    matched_count = sum(1 for f in mapped_fields if f.matched_key)
+    Up to ``parallelism`` pages are fetched and analyzed concurrently, each
+    one beyond the first holding a slot of the request limiter, so a batch
+    never runs more pages than ``MAX_INFLIGHT_REQUESTS`` allows. The
+    response is NDJSON (``application/x-ndjson``): one ``FormMapResponse`` per
+    line, written as soon as the page is done, so lines do not follow the
+    order of ``urls``. A page that fails produces a ``FormMapBatchError`` line
+    (``url``, ``status_code``, ``error``) and the batch goes on.
+    """
+    if len(req.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"Too many URLs (max {BATCH_MAX_URLS})")
+    parallelism = min(req.parallelism or BATCH_PARALLELISM, BATCH_MAX_PARALLELISM)
 
-    return FormMapResponse(
-        url=req.url,
-        total_fields=len(mapped_fields),
-        matched_fields=matched_count,
-        fields=mapped_fields,
-    )
+    async def stream():
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        results: asyncio.Queue[str] = asyncio.Queue()
+        for url in req.urls:
+            queue.put_nowait(url)
+
+        # ``parallelism`` workers se partagent la file : pas une tâche par URL
+        # en attente, même pour des milliers d'URL. Le premier travaille sous
+        # le créneau admis pour la requête ; chaque page traitée par un autre
+        # prend son propre créneau du REQUEST_LIMITER, en l'attendant si besoin.
+        async def worker(shares_request_slot: bool):
+            while not queue.empty():
+                url = queue.get_nowait()
+                if shares_request_slot:
+                    line = await _map_batch_line(url, cache_control, parser)
+                else:
+                    await REQUEST_LIMITER.acquire()
+                    try:
+                        line = await _map_batch_line(url, cache_control, parser)
+                    finally:
+                        REQUEST_LIMITER.release()
+                await results.put(line)
+
+        workers = [
+            asyncio.create_task(worker(shares_request_slot=i == 0))
+            for i in range(min(parallelism, len(req.urls)))
+        ]
+        try:
+            for _ in req.urls:
+                yield await results.get()
+        finally:
+            # Client déconnecté : on abandonne les pages restantes.
+            for task in workers:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
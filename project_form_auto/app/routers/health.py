@@ -1,8 +1,19 @@
 # Etat de vie de l'API. Permet de vérifier que l'API est en ligne et fonctionnelle
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
 
-from app.models.schemas import HealthResponse
+from app.models.schemas import HealthResponse, ReadyResponse
+from app.services.autofiller import CONSENT_CACHE
+from app.services.executors import REQUEST_LIMITER
+from app.services.field_mapper import (
+    embedding_batcher_stats,
+    embedding_cache_stats,
+    mapping_memo_stats,
+    template_registry_stats,
+)
+from app.services.render_profile import RENDER_METRICS
+from app.services.scraper import DRIVER_POOL, HTTP_CLIENT, PAGE_CACHE, RENDER_ADVISOR
+from app.services.warmup import readiness
 
 router = APIRouter(tags=["health"])  # Appartient au groupe "health" dans le swagger.
 
@@ -10,3 +21,31 @@ router = APIRouter(tags=["health"])  # Appartient au groupe "health" dans le swa
 @router.get("/health")
 def health() -> HealthResponse:
     return {"status": "ok"}
+
+
+# Prêt à recevoir du trafic : le préchauffage est terminé. Renvoie 503 tant que
+# ce n'est pas le cas, pour que le load balancer ne route que vers des workers chauds.
+@router.get("/ready", response_model=ReadyResponse)
+def ready(response: Response) -> ReadyResponse:
+    is_ready, components = readiness()
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadyResponse(ready=is_ready, components=components)
+
+
+# Compteurs internes (caches, pools) pour le suivi des performances.
+@router.get("/metrics")
+def metrics() -> dict:
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_batcher_stats(),
+        "mapping_memo": mapping_memo_stats(),
+        "form_templates": template_registry_stats(),
+        "driver_pool": DRIVER_POOL.stats(),
+        "http_client": HTTP_CLIENT.stats(),
+        "page_cache": PAGE_CACHE.stats(),
+        "consent_cache": CONSENT_CACHE.stats(),
+        "render_decision": RENDER_ADVISOR.stats(),
+        "render_profile": RENDER_METRICS.stats(),
+        "requests": REQUEST_LIMITER.stats(),
+    }
@@ -4,13 +4,14 @@ This module provides a single high‑level function, :func:`autofill_form`, whic
 uses Selenium in headless mode to load a page, locate form fields and fill
 them with values from a ``UserData`` instance. Field matching relies on the
 same heuristics used by the ``field_mapper`` service. After completion the
-browser is closed and a list of :class:`AutofilledField` objects is returned
+browser is returned to the pool and a list of :class:`AutofilledField` objects is returned
 describing how each field was handled.
 """
 
 from __future__ import annotations
 
-from typing import List
+import time
+from typing import Any, NamedTuple
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -18,26 +19,87 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import WebDriverException, TimeoutException
 
+from app.config import AUTOFILL_BULK_FILL, CONSENT_CACHE_SIZE
 from app.models.schemas import UserData, FormField, AutofilledField
-from app.services.scraper import create_driver
-from app.services.field_mapper import match_field_to_user_key
+from app.services.scraper import DRIVER_POOL, create_driver
+from app.services.consent import ConsentCache, accept_cookie_banner
+from app.services.field_mapper import match_fields_batch
+from app.services.form_analyzer import resolve_field_label
+from app.services.parsed_page import parse_page
+from app.services.render_profile import RENDER_METRICS
 
 
-def _build_field(element) -> FormField:
-    """Construct a ``FormField`` model from a Selenium WebElement.
+# Attribut posé sur chaque champ par le script d'instantané : identifiant stable,
+# réutilisable par d'autres scripts injectés.
+HANDLE_ATTRIBUTE = "data-autofill-handle"
 
-    Selenium does not provide labels directly; only attributes on the
-    element can be inspected. The label will therefore be left as ``None``
-    during auto‑filling.
+# Un seul aller-retour WebDriver : attributs, visibilité et référence de chaque
+# champ, plus le HTML du document (avec les handles) pour résoudre les labels.
+_SNAPSHOT_SCRIPT = r"""
+const handleAttribute = arguments[0];
+const fields = [];
+document.querySelectorAll("input, select, textarea").forEach(function (element, index) {
+  element.setAttribute(handleAttribute, String(index));
+  const style = window.getComputedStyle(element);
+  fields.push({
+    handle: String(index),
+    element: element,
+    tag: element.tagName.toLowerCase(),
+    type: element.type || element.getAttribute("type"),
+    name: element.getAttribute("name"),
+    id: element.getAttribute("id"),
+    placeholder: element.getAttribute("placeholder"),
+    autocomplete: element.getAttribute("autocomplete"),
+    ariaLabel: element.getAttribute("aria-label"),
+    visible: element.getClientRects().length > 0
+      && style.visibility !== "hidden" && style.display !== "none",
+  });
+});
+return {html: document.documentElement.outerHTML, fields: fields};
+"""
+
+
+class SnapshotField(NamedTuple):
+    handle: str
+    element: Any  # WebElement renvoyé par le script
+    field: FormField
+    visible: bool
+
+
+def _snapshot_fields(driver) -> list[SnapshotField]:
+    """Describe every field of the page with a single ``execute_script``.
+
+    Labels are resolved with the analyzer's rules (``<label for>``, parent
+    ``<label>``, placeholder, nearby text) on the HTML returned by the same
+    script, each field being found again through its handle attribute.
     """
-    return FormField(
-        tag=element.tag_name,
-        type=element.get_attribute("type"),
-        name=element.get_attribute("name"),
-        id=element.get_attribute("id"),
-        placeholder=element.get_attribute("placeholder"),
-        label=None,
-    )
+    snapshot = driver.execute_script(_SNAPSHOT_SCRIPT, HANDLE_ATTRIBUTE) or {}
+    page = parse_page(snapshot.get("html") or "", "lxml")
+    by_handle = {element.get(HANDLE_ATTRIBUTE): element for element in page.fields}
+    nearby_cache: dict = {}
+
+    fields = []
+    for item in snapshot.get("fields", []):
+        parsed = by_handle.get(item["handle"])
+        label = resolve_field_label(parsed, page, nearby_cache) if parsed is not None else None
+        fields.append(
+            SnapshotField(
+                handle=item["handle"],
+                element=item["element"],
+                field=FormField(
+                    tag=item["tag"],
+                    type=item.get("type"),
+                    name=item.get("name"),
+                    id=item.get("id"),
+                    placeholder=item.get("placeholder"),
+                    label=label,
+                    autocomplete=item.get("autocomplete"),
+                    aria_label=item.get("ariaLabel"),
+                ),
+                visible=bool(item.get("visible")),
+            )
+        )
+    return fields
 
 
 def _fill_input(element, value: str) -> bool:
@@ -81,58 +143,121 @@ def _fill_select(element, value: str) -> bool:
     return False
 
 
-def _accept_cookie_banner(driver) -> bool:
+# Remplissage groupé : tout le plan champ → valeur en un seul script. La valeur
+# passe par le setter natif (et non ``element.value = ...``) puis des événements
+# ``input`` / ``change`` sont émis, pour que React et Vue voient le changement.
+_BULK_FILL_SCRIPT = r"""
+const handleAttribute = arguments[0];
+const plan = arguments[1];
+const results = {};
+function nativeSetter(element) {
+  const proto = element instanceof HTMLSelectElement ? HTMLSelectElement.prototype
+    : element instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+    : HTMLInputElement.prototype;
+  return Object.getOwnPropertyDescriptor(proto, "value").set;
+}
+for (const item of plan) {
+  results[item.handle] = false;
+  const element = document.querySelector("[" + handleAttribute + "=\"" + item.handle + "\"]");
+  if (!element || element.disabled || element.readOnly) {
+    continue;
+  }
+  try {
+    let value = item.value;
+    if (element instanceof HTMLSelectElement) {
+      const wanted = value.toLowerCase();
+      const option = Array.from(element.options).find(function (o) {
+        return o.value.toLowerCase() === wanted || o.text.toLowerCase() === wanted;
+      });
+      if (!option) {
+        continue;
+      }
+      value = option.value;
+    }
+    element.focus();
+    nativeSetter(element).call(element, value);
+    element.dispatchEvent(new Event("input", {bubbles: true}));
+    element.dispatchEvent(new Event("change", {bubbles: true}));
+    element.blur();
+    // Valeur refusée (format de date, maxlength...) : l'appelant repasse par send_keys.
+    results[item.handle] = element.value === value;
+  } catch (e) {
+    results[item.handle] = false;
+  }
+}
+return results;
+"""
+
+
+def _bulk_fill(driver, plan: list[tuple[SnapshotField, str]]) -> dict[str, bool]:
+    """Fill every planned field with one ``execute_script``; success per handle."""
+    if not plan:
+        return {}
+    payload = [{"handle": item.handle, "value": value} for item, value in plan]
+    try:
+        return driver.execute_script(_BULK_FILL_SCRIPT, HANDLE_ATTRIBUTE, payload) or {}
+    except WebDriverException:
+        return {}
+
+
+# Inputs qui ne prennent pas une valeur saisie : écrire ``value`` sur une case à
+# cocher ou un bouton radio réécrit son attribut au lieu de le cocher.
+_UNFILLABLE_INPUT_TYPES = {"checkbox", "radio", "hidden", "file", "submit", "button", "image", "reset"}
+
+
+def _fill_plan(
+    snapshot: list[SnapshotField], matches: list, user_data: UserData
+) -> list[tuple[SnapshotField, str]]:
+    """Pair each visible, fillable matched field with the user value of its key."""
+    plan: list[tuple[SnapshotField, str]] = []
+    for item, (matched_key, _, _) in zip(snapshot, matches):
+        if not matched_key or not item.visible:
+            continue
+        if item.field.tag == "input" and (item.field.type or "").lower() in _UNFILLABLE_INPUT_TYPES:
+            continue
+        value = getattr(user_data, matched_key, None)
+        if value is not None and value != "":
+            plan.append((item, str(value)))
+    return plan
+
+
+def _fill_field(item: SnapshotField, value: str) -> bool:
+    # For selects use a dedicated handler
+    if item.field.tag == "select":
+        return _fill_select(item.element, value)
+    return _fill_input(item.element, value)
+
+
+# Sélecteur du bouton de consentement qui a fonctionné, par domaine.
+CONSENT_CACHE = ConsentCache(CONSENT_CACHE_SIZE)
+
+
+def _accept_cookie_banner(driver, url: str) -> bool:
     """Try to dismiss cookie consent pop‑ups by clicking a consent button.
 
     Many websites present a cookie consent banner or modal that blocks user
     interaction until cookies are accepted.  According to best practices,
     clicking the consent button is preferred over removing the element so that
-    any associated behaviour (e.g. setting a cookie) is preserved【648687675336126†L247-L303】.  This helper
-    function scans the page for clickable `<button>` elements whose text
-    contains common consent keywords (both English and French) such as
-    “accept”, “agree”, “accepter”, “j'accepte”, “consent”, “oui” or “ok”.  If
-    a matching button is found it is clicked; otherwise the function returns
-    ``False``.  Any exceptions are silently ignored to avoid interrupting the
-    auto‑fill workflow.
+    any associated behaviour (e.g. setting a cookie) is preserved【648687675336126†L247-L303】.  A single
+    in-page script tries the selector cached for the domain of ``url``, then
+    the accept buttons of common consent platforms (OneTrust, Didomi,
+    Quantcast...), then any visible button whose text contains a consent
+    keyword (see :mod:`app.services.consent`). It returns immediately when
+    nothing matches.
 
     Parameters
     ----------
     driver
         A Selenium WebDriver instance pointing to the current page.
+    url: str
+        The URL requested for the page, used as the cache key.
 
     Returns
     -------
     bool
         ``True`` if a consent button was clicked, ``False`` otherwise.
     """
-    # Define keywords in lower case for matching
-    keywords = [
-        "accept",
-        "agree",
-        "accepter",
-        "j'accepte",
-        "consent",
-        "ok",
-        "oui",
-    ]
-    try:
-        # Wait briefly for any modal or banner to appear
-        WebDriverWait(driver, 2).until(lambda d: True)
-        buttons = driver.find_elements(By.XPATH, "//button")
-        for btn in buttons:
-            text = (btn.text or "").strip().lower()
-            # Some banners use `<span>` inside buttons; fallback to aria-label
-            aria = (btn.get_attribute("aria-label") or "").strip().lower()
-            combined = text + " " + aria
-            if any(kw in combined for kw in keywords):
-                try:
-                    btn.click()
-                    return True
-                except Exception:
-                    continue
-    except Exception:
-        pass
-    return False
+    return accept_cookie_banner(driver, url, CONSENT_CACHE)
 
 
 def autofill_form(
@@ -141,11 +266,12 @@ def autofill_form(
     wait_seconds: int = 10,
     *,
     close_driver: bool = True,
+    bulk_fill: bool = AUTOFILL_BULK_FILL,
 ) -> list[AutofilledField] | tuple[list[AutofilledField], any]:
     """
     Fill as many user‑fillable fields on the given page as possible.
 
-    A headless Chrome browser is created, navigates to ``url`` and waits
+    A Chrome browser is taken from the driver pool, navigates to ``url`` and waits
     until the page's ``<body>`` element is present. All input, textarea and
     select elements are then inspected. Each field is passed through the
     matcher to infer which ``user_data`` attribute may correspond to it. When
@@ -170,6 +296,12 @@ def autofill_form(
         ``True`` (the default), the browser instance is quit and only the
         list of autofilled fields is returned. If ``False``, the driver
         remains open and the return value is a 2‑tuple ``(fields, driver)``.
+    bulk_fill: bool, optional
+        Fill all matched fields with a single injected script that uses the
+        native value setter and dispatches ``input``/``change`` events.
+        Fields the script reports as not filled are retried with
+        ``send_keys``. Defaults to the ``AUTOFILL_BULK_FILL`` setting; when
+        ``False`` every field is typed with ``send_keys``.
 
     Returns
     -------
@@ -181,46 +313,55 @@ def autofill_form(
         the list order corresponds to the DOM order of the inspected
         elements.
     """
-    # Always create a new browser instance. When ``close_driver`` is False the
-    # caller is responsible for cleaning up the returned driver.  The return
-    # type is either just the list of :class:`AutofilledField` records (the
-    # historical behaviour) or a tuple ``(fields, driver)`` when
-    # ``close_driver`` is ``False``.
-    driver = create_driver()
+    # When ``close_driver`` is True a warm browser is borrowed from the shared
+    # pool and handed back (cookies and storage wiped) at the end of the call.
+    # When it is False a dedicated browser is created and the caller is
+    # responsible for cleaning up the returned driver.  The return type is
+    # either just the list of :class:`AutofilledField` records (the historical
+    # behaviour) or a tuple ``(fields, driver)`` when ``close_driver`` is
+    # ``False``.
+    driver = DRIVER_POOL.acquire() if close_driver else create_driver()
     fields: list[AutofilledField] = []
     try:
         # Navigate to the page and wait until the body is present
+        started = time.perf_counter()
         driver.get(url)
         # Wait for the body to ensure page is loaded
         WebDriverWait(driver, wait_seconds).until(
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
+        if close_driver:
+            RENDER_METRICS.measure(driver, started)
 
         # Handle common cookie consent pop‑ups by attempting to click an
         # “accept cookies” button. Many sites display a modal or banner on
-        # initial load that blocks interaction until cookies are accepted.  We
-        # search for buttons containing typical consent keywords and click the
-        # first match.  If none is found within a short timeout, we continue
-        # without raising an error.
-        _accept_cookie_banner(driver)
-
-        # Gather all input-like elements in the main document
-        elements = driver.find_elements(By.CSS_SELECTOR, "input, select, textarea")
-
-        for element in elements:
-            field_model = _build_field(element)
-            matched_key, confidence, reason = match_field_to_user_key(field_model)
-            filled = False
-            # Only attempt to fill if we have a user value for the matched key
-            if matched_key:
-                value = getattr(user_data, matched_key, None)
-                if value is not None and value != "":
-                    # For selects use a dedicated handler
-                    if field_model.tag == "select":
-                        filled = _fill_select(element, str(value))
-                    else:
-                        filled = _fill_input(element, str(value))
+        # initial load that blocks interaction until cookies are accepted.  The
+        # known selectors and the consent keywords are tried in one script;
+        # if none matches we continue at once without raising an error.
+        _accept_cookie_banner(driver, url)
+
+        # Describe every input-like element of the main document (attributes,
+        # resolved label, visibility) in a single round trip
+        snapshot = _snapshot_fields(driver)
+        field_models = [item.field for item in snapshot]
+        # Match every field in a single embedding pass
+        matches = match_fields_batch(field_models)
+
+        # Fill plan: only visible text-like fields for which we have a user
+        # value for the matched key (checkboxes and radios are left alone)
+        plan = _fill_plan(snapshot, matches, user_data)
+
+        # In bulk mode the whole plan is sent in one script; fields it could
+        # not fill fall back to keystrokes, one field at a time
+        filled_handles = _bulk_fill(driver, plan) if bulk_fill else {}
+        for item, value in plan:
+            if not filled_handles.get(item.handle):
+                filled_handles[item.handle] = _fill_field(item, value)
 
+        for item, field_model, (matched_key, confidence, reason) in zip(
+            snapshot, field_models, matches
+        ):
+            filled = bool(filled_handles.get(item.handle))
             fields.append(
                 AutofilledField(
                     tag=field_model.tag,
@@ -229,6 +370,8 @@ def autofill_form(
                     id=field_model.id,
                     placeholder=field_model.placeholder,
                     label=field_model.label,
+                    autocomplete=field_model.autocomplete,
+                    aria_label=field_model.aria_label,
                     matched_key=matched_key,
                     confidence=confidence,
                     reason=reason,
@@ -245,11 +388,8 @@ def autofill_form(
         else:
             return fields, driver
     finally:
-        # When close_driver is True, clean up the browser instance here.
-        # Swallow any exceptions that occur during teardown so that errors
-        # during driver.quit() don't propagate.
+        # When close_driver is True, return the browser to the pool here.  The
+        # pool resets it, or quits it if the session crashed, without letting
+        # teardown errors propagate.
         if close_driver:
-            try:
-                driver.quit()
-            except WebDriverException:
-                pass
+            DRIVER_POOL.release(driver)
@@ -0,0 +1,212 @@
+"""Cookie consent banners, dismissed with one in-page script.
+
+The autofiller used to wait on a no-op ``WebDriverWait(driver, 2)``, list
+every ``<button>`` of the page and read ``text`` and ``aria-label`` of each
+one through WebDriver (two round trips per button) before clicking.
+:func:`accept_cookie_banner` runs :data:`CONSENT_SCRIPT` once instead. The
+script tries, in order:
+
+1. the selector that worked last time on the same domain (:class:`ConsentCache`);
+2. the accept buttons of common consent platforms (:data:`KNOWN_CONSENT_SELECTORS`);
+3. a visible button whose text or ``aria-label`` contains a consent keyword
+   as a whole word ("OK" matches "OK" or "OK, merci", not "Facebook"). Only
+   the buttons of likely banners are read: dialogs and elements whose id or
+   class mentions cookies or consent (:data:`BANNER_CONTAINER_SELECTORS`),
+   plus the fixed or sticky children of ``<body>``.
+
+It clicks the first visible match and returns at once, whether or not a
+banner was found.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+# Boutons « tout accepter » des plateformes de consentement courantes.
+KNOWN_CONSENT_SELECTORS = [
+    # OneTrust
+    "#onetrust-accept-btn-handler",
+    # Didomi
+    "#didomi-notice-agree-button",
+    # Quantcast Choice
+    ".qc-cmp2-summary-buttons button[mode='primary']",
+    "#qc-cmp2-ui button[mode='primary']",
+    # Cookiebot
+    "#CybotCookiebotDialogBodyLevelButtonLLWhitelistAll",
+    "#CybotCookiebotDialogBodyButtonAccept",
+    # Axeptio
+    "#axeptio_btn_acceptAll",
+    # TrustArc
+    "#truste-consent-button",
+]
+
+# Conteneurs probables d'une bannière, seuls parcourus par la recherche par mot-clé.
+BANNER_CONTAINER_SELECTORS = [
+    "dialog",
+    "[role='dialog']",
+    "[role='alertdialog']",
+    "[aria-modal='true']",
+    "[id*='cookie' i]",
+    "[class*='cookie' i]",
+    "[id*='consent' i]",
+    "[class*='consent' i]",
+    "[id*='gdpr' i]",
+    "[class*='gdpr' i]",
+]
+
+CONSENT_KEYWORDS = [
+    "accept",
+    "agree",
+    "accepter",
+    "j'accepte",
+    "consent",
+    "ok",
+    "oui",
+]
+
+# Renvoie {selector, source} pour le bouton cliqué, ou null. ``selector`` est
+# null quand le bouton trouvé par mot-clé n'a pas d'identifiant réutilisable.
+CONSENT_SCRIPT = r"""
+const selectors = arguments[0];
+const keywords = arguments[1];
+const cached = arguments[2];
+const containerSelector = arguments[3];
+function visible(element) {
+  if (!element.getClientRects().length) {
+    return false;
+  }
+  const style = window.getComputedStyle(element);
+  return style.visibility !== "hidden" && style.display !== "none";
+}
+function query(selector) {
+  try {
+    return Array.from(document.querySelectorAll(selector)).find(visible) || null;
+  } catch (e) {
+    return null;
+  }
+}
+// Mots du texte, apostrophes typographiques normalisées : un mot-clé doit
+// correspondre à un ou plusieurs mots entiers.
+function words(text) {
+  return " " + text.toLowerCase().replace(/\u2019/g, "'").split(/[^\p{L}\p{N}']+/u).filter(Boolean).join(" ") + " ";
+}
+const candidates = cached ? [[cached, "cached"]] : [];
+for (const selector of selectors) {
+  if (selector !== cached) {
+    candidates.push([selector, "known"]);
+  }
+}
+for (const [selector, source] of candidates) {
+  const element = query(selector);
+  if (element) {
+    element.click();
+    return {selector: selector, source: source};
+  }
+}
+// Bannières probables : conteneurs connus et enfants fixes ou collants du body.
+const containers = new Set(document.querySelectorAll(containerSelector));
+for (const child of document.body ? document.body.children : []) {
+  const position = window.getComputedStyle(child).position;
+  if (position === "fixed" || position === "sticky") {
+    containers.add(child);
+  }
+}
+const seen = new Set();
+for (const container of containers) {
+  for (const button of container.querySelectorAll("button, [role='button']")) {
+    if (seen.has(button)) {
+      continue;
+    }
+    seen.add(button);
+    const text = words((button.innerText || "") + " " + (button.getAttribute("aria-label") || ""));
+    if (visible(button) && keywords.some(function (keyword) { return text.includes(" " + keyword + " "); })) {
+      button.click();
+      return {selector: button.id ? "#" + CSS.escape(button.id) : null, source: "keyword"};
+    }
+  }
+}
+return null;
+"""
+
+
+class ConsentCache:
+    """Per-domain LRU of the consent button selector that worked last time."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._selectors: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, domain: str) -> str | None:
+        with self._lock:
+            selector = self._selectors.get(domain)
+            if selector is not None:
+                self._selectors.move_to_end(domain)
+            return selector
+
+    def put(self, domain: str, selector: str) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._selectors[domain] = selector
+            self._selectors.move_to_end(domain)
+            while len(self._selectors) > self.maxsize:
+                self._selectors.popitem(last=False)
+
+    def discard(self, domain: str) -> None:
+        with self._lock:
+            self._selectors.pop(domain, None)
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "domains": len(self._selectors),
+                "maxsize": self.maxsize,
+            }
+
+
+def accept_cookie_banner(driver, url: str, cache: ConsentCache) -> bool:
+    """Click the consent button of the current page, if any, in one round trip.
+
+    Returns ``True`` when a button was clicked. Errors are swallowed so that
+    a failing banner never interrupts the auto‑fill workflow.
+    """
+    domain = urlsplit(url).hostname or ""
+    cached = cache.get(domain)
+    try:
+        result = driver.execute_script(
+            CONSENT_SCRIPT,
+            KNOWN_CONSENT_SELECTORS,
+            CONSENT_KEYWORDS,
+            cached,
+            ", ".join(BANNER_CONTAINER_SELECTORS),
+        )
+    except WebDriverException:
+        return False
+
+    # Succès : bouton trouvé par sélecteur (mémorisé ou plateforme connue).
+    # Échec : repli sur les mots-clés, ou aucune bannière trouvée.
+    cache.record(bool(result) and result.get("source") in ("cached", "known"))
+    if not result:
+        return False
+    if result.get("selector"):
+        cache.put(domain, result["selector"])
+    elif cached is not None:
+        # Le sélecteur mémorisé ne correspond plus à rien sur ce domaine.
+        cache.discard(domain)
+    return True
@@ -0,0 +1,265 @@
+"""Pool of warm Chrome WebDriver sessions.
+
+Launching Chrome costs one to three seconds, far more than rendering most
+pages. :class:`DriverPool` keeps a bounded set of browsers alive and leases
+them to callers one at a time:
+
+* ``acquire`` hands out an idle driver after a health check, or starts a new
+  one while the pool is below ``max_size``; otherwise it waits for a release.
+* ``release`` wipes cookies, every storage type of every origin (local and
+  session storage, IndexedDB, Cache Storage, service workers) and extra
+  windows so that one request can never see the state left by the previous
+  one, then returns the driver to
+  the idle list. A driver that fails to reset (crashed browser) or that has
+  served ``max_pages`` leases is quit. When that leaves fewer than
+  ``min_size`` drivers alive, a background thread starts new ones so that
+  the pool stays warm.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, suppress
+from typing import Callable, Iterator
+
+from selenium.common.exceptions import WebDriverException
+
+
+class DriverPoolTimeout(WebDriverException):
+    """Raised when no driver becomes available within the acquire timeout."""
+
+
+# Stockage de toutes les origines, via CDP : cookies, local/session storage,
+# IndexedDB, Cache Storage, service workers...
+_CLEAR_ALL_STORAGE = {"origin": "*", "storageTypes": "all"}
+
+# Sans CDP (navigateur autre que Chrome) : stockage de la page courante seulement.
+_CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage && window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage && window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+class DriverPool:
+    """Bounded pool of reusable WebDriver instances.
+
+    Parameters
+    ----------
+    factory: callable
+        Zero‑argument callable returning a new WebDriver.
+    min_size: int
+        Number of drivers started by :meth:`warm` and kept idle.
+    max_size: int
+        Maximum number of drivers alive at the same time.
+    max_pages: int
+        Number of leases after which a driver is recycled. ``0`` disables
+        recycling.
+    acquire_timeout: float
+        Seconds :meth:`acquire` waits for a free driver before giving up.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        *,
+        min_size: int = 0,
+        max_size: int = 2,
+        max_pages: int = 50,
+        acquire_timeout: float = 30.0,
+    ) -> None:
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.max_pages = max_pages
+        self.acquire_timeout = acquire_timeout
+        self._idle: deque = deque()
+        self._uses: dict[int, int] = {}
+        self._total = 0
+        self._closed = False
+        self._refilling = False
+        self._cond = threading.Condition()
+        self.created = 0
+        self.recycled = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle helpers
+    # ------------------------------------------------------------------
+    def _create(self):
+        driver = self.factory()
+        with self._cond:
+            self.created += 1
+        return driver
+
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver) -> None:
+        """Remove every trace of the previous lease from ``driver``."""
+        # Fenêtres ouvertes par la page (popups, target=_blank).
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.switch_to.default_content()
+        try:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", _CLEAR_ALL_STORAGE)
+            # Supprime les cookies de tous les domaines, pas seulement le courant.
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            driver.execute_script(_CLEAR_STORAGE_SCRIPT)
+            driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _discard(self, driver, recycled: bool = True) -> None:
+        with suppress(Exception):
+            driver.quit()
+        with self._cond:
+            self._uses.pop(id(driver), None)
+            self._total -= 1
+            if recycled:
+                self.recycled += 1
+            self._cond.notify()
+            refill = not self._closed and not self._refilling and self._total < self.min_size
+            self._refilling = self._refilling or refill
+        if refill:
+            threading.Thread(target=self._refill, name="driver-pool-refill", daemon=True).start()
+
+    def _refill(self) -> None:
+        """Start drivers until ``min_size`` are alive again (background thread)."""
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.min_size:
+                    self._refilling = False
+                    return
+                self._total += 1
+            try:
+                driver = self._create()
+            except Exception:
+                # Chrome ne démarre pas : le prochain recyclage réessaiera.
+                with self._cond:
+                    self._total -= 1
+                    self._refilling = False
+                    self._cond.notify()
+                return
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._uses[id(driver)] = 0
+                    self._idle.append(driver)
+                    self._cond.notify()
+            if closed:
+                self._discard(driver, recycled=False)
+
+    def warm(self) -> int:
+        """Start drivers until ``min_size`` are idle. Returns how many started."""
+        started = 0
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) >= self.min_size or self._total >= self.max_size:
+                    return started
+                self._total += 1
+            try:
+                driver = self._create()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            with self._cond:
+                self._idle.append(driver)
+                self._uses[id(driver)] = 0
+                self._cond.notify()
+            started += 1
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+    def acquire(self, timeout: float | None = None):
+        """Check out a healthy driver, starting one if the pool has room."""
+        deadline = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                while not self._idle and self._total >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._closed:
+                        raise DriverPoolTimeout("No WebDriver available in the pool")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise DriverPoolTimeout("WebDriver pool is closed")
+                driver = self._idle.popleft() if self._idle else None
+                if driver is None:
+                    self._total += 1
+
+            if driver is None:
+                try:
+                    driver = self._create()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._uses[id(driver)] = 0
+                return driver
+
+            if self._is_healthy(driver):
+                return driver
+            # Navigateur planté pendant qu'il était inactif : on le remplace.
+            self._discard(driver)
+
+    def release(self, driver) -> None:
+        """Return ``driver`` to the pool, or quit it if it must be recycled."""
+        with self._cond:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            closed = self._closed
+        if closed or (self.max_pages and uses >= self.max_pages):
+            self._discard(driver, recycled=not closed)
+            return
+        try:
+            self._reset(driver)
+        except Exception:
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: float | None = None) -> Iterator:
+        """Context manager around :meth:`acquire` / :meth:`release`."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self) -> None:
+        """Quit every idle driver and refuse new leases."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver, recycled=False)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "total": self._total,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "created": self.created,
+                "recycled": self.recycled,
+            }
@@ -0,0 +1,172 @@
+"""Bounded cache of field embeddings, keyed by the normalized field blob.
+
+The same normalized ``_field_text`` blobs (``"input text email email votre
+email"``...) come up on many sites. :class:`EmbeddingCache` keeps their
+vectors in an LRU of fixed size so that the encoder only sees new blobs.
+
+The cache can optionally be backed by a ``.npy`` file. The file holds a
+structured array ``(key, vector)`` and is opened as a read‑only memory map, so
+several uvicorn workers can share the same pages without copying them. New
+entries live in memory until :meth:`EmbeddingCache.persist` rewrites the file
+atomically (temporary file + ``os.replace``). Every worker persists at exit:
+the rewrite holds an exclusive lock on ``<path>.lock`` and re-reads the file
+first, so that each worker adds its entries to those of the others instead
+of overwriting them with its own view.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# Longueur maximale d'une clé persistée. Les blobs plus longs restent en mémoire.
+KEY_LENGTH = 256
+
+
+class EmbeddingCache:
+    """Thread‑safe LRU of embedding vectors with an optional on‑disk tier.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of vectors kept in memory. ``0`` disables caching.
+    path: str, optional
+        Location of the memory‑mapped vector file. When the file exists it is
+        loaded read‑only at construction time.
+    """
+
+    def __init__(self, maxsize: int, path: Optional[str] = None) -> None:
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._disk: Optional[np.ndarray] = None
+        self._disk_index: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._open_disk()
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+    def _open_disk(self) -> None:
+        try:
+            disk = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError):
+            # Fichier corrompu ou illisible : on repart d'un cache vide.
+            self._disk, self._disk_index = None, {}
+            return
+        self._disk = disk
+        self._disk_index = {str(key): i for i, key in enumerate(disk["key"])}
+
+    def persist(self) -> int:
+        """Merge the in‑memory entries into the file at ``path``.
+
+        The file is re-read under an exclusive lock, so entries persisted by
+        other workers since this one opened it are kept. At most ``maxsize``
+        entries are kept, most recently used first. Returns the number of
+        entries written (``0`` when no path is set).
+        """
+        if not self.path:
+            return 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "a") as lock_file:
+            # Verrou inter-processus, relâché à la fermeture du fichier.
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._open_disk()
+            merged: OrderedDict[str, np.ndarray] = OrderedDict()
+            if self._disk is not None:
+                for key, i in self._disk_index.items():
+                    if key not in self._entries:
+                        merged[key] = np.asarray(self._disk["vector"][i])
+            for key, vector in self._entries.items():
+                if len(key) <= KEY_LENGTH:
+                    merged[key] = vector
+            items = list(merged.items())[-self.maxsize:] if self.maxsize else []
+            if not items:
+                return 0
+
+            # Un fichier écrit par un autre modèle (autre dimension) est remplacé.
+            dim = items[-1][1].shape[0]
+            items = [(key, vector) for key, vector in items if vector.shape == (dim,)]
+            dtype = np.dtype([("key", f"U{KEY_LENGTH}"), ("vector", "f4", (dim,))])
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy")
+            os.close(fd)
+            try:
+                out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(len(items),))
+                for i, (key, vector) in enumerate(items):
+                    out[i] = (key, vector)
+                out.flush()
+                del out
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._open_disk()
+            return len(items)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def get_many(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        """Return the cached vector for each key, or ``None`` on a miss."""
+        found: list[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                elif key in self._disk_index:
+                    vector = np.array(self._disk["vector"][self._disk_index[key]])
+                    self._insert(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                found.append(vector)
+        return found
+
+    def put_many(self, keys: list[str], vectors: np.ndarray) -> None:
+        """Store freshly encoded vectors, evicting the least recently used."""
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._insert(key, np.asarray(vector, dtype=np.float32))
+
+    def _insert(self, key: str, vector: np.ndarray) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self) -> dict:
+        """Counters for monitoring: hits, misses, sizes and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "disk_size": len(self._disk_index),
+                "path": self.path,
+            }
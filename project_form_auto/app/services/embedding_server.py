@@ -0,0 +1,172 @@
+"""Local encoder process shared by every uvicorn worker of a node.
+
+With the in-process backends each worker loads its own copy of the model
+and of the candidate embeddings. With ``EMBEDDING_BACKEND=remote`` the
+workers hold neither: one encoder process started with::
+
+    python -m app.services.embedding_server /run/form-auto/encoder.sock
+
+owns the model (``EMBEDDING_SERVER_BACKEND``) and answers over a Unix
+socket. It also encodes the candidate texts of the field mapper once and
+publishes them in a shared memory segment, which every worker maps
+read-only instead of keeping its own copy
+(:meth:`app.services.encoders.RemoteEncoder.encode_candidates`).
+
+Messages, in both directions, are a 4-byte big-endian length, a JSON
+header and ``header["nbytes"]`` bytes of payload. Every reply carries the
+``backend`` the server runs, so that workers key their caches by the model
+that actually produced the vectors:
+
+* ``{"op": "info"}`` -> ``{"backend": ...}``;
+* ``{"op": "encode", "texts": [...]}`` -> ``{"shape": [n, d]}`` followed by
+  the ``float32`` vectors;
+* ``{"op": "candidates", "digest": ...}`` -> ``{"name": ..., "shape": [n, d]}``,
+  the shared memory segment of the candidate embeddings, or ``{"name": null}``
+  when the worker's candidate texts differ from the server's (the worker
+  then encodes them through ``encode``);
+* any failure -> ``{"error": "..."}``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from app.config import EMBEDDING_SERVER_BACKEND
+from app.services.synonyms import CANDIDATE_TEXTS
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+
+def texts_digest(texts: list[str]) -> str:
+    return hashlib.sha256("\n".join(texts).encode("utf-8")).hexdigest()
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Encoder connection closed")
+        received += count
+    return bytes(buffer)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    header = {**header, "nbytes": len(payload)}
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(encoded)) + encoded + payload)
+
+
+def recv_message(sock: socket.socket) -> tuple[dict, bytes]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, length))
+    payload = _recv_exact(sock, header.get("nbytes", 0))
+    return header, payload
+
+
+def attach_candidates(name: str, shape: list[int]) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Map the candidate segment published by the server, read-only."""
+    try:
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 : le resource tracker supprimerait le segment du
+        # serveur à la sortie du worker.
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+    vectors = np.ndarray(tuple(shape), dtype=np.float32, buffer=segment.buf)
+    vectors.flags.writeable = False
+    return segment, vectors
+
+
+class EncoderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running one encoder for every connected worker."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, encoder, candidate_texts: list[str]) -> None:
+        self.encoder = encoder
+        # Le modèle n'est pas garanti thread-safe : un encodage à la fois,
+        # chacun profitant des threads intra-op du backend.
+        self.encode_lock = threading.Lock()
+        self.candidates_digest = texts_digest(candidate_texts)
+        candidates = np.ascontiguousarray(encoder.encode(candidate_texts), dtype=np.float32)
+        self.candidates_shape = list(candidates.shape)
+        self.segment = shared_memory.SharedMemory(create=True, size=max(candidates.nbytes, 1))
+        np.ndarray(candidates.shape, dtype=np.float32, buffer=self.segment.buf)[:] = candidates
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _EncoderHandler)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        with self.encode_lock:
+            return np.ascontiguousarray(self.encoder.encode(texts), dtype=np.float32)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.segment.close()
+        self.segment.unlink()
+
+
+class _EncoderHandler(socketserver.BaseRequestHandler):
+    server: EncoderServer
+
+    def handle(self) -> None:
+        # Une connexion par thread de worker, gardée ouverte entre les requêtes.
+        while True:
+            try:
+                request, _ = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            backend = {"backend": self.server.encoder.name}
+            try:
+                if request.get("op") == "info":
+                    send_message(self.request, backend)
+                elif request.get("op") == "encode":
+                    vectors = self.server.encode(request["texts"])
+                    send_message(self.request, {**backend, "shape": list(vectors.shape)}, vectors.tobytes())
+                elif request.get("op") == "candidates":
+                    name = self.server.segment.name if request.get("digest") == self.server.candidates_digest else None
+                    send_message(self.request, {**backend, "name": name, "shape": self.server.candidates_shape})
+                else:
+                    send_message(self.request, {"error": f"Unknown op: {request.get('op')!r}"})
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_message(self.request, {"error": str(e) or type(e).__name__})
+
+
+def serve(socket_path: str, backend: str = EMBEDDING_SERVER_BACKEND) -> None:
+    from app.services.encoders import load_encoder
+
+    server = EncoderServer(socket_path, load_encoder(backend), CANDIDATE_TEXTS)
+    logger.info("Encoder %s listening on %s", backend, socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    arguments = argparse.ArgumentParser(prog="python -m app.services.embedding_server")
+    arguments.add_argument("socket_path", help="Unix socket the workers connect to")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    serve(arguments.parse_args().socket_path)
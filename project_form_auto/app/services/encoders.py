@@ -0,0 +1,242 @@
+"""Sentence encoders used by the field mapper.
+
+Every backend turns short texts into L2-normalised ``float32`` vectors of
+the same model, paraphrase-multilingual-MiniLM-L12-v2:
+
+* ``sentence-transformers`` (:class:`SentenceTransformerEncoder`) is the
+  reference: the PyTorch model run by sentence-transformers;
+* ``onnx`` (:class:`OnnxEncoder`) runs the same transformer exported to ONNX
+  and quantised to int8 with ONNX Runtime, then applies the mean pooling of
+  the reference model. It needs neither PyTorch nor sentence-transformers at
+  run time, only ``onnxruntime`` and ``tokenizers``;
+* ``remote`` (:class:`RemoteEncoder`) loads no model: it sends the texts to
+  the local encoder process of :mod:`app.services.embedding_server`, shared
+  by every uvicorn worker of the node.
+
+The ONNX files are produced once with :func:`export_onnx`::
+
+    python -c "from app.services.encoders import export_onnx; export_onnx('models/minilm-int8')"
+
+``EMBEDDING_THREADS`` caps the intra-op threads of either backend, so that
+several uvicorn workers on one node do not oversubscribe its cores.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+
+from app.config import EMBEDDING_ONNX_PATH, EMBEDDING_SOCKET, EMBEDDING_THREADS
+
+MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# Longueur maximale des séquences du modèle de référence.
+MAX_SEQ_LENGTH = 128
+ONNX_MODEL_FILE = "model.int8.onnx"
+
+
+class Encoder(ABC):
+    """Base class: ``encode`` returns one unit vector per text."""
+
+    name = ""
+
+    @abstractmethod
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Return one L2-normalised ``float32`` row per text."""
+
+    def encode_candidates(self, texts: list[str]) -> np.ndarray:
+        """Encode the mapper candidate texts, computed once per process."""
+        return self.encode(texts)
+
+    @property
+    def model_backend(self) -> str:
+        """Backend that actually produces the vectors (cache namespaces, versions)."""
+        return self.name
+
+
+class SentenceTransformerEncoder(Encoder):
+    """Reference backend: the PyTorch model through sentence-transformers."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = MODEL_NAME, threads: int = EMBEDDING_THREADS) -> None:
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        if threads:
+            import torch  # type: ignore
+
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+
+class OnnxEncoder(Encoder):
+    """int8 ONNX export of the reference model, run with ONNX Runtime."""
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str = EMBEDDING_ONNX_PATH, threads: int = EMBEDDING_THREADS) -> None:
+        import onnxruntime as ort  # type: ignore
+        from tokenizers import Tokenizer  # type: ignore
+
+        model_dir = Path(model_dir)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        pad_token = "<pad>" if self.tokenizer.token_to_id("<pad>") is not None else "[PAD]"
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad_token), pad_token=pad_token)
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, inputs)[0]
+
+        # Mean pooling sur les tokens réels, comme le modèle de référence.
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class RemoteEncoder(Encoder):
+    """Client of the shared encoder process (:mod:`app.services.embedding_server`)."""
+
+    name = "remote"
+
+    def __init__(self, socket_path: str = EMBEDDING_SOCKET) -> None:
+        self.socket_path = socket_path
+        self._local = threading.local()
+        self._segment = None
+        # Échoue tout de suite si le serveur n'écoute pas : le mapper retombe
+        # alors sur les tokens, comme pour un modèle absent.
+        self.server_backend = self._request({"op": "info"})[0]["backend"]
+
+    @property
+    def model_backend(self) -> str:
+        return self.server_backend
+
+    def _connection(self) -> socket.socket:
+        # Une connexion par thread, réutilisée d'une requête à l'autre.
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _request(self, header: dict) -> tuple[dict, bytes]:
+        from app.services.embedding_server import recv_message, send_message
+
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                send_message(sock, header)
+                response, payload = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                # Serveur redémarré : une nouvelle connexion, une seule fois.
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Encoder server error: {response['error']}")
+        backend = getattr(self, "server_backend", None)
+        if backend is not None and response.get("backend") != backend:
+            # Serveur relancé avec un autre modèle : ses vecteurs ne sont plus
+            # comparables aux candidats et aux caches de ce worker.
+            raise RuntimeError(
+                f"Encoder server switched backend from {backend!r} to {response.get('backend')!r}"
+            )
+        return response, payload
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        response, payload = self._request({"op": "encode", "texts": list(texts)})
+        return np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+
+    def encode_candidates(self, texts: list[str]) -> np.ndarray:
+        """Map the candidate embeddings published by the server, read-only.
+
+        Falls back to :meth:`encode` when the server holds other candidate
+        texts (a worker and a server of different versions).
+        """
+        from app.services.embedding_server import attach_candidates, texts_digest
+
+        response, _ = self._request({"op": "candidates", "digest": texts_digest(texts)})
+        if not response.get("name"):
+            return self.encode(texts)
+        self._segment, vectors = attach_candidates(response["name"], response["shape"])
+        return vectors
+
+
+ENCODER_BACKENDS: dict[str, type[Encoder]] = {
+    SentenceTransformerEncoder.name: SentenceTransformerEncoder,
+    OnnxEncoder.name: OnnxEncoder,
+    RemoteEncoder.name: RemoteEncoder,
+}
+
+
+def load_encoder(backend: str) -> Encoder:
+    try:
+        encoder_class = ENCODER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend: {backend!r}") from None
+    return encoder_class()
+
+
+def export_onnx(output_dir: str, model_name: str = MODEL_NAME) -> Path:
+    """Export ``model_name`` to ONNX and quantise it to int8 in ``output_dir``.
+
+    Needs the reference stack (torch, sentence-transformers) plus
+    ``onnxruntime``; only the resulting directory is needed at run time.
+    """
+    import torch  # type: ignore
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+    from sentence_transformers import SentenceTransformer  # type: ignore
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    reference = SentenceTransformer(model_name, device="cpu")
+    transformer = reference[0].auto_model.eval()
+    tokenizer = reference.tokenizer
+    tokenizer.save_pretrained(str(out))
+
+    sample = tokenizer(["adresse e-mail"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in [*input_names, "last_hidden_state"]}
+    fp32_path = out / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    quantize_dynamic(str(fp32_path), str(out / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    return out
@@ -0,0 +1,140 @@
+"""Bounded executors and admission control for the async request pipeline.
+
+The form endpoints are ``async def``: the event loop only coordinates, and
+every blocking step runs in a dedicated, bounded pool instead of FastAPI's
+shared threadpool:
+
+* ``io``: network fetches (``requests`` through the shared keep-alive pool);
+* ``cpu``: HTML parsing, field extraction and mapping;
+* ``render``: Selenium sessions, sized like the WebDriver pool.
+
+:class:`RequestLimiter` caps the number of requests admitted at once. Past
+the cap new requests are refused immediately (the routers answer ``503``
+with ``Retry-After``) instead of piling up in unbounded queues. Batch
+endpoints, which fan one request out to many pages, take one slot per page
+in flight through :meth:`RequestLimiter.acquire` and wait for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import (
+    CPU_WORKERS,
+    DRIVER_POOL_MAX_SIZE,
+    IO_WORKERS,
+    MAX_INFLIGHT_REQUESTS,
+    RETRY_AFTER_SECONDS,
+)
+
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+CPU_EXECUTOR = ThreadPoolExecutor(
+    max_workers=CPU_WORKERS or os.cpu_count() or 1, thread_name_prefix="cpu"
+)
+RENDER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(DRIVER_POOL_MAX_SIZE, 1), thread_name_prefix="render"
+)
+
+
+async def _run(executor: ThreadPoolExecutor, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking network call in the I/O pool."""
+    return await _run(IO_EXECUTOR, fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run parsing / mapping work in the CPU pool."""
+    return await _run(CPU_EXECUTOR, fn, *args, **kwargs)
+
+
+async def run_render(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a Selenium session in the render pool."""
+    return await _run(RENDER_EXECUTOR, fn, *args, **kwargs)
+
+
+class RequestLimiter:
+    """Counts requests in flight and refuses new ones past ``max_inflight``.
+
+    Only touched from the event loop thread, so plain counters are enough.
+    Admitted requests beyond the executors' capacity wait in those bounded
+    pools; the total amount of queued work is therefore bounded as well.
+    """
+
+    def __init__(self, max_inflight: int, retry_after: int) -> None:
+        self.max_inflight = max_inflight
+        self.retry_after = retry_after
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waited = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def _take(self) -> bool:
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return False
+        self.inflight += 1
+        self.admitted += 1
+        return True
+
+    def try_acquire(self) -> bool:
+        if not self._take():
+            self.rejected += 1
+            return False
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for a slot instead of being refused (pages of a batch).
+
+        Requests admitted through :meth:`try_acquire` are not queued behind
+        the waiters: interactive calls keep priority over batch work.
+        """
+        if self._take():
+            return
+        self.waited += 1
+        while True:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Réveillé puis annulé : on passe le tour au suivant.
+                    self._wake()
+                raise
+            if self._take():
+                return
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def release(self) -> None:
+        self.inflight = max(self.inflight - 1, 0)
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "waited": self.waited,
+            "waiting": len(self._waiters),
+        }
+
+
+REQUEST_LIMITER = RequestLimiter(MAX_INFLIGHT_REQUESTS, RETRY_AFTER_SECONDS)
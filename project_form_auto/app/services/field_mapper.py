@@ -17,137 +17,49 @@ te
 
 """
 from __future__ import annotations
+
 import os
+
 os.environ["HF_HUB_TIMEOUT"] = "60"
 os.environ["HF_HUB_ETAG_TIMEOUT"] = "60"
 os.environ["HF_HUB_DISABLE_TELEMETRY"] = "1"  # optional
 
 
+import atexit
+import hashlib
 import re
-from typing import List, Tuple, Optional
+from typing import List, Optional, Tuple
 
 import numpy as np
 
-from app.models.schemas import FormField
-import os
-
+from app.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_MAX_SIZE,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_SIZE,
+    MAPPING_MEMO_PATH,
+    MAPPING_MEMO_SIZE,
+    TEMPLATE_REGISTRY_SIZE,
+    TEMPLATE_SIMILARITY,
+)
+from app.models.schemas import FormField, MappedFormField
+from app.services.embedding_cache import EmbeddingCache
+from app.services.encoders import (
+    Encoder,
+    RemoteEncoder,
+    SentenceTransformerEncoder,
+    load_encoder,
+)
+from app.services.form_templates import TemplateRegistry, field_signature
+from app.services.mapping_memo import MappingMemo, form_fingerprint, site_key
+from app.services.micro_batcher import MicroBatcher
+from app.services.synonyms import CANDIDATE_KEYS as _CANDIDATE_KEYS
+from app.services.synonyms import CANDIDATE_TEXTS as _CANDIDATE_TEXTS
+from app.services.synonyms import SYNONYMS
+
+REFERENCE_BACKEND = SentenceTransformerEncoder.name
 
-# --------------------------------------------------------------------------------------
-# Définitions des candidats et liste de synonymes
-# --------------------------------------------------------------------------------------
-#
-# Bien que la correspondance repose désormais principalement sur la similarité
-# sémantique, nous conservons une liste de synonymes soigneusement sélectionnés
-# pour chaque clé UserData. Cela permet de constituer un ensemble d’expressions
-# représentatives à comparer avec le modèle d’embeddings, et sert également de
-# stratégie de correspondance de secours lorsque le modèle n’est pas disponible.
-# Les clés correspondent aux champs du modèle :class:`~app.models.schemas.UserData`.
-
-SYNONYMS: dict[str, List[str]] = {
-    "email": [
-        "email",
-        "e mail",
-        "mail",
-        "courriel",
-        "email address",
-        "adresse mail",
-    ],
-    "phone": [
-        "phone",
-        "tel",
-        "telephone",
-        "téléphone",
-        "mobile",
-        "gsm",
-        "cell",
-        "cellphone",
-        "phone number",
-    ],
-    "first_name": [
-        "first name",
-        "firstname",
-        "f name",
-        "prenom",
-        "prénom",
-        "given name",
-        "forename",
-    ],
-    "last_name": [
-        "last name",
-        "lastname",
-        "l name",
-        "nom",
-        "surname",
-        "family name",
-        "nom de famille",
-    ],
-    "full_name": [
-        "name",
-        "full name",
-        "fullname",
-        "nom complet",
-        "nom complet",
-    ],
-    "street": ["street", "rue", "road", "voie", "address 1"],
-    "street_number": ["street number", "number", "numero"],
-    "postal_code": [
-        "zip",
-        "zip code",
-        "postal code",
-        "postal",
-        "code postal",
-    ],
-    "city": ["city", "ville", "town", "commune"],
-    "country": ["country", "pays", "nation"],
-    "address": [
-        "address",
-        "adresse",
-        "full address",
-        "billing address",
-        "shipping address",
-    ],
-    "company": [
-        "company",
-        "societe",
-        "société",
-        "enterprise",
-        "organisation",
-        "organization",
-    ],
-    "birth_date": [
-        "birth date",
-        "birthdate",
-        "dob",
-        "date of birth",
-        "date de naissance",
-    ],
-    "gender": ["gender", "sexe", "sex", "civility", "civilité", "title"],
-    "birth_day": ["day", "jour", "birthday day", "jour naissance"],
-    "birth_month": ["month", "mois", "birthday month", "mois naissance"],
-    "birth_year": ["year", "année", "birthday year", "année naissance"],
-    "age": ["age", "âge", "years", "ans"],
-
-
-    "username": [
-    "username",
-    "user name",
-    "login",
-    "user id",
-    "userid",
-    "pseudo",
-    "nickname",
-]
-}
-
-# Build a flat list of representative phrases and their corresponding keys.  These
-# phrases will be encoded by the embedding model to create candidate vectors.
-_CANDIDATE_TEXTS: list[str] = []
-_CANDIDATE_KEYS: list[str] = []
-for _key, _tokens in SYNONYMS.items():
-    for _token in _tokens:
-        # Normalize underscores to spaces for more natural phrasing
-        _CANDIDATE_TEXTS.append(_token.replace("_", " "))
-        _CANDIDATE_KEYS.append(_key)
 
 # Global variables for lazy initialization of the embedding model.  We defer
 # importing heavy modules until they are actually needed.
@@ -155,8 +67,14 @@ _MODEL = None  # type: ignore[assignment]
 _CANDIDATE_EMBEDDINGS: Optional[np.ndarray] = None
 _MODEL_AVAILABLE = True
 
+
 def _load_embedding_model() -> bool:
-    """Lazy load the sentence‑embedding model and precompute candidate vectors.
+    """Lazy load the sentence encoder and precompute candidate vectors.
+
+    The encoder backend is chosen by ``EMBEDDING_BACKEND`` (see
+    :mod:`app.services.encoders`): ``sentence-transformers`` is the reference,
+    ``onnx`` the int8-quantised export of the same model, ``remote`` the
+    encoder process shared by the workers of the node.
 
     Returns
     -------
@@ -167,22 +85,16 @@ def _load_embedding_model() -> bool:
     if not _MODEL_AVAILABLE:
         return False
     if _MODEL is None:
-        # Attempt to import and initialize the model.  Wrapping the import in
-        # try/except avoids raising ImportError at module import time.
+        # Attempt to import and initialize the model.  Heavy imports happen
+        # inside the encoder, so a missing package only disables this tier.
         try:
-            from sentence_transformers import SentenceTransformer  # type: ignore
-
             # Load a compact multilingual model.  This model maps short sentences
             # into 384‑dimensional vectors and works across ~50 languages as per
             # the official usage documentation【214116446832641†L63-L78】.
-            _MODEL = SentenceTransformer(
-                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
+            _MODEL = load_encoder(EMBEDDING_BACKEND)
             # Precompute and normalize the candidate embeddings.  Normalization
             # allows cosine similarity to be computed via simple dot products.
-            _CANDIDATE_EMBEDDINGS = _MODEL.encode(
-                _CANDIDATE_TEXTS, normalize_embeddings=True
-            )
+            _CANDIDATE_EMBEDDINGS = _MODEL.encode_candidates(_CANDIDATE_TEXTS)
         except Exception:
             # Mark as unavailable to prevent repeated import attempts
             _MODEL_AVAILABLE = False
@@ -191,6 +103,64 @@ def _load_embedding_model() -> bool:
             return False
     return bool(_MODEL)
 
+
+# Cache LRU des vecteurs de champs, indexé par le blob normalisé. Optionnellement
+# adossé à un fichier memory-mapped pour survivre aux redémarrages.
+_EMBEDDING_CACHE = EmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH)
+if EMBEDDING_CACHE_PATH:
+    atexit.register(_EMBEDDING_CACHE.persist)
+
+
+def _model_backend() -> str:
+    """Backend producing the vectors: for ``remote``, the one the server runs."""
+    return _MODEL.model_backend if _MODEL else EMBEDDING_BACKEND
+
+
+# Les vecteurs dépendent du backend : hors backend de référence, les clés du
+# cache sont préfixées pour ne pas mélanger les vecteurs (fichier persisté compris).
+def _cache_keys(blobs: List[str]) -> List[str]:
+    backend = _model_backend()
+    if backend == REFERENCE_BACKEND:
+        return blobs
+    return [f"{backend}:{blob}" for blob in blobs]
+
+
+# Les appels concurrents à l'encodeur (un par requête) sont regroupés en un
+# seul passage du modèle par fenêtre de quelques millisecondes.
+_ENCODE_BATCHER = MicroBatcher(
+    lambda texts: _MODEL.encode(texts),  # type: ignore[union-attr]
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_BATCH_MAX_SIZE,
+)
+
+
+def _encode_blobs(blobs: List[str]) -> np.ndarray:
+    """Return normalized embeddings for ``blobs``, encoding only cache misses.
+
+    Misses are deduplicated and sent to the model through ``_ENCODE_BATCHER``,
+    together with the misses of concurrent requests.
+    """
+    keys = _cache_keys(blobs)
+    cached = _EMBEDDING_CACHE.get_many(keys)
+    missing = list(dict.fromkeys(b for b, v in zip(blobs, cached) if v is None))
+    if missing:
+        encoded = _ENCODE_BATCHER.encode(missing)
+        _EMBEDDING_CACHE.put_many(_cache_keys(missing), encoded)
+        fresh = dict(zip(missing, encoded))
+        cached = [fresh[b] if v is None else v for b, v in zip(blobs, cached)]
+    return np.stack(cached)
+
+
+def embedding_cache_stats() -> dict:
+    """Hit/miss counters and occupancy of the field embedding cache."""
+    return _EMBEDDING_CACHE.stats()
+
+
+def embedding_batcher_stats() -> dict:
+    """Batch sizes and queue waits of the encoder micro-batcher."""
+    return _ENCODE_BATCHER.stats()
+
+
 # --------------------------------------------------------------------------------------
 # Text normalization utilities
 # --------------------------------------------------------------------------------------
@@ -213,6 +183,7 @@ def _normalize(text: str) -> str:
     text = text.replace("-", " ")
     return " ".join(text.split())
 
+
 def _field_text(field: FormField) -> str:
     """Concatenate all relevant attributes of a form field into a string.
 
@@ -226,30 +197,210 @@ def _field_text(field: FormField) -> str:
         field.id or "",
         field.placeholder or "",
         field.label or "",
+        field.aria_label or "",
     ]
     return _normalize(" ".join(parts))
 
+
 # --------------------------------------------------------------------------------------
 # Matching logic
 # --------------------------------------------------------------------------------------
-def match_field_to_user_key(field: FormField) -> Tuple[Optional[str], float, str]:
+# Seuil empirique : une similarité cosinus au-dessus de ~0.4 indique en général
+# une forte proximité sémantique pour des expressions courtes.
+SIMILARITY_THRESHOLD = 0.4
+
+MatchResult = Tuple[Optional[str], float, str]
+
+
+# Jetons de l'attribut HTML autocomplete (spécification WHATWG) -> clé UserData.
+# Les jetons reconnus sans équivalent (mots de passe, carte bancaire, ligne
+# d'adresse 2...) donnent explicitement « aucun rapprochement ».
+AUTOCOMPLETE_KEYS: dict[str, Optional[str]] = {
+    "name": "full_name",
+    "honorific-prefix": "gender",
+    "given-name": "first_name",
+    "family-name": "last_name",
+    "username": "username",
+    "email": "email",
+    "tel": "phone",
+    "tel-national": "phone",
+    "street-address": "address",
+    "address-line1": "street",
+    "address-level2": "city",
+    "postal-code": "postal_code",
+    "country": "country",
+    "country-name": "country",
+    "organization": "company",
+    "bday": "birth_date",
+    "bday-day": "birth_day",
+    "bday-month": "birth_month",
+    "bday-year": "birth_year",
+    "sex": "gender",
+}
+for _token in (
+    "additional-name", "honorific-suffix", "nickname", "organization-title",
+    "new-password", "current-password", "one-time-code",
+    "address-line2", "address-line3", "address-level1", "address-level3", "address-level4",
+    "cc-name", "cc-given-name", "cc-additional-name", "cc-family-name", "cc-number",
+    "cc-exp", "cc-exp-month", "cc-exp-year", "cc-csc", "cc-type",
+    "transaction-currency", "transaction-amount", "language", "url", "photo",
+    "tel-country-code", "tel-area-code", "tel-local", "tel-local-prefix",
+    "tel-local-suffix", "tel-extension", "impp",
+):
+    AUTOCOMPLETE_KEYS[_token] = None
+
+
+def _match_by_autocomplete(field: FormField) -> Optional[MatchResult]:
+    """Return the match given by a WHATWG ``autocomplete`` token, if any."""
+    # Ex. "section-b shipping given-name webauthn" : le nom du champ est le
+    # dernier jeton hors "webauthn" ; section, shipping/billing, home/work...
+    # ne changent pas la donnée attendue.
+    tokens = [t for t in (field.autocomplete or "").lower().split() if t != "webauthn"]
+    if not tokens or tokens[-1] not in AUTOCOMPLETE_KEYS:
+        return None
+    token = tokens[-1]
+    key = AUTOCOMPLETE_KEYS[token]
+    if key is None:
+        return None, 0.0, f"autocomplete={token} has no UserData key"
+    return key, 1.0, f"Matched by autocomplete={token}"
+
+
+def _match_by_type(field: FormField) -> Optional[MatchResult]:
+    """Return a match decided by the HTML input type alone, if any."""
+    field_type = (field.type or "").lower()
+    if field_type:
+        if field_type == "email":
+            return "email", 1.0, "Matched by input type=email"
+        if field_type in {"tel", "phone"}:
+            return "phone", 0.95, f"Matched by input type={field_type}"
+        if field_type == "password":
+            return None, 0.0, "Password field ignored"
+        if field_type == "date":
+            return "birth_date", 0.9, "Matched by input type=date"
+        # For numeric fields we defer to the embedding or token logic
+    return None
+
+
+def _match_by_similarity(similarities: np.ndarray) -> Optional[MatchResult]:
+    """Pick the best candidate from a row of cosine similarities."""
+    best_idx = int(np.argmax(similarities))
+    best_score = float(similarities[best_idx])
+    best_key = _CANDIDATE_KEYS[best_idx]
+    # Empirical threshold: require moderate confidence to avoid false
+    # positives.
+    if best_score > SIMILARITY_THRESHOLD:
+        return (
+            best_key,
+            min(best_score, 1.0),
+            f"Matched by semantic similarity {best_score:.2f} using embedding model",
+        )
+    return None
+
+
+# Table de synonymes compilée une seule fois, à l'import.
+#
+# * ``_SYNONYM_PATTERN`` : une seule alternation, dans l'ordre de ``SYNONYMS``,
+#   dans un lookahead pour trouver les occurrences même chevauchantes. À chaque
+#   position, la première alternative qui correspond est la plus prioritaire ;
+#   le minimum sur toutes les positions donne donc le même synonyme que le
+#   parcours clé par clé, token par token.
+# * ``_EXACT_KEYS`` : valeur normalisée (clé UserData ou synonyme, avec ou sans
+#   espaces / underscores) -> clé, pour les name/id/label qui valent exactement
+#   un synonyme. Les synonymes courts et génériques (``_AMBIGUOUS_EXACT``) en
+#   sont exclus : un champ ``title`` (intitulé de poste, objet d'un message)
+#   ou ``number`` (numéro de carte, de téléphone) reste au modèle.
+_AMBIGUOUS_EXACT = {
+    "title", "number", "numero", "name", "nom", "postal", "nation", "cell", "road", "voie",
+    "day", "jour", "month", "mois", "year", "years", "année", "age", "âge", "ans",
+}
+_SYNONYM_TOKENS: List[Tuple[str, str]] = []
+_SYNONYM_PRIORITY: dict[str, int] = {}
+_EXACT_KEYS: dict[str, str] = {}
+for _key, _tokens in SYNONYMS.items():
+    for _variant in (_key, _key.replace("_", " "), _key.replace("_", "")):
+        if _variant not in _AMBIGUOUS_EXACT:
+            _EXACT_KEYS.setdefault(_variant, _key)
+    for _token in _tokens:
+        _token_norm = _normalize(_token)
+        if not _token_norm:
+            continue
+        if _token_norm not in _SYNONYM_PRIORITY:
+            _SYNONYM_PRIORITY[_token_norm] = len(_SYNONYM_TOKENS)
+            _SYNONYM_TOKENS.append((_key, _token))
+        if _token_norm in _AMBIGUOUS_EXACT:
+            continue
+        for _variant in (_token_norm, _token_norm.replace(" ", ""), _token_norm.replace(" ", "_")):
+            _EXACT_KEYS.setdefault(_variant, _key)
+
+_SYNONYM_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(token) for token in _SYNONYM_PRIORITY) + "))"
+)
+
+
+def _match_by_exact_attribute(field: FormField) -> Optional[MatchResult]:
+    """Match a field whose ``name``, ``id``, label or ``aria-label`` is exactly a known synonym."""
+    for attribute in ("name", "id", "label", "aria_label"):
+        value = getattr(field, attribute)
+        if not value:
+            continue
+        key = _EXACT_KEYS.get(_normalize(value))
+        if key is not None:
+            return key, 0.98, f"Matched by exact {attribute} '{value}'"
+    return None
+
+
+def _match_by_tokens(blob: str) -> MatchResult:
+    """Substring search on normalized synonyms, used as a last resort."""
+    # Special case: combined label indicating both email and mobile often means
+    # a field accepts either value.  We default to email for privacy reasons.
+    if "email" in blob and "mobile" in blob:
+        return "email", 0.85, "Matched by combined email/mobile label"
+
+    best: Optional[int] = None
+    for match in _SYNONYM_PATTERN.finditer(blob):
+        priority = _SYNONYM_PRIORITY[match.group(1)]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
+    if best is not None:
+        key, token = _SYNONYM_TOKENS[best]
+        return (
+            key,
+            0.7,
+            f"Matched by token '{token}' in field attributes",
+        )
+
+    # No match found
+    return None, 0.0, "No match found"
+
+
+def match_field_to_user_key(field: FormField) -> MatchResult:
     """Attempt to associate a form field with a UserData attribute.
 
     The matching process proceeds in a series of increasingly flexible
     heuristics:
 
-    1. **Explicit type matching**: If the HTML input type clearly indicates the
+    1. **Autocomplete tokens**: A WHATWG ``autocomplete`` token
+       (``given-name``, ``postal-code``, ``bday-day``, ``tel``...) decides
+       the key directly, or that the field has none (passwords, card data).
+    2. **Explicit type matching**: If the HTML input type clearly indicates the
        purpose (e.g. ``type="email"``), we immediately return the
        corresponding UserData key with high confidence.
-    2. **Semantic embedding similarity**: When no obvious match is found from
+    3. **Exact attribute matching**: A ``name``, ``id``, label or
+       ``aria-label`` that is exactly a UserData key or one of its synonyms
+       (``email``, ``postal_code``, ``Prénom``...) is matched through a hash
+       lookup, without the model.
+    4. **Semantic embedding similarity**: When no obvious match is found from
        the field type, the field's concatenated attributes are encoded
        using a lightweight sentence‑embedding model and compared against
        precomputed embeddings of known user data keys and their synonyms.
        The candidate with the highest cosine similarity above a threshold is
        selected.
-    3. **Token fallback**: If the embedding model is unavailable or no
+    5. **Token fallback**: If the embedding model is unavailable or no
        candidate surpasses the threshold, a simple substring search on
-       normalized synonyms is performed as a last resort.
+       normalized synonyms (one compiled pattern) is performed as a last
+       resort.
 
     Parameters
     ----------
@@ -263,46 +414,78 @@ def match_field_to_user_key(field: FormField) -> Tuple[Optional[str], float, str
         suitable match is found), a confidence score between 0 and 1, and
         a human‑readable explanation of the decision.
     """
+    return match_fields_batch([field])[0]
+
+
+def match_fields_batch(fields: List[FormField]) -> List[MatchResult]:
+    """Match several form fields at once with a single embedding pass.
+
+    Applies exactly the same tiers as :func:`match_field_to_user_key`, but
+    fields that are not resolved by their autocomplete token, input type or an
+    exact attribute are encoded together in one call to the model and scored
+    against ``_CANDIDATE_EMBEDDINGS`` with a single matrix product. A
+    40‑field page thus costs one forward pass instead of 40.
+
+    Parameters
+    ----------
+    fields: list[FormField]
+        The fields extracted from the HTML form, in DOM order.
+
+    Returns
+    -------
+    list[tuple[str | None, float, str]]
+        One ``(matched_key, confidence, reason)`` tuple per input field, in
+        the same order as ``fields``.
+    """
+    return _match_fields(fields)[0]
+
+
+def _match_fields(fields: List[FormField]) -> Tuple[List[MatchResult], bool]:
+    """:func:`match_fields_batch`, plus whether the embedding tier ran.
+
+    The flag is False when some field needed the model but fell back to the
+    token tier (model missing, encoder error): such results are degraded and
+    must not be memoised.
+    """
+    results: List[Optional[MatchResult]] = [None] * len(fields)
+    pending: List[int] = []
+    blobs: List[str] = []
+
     # ----------------------------------------------------------------------
-    # 1. High‑priority matching based on the input type attribute
+    # 1. High‑priority matching based on the autocomplete and input type
+    #    attributes, then on name / id / label / aria-label values that are
+    #    exactly a known synonym
     # ----------------------------------------------------------------------
-    field_type = (field.type or "").lower()
-    if field_type:
-        if field_type == "email":
-            return "email", 1.0, "Matched by input type=email"
-        if field_type in {"tel", "phone"}:
-            return "phone", 0.95, f"Matched by input type={field_type}"
-        if field_type == "password":
-            return None, 0.0, "Password field ignored"
-        if field_type == "date":
-            return "birth_date", 0.9, "Matched by input type=date"
-        # For numeric fields we defer to the embedding or token logic
-
-    # Construct the normalized blob of all field attributes once
-    blob = _field_text(field)
+    for i, field in enumerate(fields):
+        decided = (
+            _match_by_autocomplete(field)
+            or _match_by_type(field)
+            or _match_by_exact_attribute(field)
+        )
+        if decided is not None:
+            results[i] = decided
+            continue
+        pending.append(i)
+        blobs.append(_field_text(field))
+
+    if not pending:
+        return results, True  # type: ignore[return-value]
 
     # ----------------------------------------------------------------------
-    # 2. Embedding‑based semantic matching
+    # 2. Embedding‑based semantic matching, one batched call
     # ----------------------------------------------------------------------
+    embedded = False
     model_loaded = _load_embedding_model()
     if model_loaded and _CANDIDATE_EMBEDDINGS is not None:
         try:
-            # Encode the field text to obtain a unit vector
-            vector = _MODEL.encode([blob], normalize_embeddings=True)[0]  # type: ignore[index]
-            # Compute cosine similarity via dot products
-            similarities = np.dot(_CANDIDATE_EMBEDDINGS, vector)
-            best_idx = int(np.argmax(similarities))
-            best_score = float(similarities[best_idx])
-            best_key = _CANDIDATE_KEYS[best_idx]
-            # Empirical threshold: require moderate confidence to avoid false
-            # positives.  Values above ~0.4 generally indicate strong semantic
-            # similarity for short phrases.
-            if best_score > 0.4:
-                return (
-                    best_key,
-                    min(best_score, 1.0),
-                    f"Matched by semantic similarity {best_score:.2f} using embedding model",
-                )
+            # Encode all field texts (through the cache) to obtain unit
+            # vectors, then compute every cosine similarity with one matrix
+            # product.
+            vectors = _encode_blobs(blobs)
+            similarities = np.dot(_CANDIDATE_EMBEDDINGS, vectors.T)
+            for col, i in enumerate(pending):
+                results[i] = _match_by_similarity(similarities[:, col])
+            embedded = True
         except Exception:
             # If any error occurs during encoding or similarity computation,
             # fall back to the token logic
@@ -311,20 +494,152 @@ def match_field_to_user_key(field: FormField) -> Tuple[Optional[str], float, str
     # ----------------------------------------------------------------------
     # 3. Token‑based fallback matching
     # ----------------------------------------------------------------------
-    # Special case: combined label indicating both email and mobile often means
-    # a field accepts either value.  We default to email for privacy reasons.
-    if "email" in blob and "mobile" in blob:
-        return "email", 0.85, "Matched by combined email/mobile label"
+    for i, blob in zip(pending, blobs):
+        if results[i] is None:
+            results[i] = _match_by_tokens(blob)
 
-    for key, tokens in SYNONYMS.items():
-        for token in tokens:
-            token_norm = _normalize(token)
-            if token_norm and token_norm in blob:
-                return (
-                    key,
-                    0.7,
-                    f"Matched by token '{token}' in field attributes",
-                )
+    return results, embedded  # type: ignore[return-value]
 
-    # No match found
-    return None, 0.0, "No match found"
+
+# Version du matcher : à incrémenter quand la logique de rapprochement change.
+# Les mappings mémorisés par une autre version sont ignorés puis purgés.
+MATCHER_VERSION = 1
+
+
+# Le backend et les tables de correspondance entrent dans la version :
+# modifier un synonyme ou un seuil invalide aussi les mappings mémorisés.
+_TABLES_DIGEST = hashlib.sha256(
+    repr((SYNONYMS, sorted(_AMBIGUOUS_EXACT), AUTOCOMPLETE_KEYS, SIMILARITY_THRESHOLD)).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _matcher_version() -> str:
+    return f"{MATCHER_VERSION}:{_model_backend()}:{_TABLES_DIGEST}"
+
+
+# Mapping mémorisé par site, indexé par l'empreinte structurelle du formulaire.
+_MAPPING_MEMO = MappingMemo(MAPPING_MEMO_SIZE, MAPPING_MEMO_PATH, _matcher_version())
+atexit.register(_MAPPING_MEMO.close)
+
+
+def mapping_memo_stats() -> dict:
+    """Hit/miss counters and occupancy of the per-site mapping memo."""
+    return _MAPPING_MEMO.stats()
+
+
+# Templates reconnus d'un site à l'autre (plateformes de checkout, embeds...).
+_TEMPLATES = TemplateRegistry(TEMPLATE_REGISTRY_SIZE, TEMPLATE_SIMILARITY)
+
+
+def template_registry_stats() -> dict:
+    """Hit counters of the cross-site template registry and its top templates."""
+    return _TEMPLATES.stats()
+
+
+def _sync_matcher_version() -> None:
+    """Re-key the memo and the templates once the model backend is known.
+
+    With ``EMBEDDING_BACKEND=remote`` the model is the one the encoder server
+    runs, which is only known once connected: the encoder is loaded before
+    any lookup so that mappings of another model are never served.
+    """
+    if RemoteEncoder.name == EMBEDDING_BACKEND:
+        _load_embedding_model()
+    version = _matcher_version()
+    if version != _MAPPING_MEMO.matcher_version:
+        _MAPPING_MEMO.set_matcher_version(version)
+        _TEMPLATES.clear()
+
+
+def _match_with_templates(fields: List[FormField], url: str) -> Tuple[List[MatchResult], bool]:
+    """Reuse the mapping of a known template, matching only the fields it lacks.
+
+    Also returns whether the embedding tier ran for every field that needed it.
+    """
+    signatures = [field_signature(field) for field in fields]
+    template = _TEMPLATES.match(url, signatures)
+    if template is None:
+        matches, embedded = _match_fields(fields)
+        if embedded:
+            _TEMPLATES.register(url, signatures, matches)
+        return matches, embedded
+
+    results: List[Optional[MatchResult]] = [template.results.get(s) for s in signatures]
+    pending = [i for i, result in enumerate(results) if result is None]
+    embedded = True
+    if pending:
+        matches, embedded = _match_fields([fields[i] for i in pending])
+        for i, result in zip(pending, matches):
+            results[i] = result
+    return results, embedded  # type: ignore[return-value]
+
+
+def build_mapped_fields(fields: List[FormField], url: Optional[str] = None) -> List[MappedFormField]:
+    """Match ``fields`` in one batch and wrap each result in a ``MappedFormField``.
+
+    When ``url`` is given, the mapping stored for the same site and the same
+    :func:`~app.services.mapping_memo.form_fingerprint` is reused without
+    running the matcher. Failing that, a form close enough to a template
+    already seen on another site (see :mod:`app.services.form_templates`)
+    reuses the template mapping, and only its extra fields are matched.
+    Mappings that fell back to token matching because the embedding model was
+    unavailable or failed are not stored.
+    """
+    matches = None
+    if url is not None and fields:
+        _sync_matcher_version()
+        site, fingerprint = site_key(url), form_fingerprint(fields)
+        matches = _MAPPING_MEMO.get(site, fingerprint)
+        if matches is None:
+            matches, embedded = _match_with_templates(fields, url)
+            if embedded:
+                _MAPPING_MEMO.put(site, fingerprint, matches)
+    if matches is None:
+        matches = match_fields_batch(fields)
+    return [
+        MappedFormField(
+            **field.model_dump(),
+            matched_key=matched_key,
+            confidence=confidence,
+            reason=reason,
+        )
+        for field, (matched_key, confidence, reason) in zip(fields, matches)
+    ]
+
+
+def parity_report(
+    corpus: List[Tuple[FormField, Optional[str]]],
+    reference: Encoder,
+    candidate: Encoder,
+) -> dict:
+    """Compare the embedding-tier decisions of two encoders on a labelled corpus.
+
+    ``corpus`` pairs each field with its expected ``UserData`` key (``None``
+    when the field should stay unmatched). The autocomplete, type, exact
+    attribute and token tiers do not depend on the encoder, so they are
+    skipped: the blob of every field is scored against the candidate texts
+    by each encoder, without the embedding cache, and the decision of
+    :func:`_match_by_similarity` is compared. The report gives the accuracy
+    of each encoder and the fields on which their decisions differ.
+    """
+    fields = [field for field, _ in corpus]
+    blobs = [_field_text(field) for field in fields]
+    decisions = {}
+    for label, encoder in (("reference", reference), ("candidate", candidate)):
+        similarities = np.dot(encoder.encode(blobs), encoder.encode(_CANDIDATE_TEXTS).T)
+        decisions[label] = [(_match_by_similarity(row) or (None,))[0] for row in similarities]
+
+    expected = [key for _, key in corpus]
+    mismatches = [
+        {"field": blob, "expected": want, "reference": ref, "candidate": cand}
+        for blob, want, ref, cand in zip(blobs, expected, decisions["reference"], decisions["candidate"])
+        if ref != cand
+    ]
+    total = len(corpus) or 1
+    return {
+        "fields": len(corpus),
+        "agreement": 1 - len(mismatches) / total,
+        "reference_accuracy": sum(r == e for r, e in zip(decisions["reference"], expected)) / total,
+        "candidate_accuracy": sum(c == e for c, e in zip(decisions["candidate"], expected)) / total,
+        "mismatches": mismatches,
+    }
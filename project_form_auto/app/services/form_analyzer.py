@@ -1,6 +1,5 @@
-from bs4 import BeautifulSoup
-
 from app.models.schemas import FormField
+from app.services.parsed_page import FIELD_TAGS, ParsedPage
 
 # Conditions de filtrage des champs. On se concentre pour le moment que sur les champs textuels.
 
@@ -41,14 +40,16 @@ SYSTEM_TOKENS = {
     "ga",
 }
 
+
 def _contains_system_token(text: str | None) -> bool:
     if not text:
         return False
     text = text.lower()
     return any(token in text for token in SYSTEM_TOKENS)
 
-def is_user_fillable_field(element, label: str | None) -> bool:
-    tag = element.name
+
+def is_user_fillable_field(element, label: str | None, page: ParsedPage) -> bool:
+    tag = page.tag(element)
     if tag not in TEXTUAL_TAGS:
         return False
 
@@ -68,55 +69,72 @@ def is_user_fillable_field(element, label: str | None) -> bool:
 
     return element.get("name") or label or element.get("placeholder")
 
+
 # Cas simple : <label for='id'>
 # <label for="email">Adresse e-mail</label>
 # <input type="email" id="email" name="user_email" placeholder="email@email.com">
-def label_from_for_attribute(field, soup: BeautifulSoup) -> str | None:
-    field_id = field.get("id")
-    if not field_id:
-        return None
-
-    label = soup.find("label", attrs={"for": field_id})
-    if label:
-        return label.get_text(strip=True)
+def label_from_for_attribute(field, page: ParsedPage) -> str | None:
+    label = page.label_for(field.get("id"))
+    if label is not None:
+        return page.get_text(label, strip=True)
 
     return None
 
+
 # Cas lorsque l'input est imbriqué dans le <label>
 # <label>
 #   Adresse e-mail
 #   <input type="email">
 # </label>
-def label_from_parent_label(field) -> str | None:
-    parent_label = field.find_parent("label")
-    if parent_label:
-        return parent_label.get_text(strip=True)
+def label_from_parent_label(field, page: ParsedPage) -> str | None:
+    parent_label = page.find_parent(field, "label")
+    if parent_label is not None:
+        return page.get_text(parent_label, strip=True)
     return None
 
+
 # Cas avec un attribut plpaceholder.
 # <input placeholder="Votre adresse email">
 def label_from_placeholder(field) -> str | None:
     return field.get("placeholder")
 
+
 # Cas difficile, où le nom du champ est dans le "parent", quelque soit la balise.
-def label_from_nearby_text(field) -> str | None:
-    parent = field.parent
-    if not parent:
+# Le texte est lu morceau par morceau et la lecture s'arrête dès que la limite est
+# dépassée : un parent très gros (ex. <body>) ne coûte pas plus qu'un petit.
+# ``cache`` évite de relire le même parent pour des champs voisins.
+def label_from_nearby_text(field, page: ParsedPage, cache: dict | None = None) -> str | None:
+    parent = page.parent(field)
+    if parent is None:
         return None
+    if cache is not None and id(parent) in cache:
+        return cache[id(parent)][1]
 
     limit_text = 60
-    text = parent.get_text(" ", strip=True)
-    if text and len(text) < limit_text:
-        return text
-    return None
+    parts: list[str] = []
+    length = -1
+    text = None
+    for chunk in page.strings(parent, strip=True):
+        length += len(chunk) + 1
+        if length >= limit_text:
+            break
+        parts.append(chunk)
+    else:
+        text = " ".join(parts) or None
+
+    if cache is not None:
+        # On garde une référence au parent pour que son id() reste unique.
+        cache[id(parent)] = (parent, text)
+    return text
+
 
 # On essaie d'extraire un label pour un champ de formulaire.
-def extract_label_for_field(field, soup: BeautifulSoup) -> str | None:
+def extract_label_for_field(field, page: ParsedPage, nearby_cache: dict | None = None) -> str | None:
     resolvers = [
-        lambda: label_from_for_attribute(field, soup),
-        lambda: label_from_parent_label(field),
+        lambda: label_from_for_attribute(field, page),
+        lambda: label_from_parent_label(field, page),
         lambda: label_from_placeholder(field),
-        lambda: label_from_nearby_text(field),
+        lambda: label_from_nearby_text(field, page, nearby_cache),
     ]
 
     for resolve in resolvers:
@@ -126,6 +144,7 @@ def extract_label_for_field(field, soup: BeautifulSoup) -> str | None:
 
     return None
 
+
 def clean_label(label: str | None) -> str | None:
     if not label:
         return None
@@ -137,27 +156,36 @@ def clean_label(label: str | None) -> str | None:
 
     return label
 
-# La fonction principale : on traite le HTML et on extrait les champs de formulaire.
-def extract_form_fields(html: str) -> list[FormField]:
-    soup = BeautifulSoup(html, "lxml")
+
+# Label final d'un champ : résolu puis nettoyé. Partagé avec l'autofill.
+def resolve_field_label(field, page: ParsedPage, nearby_cache: dict | None = None) -> str | None:
+    return clean_label(extract_label_for_field(field, page, nearby_cache))
+
+
+# La fonction principale : on traite le HTML (ou une page déjà parsée) et on extrait les champs de formulaire.
+# ``backend`` choisit le parseur ("bs4", "lxml") quand du HTML brut est fourni.
+def extract_form_fields(html: str | ParsedPage, backend: str | None = None) -> list[FormField]:
+    page = ParsedPage.ensure(html, backend)
     fields: list[FormField] = []
 
-    elements = soup.find_all(["input", "select", "textarea"])
+    elements = page.find_all(*FIELD_TAGS)
+    nearby_cache: dict = {}
 
     for element in elements:
-        raw_label = extract_label_for_field(element, soup)
-        label = clean_label(raw_label)
-        if not is_user_fillable_field(element, label):
+        label = resolve_field_label(element, page, nearby_cache)
+        if not is_user_fillable_field(element, label, page):
             continue
 
         fields.append(
             FormField(
-                tag=element.name,
+                tag=page.tag(element),
                 type=element.get("type"),
                 name=element.get("name"),
                 id=element.get("id"),
                 placeholder=element.get("placeholder"),
                 label=label,
+                autocomplete=element.get("autocomplete"),
+                aria_label=element.get("aria-label"),
             )
         )
 
@@ -1,30 +1,30 @@
 # Analyse du HTML brut pour détecter un formulaire.
 
-from bs4 import BeautifulSoup
+from app.services.parsed_page import FIELD_TAGS, ParsedPage
 
 # Détection simple : vérifie la présence de la balise <form>. Concerne la plus part des formulaires.
 
 
-def has_form_tag(soup: BeautifulSoup) -> bool:
-    return len(soup.find_all("form")) > 0
+def has_form_tag(page: ParsedPage) -> bool:
+    return len(page.find_all("form")) > 0
 
 
-def count_form_tags(soup: BeautifulSoup) -> int:
-    return len(soup.find_all("form"))
+def count_form_tags(page: ParsedPage) -> int:
+    return len(page.find_all("form"))
 
 
-def has_input_fields(soup: BeautifulSoup) -> bool:
-    fields = soup.find_all(["input", "select", "textarea"])
+def has_input_fields(page: ParsedPage) -> bool:
+    fields = page.find_all(*FIELD_TAGS)
     return len(fields) > 0
 
 # Detection avancée : vérifie la présence de champs spécifiques (email, mot de passe, etc.), pour les sites sans balise form.
 
 
-def has_action_button(soup: BeautifulSoup) -> bool:
-    buttons = soup.find_all("button")
+def has_action_button(page: ParsedPage) -> bool:
+    buttons = page.find_all("button")
     keywords = ["submit", "envoyer", "valider", "sign up", "register", "s\'inscrire", "enregistrer", "s\'enregistrer"]
     for button in buttons:
-        text = button.get_text(" ").lower()
+        text = page.get_text(button, " ").lower()
         if any(keyword in text for keyword in keywords):
             return True
     return False
@@ -34,33 +34,33 @@ def has_action_button(soup: BeautifulSoup) -> bool:
 # <input id="email">
 
 
-def has_placeholder_or_label(soup: BeautifulSoup) -> bool:
-    inputs = soup.find_all("input")
+def has_placeholder_or_label(page: ParsedPage) -> bool:
+    inputs = page.find_all("input")
 
     for field in inputs:
         if field.get("placeholder"):
             return True
 
-        field_id = field.get("id")
-        if field_id and soup.find("label", attrs={"for": field_id}):
+        if page.label_for(field.get("id")):
             return True
     return False
 
 
-def is_probable_form(soup: BeautifulSoup) -> bool:
+def is_probable_form(page: ParsedPage) -> bool:
     return (
-        has_input_fields(soup)
-        and (has_action_button(soup) or has_placeholder_or_label(soup))
+        has_input_fields(page)
+        and (has_action_button(page) or has_placeholder_or_label(page))
     )
 
-# Assemblage dans une seule fonction.
+# Assemblage dans une seule fonction. Accepte du HTML brut ou une page déjà parsée.
+# ``backend`` choisit le parseur ("bs4", "lxml") quand du HTML brut est fourni.
 
 
-def detect_form(html: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
+def detect_form(html: str | ParsedPage, backend: str | None = None) -> dict:
+    page = ParsedPage.ensure(html, backend)
 
-    form_present = has_form_tag(soup)
-    input_present = has_input_fields(soup)
+    form_present = has_form_tag(page)
+    input_present = has_input_fields(page)
 
     reasons: list[str] = []
 
@@ -71,13 +71,13 @@ def detect_form(html: str) -> dict:
 
     probable_form = False
 
-    if not form_present and is_probable_form(soup):
+    if not form_present and is_probable_form(page):
         probable_form = True
         reasons.append("Structure de type formulaire détectée à l'aide d'heuristiques HTML.")
 
     return {
         "has_form": form_present,
-        "forms_count": count_form_tags(soup),
+        "forms_count": count_form_tags(page),
         "has_inputs": input_present,
         "probable_form": probable_form,
         "reasons": reasons
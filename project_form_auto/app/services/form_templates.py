@@ -0,0 +1,158 @@
+"""Registry of form templates shared by many sites.
+
+Shopify, WooCommerce or Magento checkouts and HubSpot or Typeform embeds
+serve the same forms under thousands of URLs. The per-site
+:class:`~app.services.mapping_memo.MappingMemo` cannot see that; the
+:class:`TemplateRegistry` recognises such forms across domains.
+
+Every field is reduced to a :func:`field_signature`, a short hash of the
+attributes the matcher reads. A form is the set of its field signatures,
+and it matches a known template when the Jaccard similarity of the two
+sets reaches the registry tolerance: a checkout that adds or drops a field
+or two is still recognised. The matcher decides each field on its own
+attributes, so the mapping of every field whose signature is in the
+template is reused as is, and only the other fields go through the matcher.
+
+Each template counts its hits and the domains it was seen on, so
+``/metrics`` shows which platforms dominate the traffic.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.models.schemas import FormField
+
+MatchResult = tuple[Optional[str], float, str]
+
+# Domaines distincts comptés par template (au-delà, le compteur est plafonné).
+MAX_TRACKED_DOMAINS = 1000
+
+
+def field_signature(field: FormField) -> str:
+    """Hash of the attributes of ``field`` that the matcher reads; a missing
+    attribute and an empty one hash differently."""
+    signature = "\x1f".join("\x00" if value is None else value.strip() for value in field.model_dump().values())
+    return hashlib.blake2b(signature.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class FormTemplate:
+    id: str
+    # Signature de champ -> résultat du matcher.
+    results: dict[str, MatchResult]
+    first_url: str
+    hits: int = 0
+    domains: set[str] = field(default_factory=set)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "fields": len(self.results),
+            "hits": self.hits,
+            "domains": len(self.domains),
+            "first_url": self.first_url,
+        }
+
+
+class TemplateRegistry:
+    """Thread-safe LRU of :class:`FormTemplate` with near-duplicate lookup.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of templates kept. ``0`` disables the registry.
+    similarity: float
+        Minimum Jaccard similarity between the field signatures of a form and
+        those of a template for the form to reuse the template mapping.
+    """
+
+    def __init__(self, maxsize: int, similarity: float) -> None:
+        self.maxsize = maxsize
+        self.similarity = similarity
+        self.hits = 0
+        self.misses = 0
+        self._templates: OrderedDict[str, FormTemplate] = OrderedDict()
+        # Index inversé : signature de champ -> templates qui la contiennent.
+        self._index: defaultdict[str, set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def match(self, url: str, signatures: list[str]) -> Optional[FormTemplate]:
+        """Return the template closest to ``signatures``, counting a hit, if
+        its similarity reaches the tolerance."""
+        if self.maxsize <= 0 or not signatures:
+            return None
+        wanted = set(signatures)
+        with self._lock:
+            # Seuls les templates partageant au moins un champ sont comparés.
+            shared: defaultdict[str, int] = defaultdict(int)
+            for signature in wanted:
+                for template_id in self._index.get(signature, ()):
+                    shared[template_id] += 1
+            best, best_score = None, 0.0
+            for template_id, common in shared.items():
+                template = self._templates[template_id]
+                score = common / (len(wanted) + len(template.results) - common)
+                if score > best_score:
+                    best, best_score = template, score
+            if best is None or best_score < self.similarity:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(best.id)
+            best.hits += 1
+            if len(best.domains) < MAX_TRACKED_DOMAINS:
+                best.domains.add(urlsplit(url).hostname or "")
+            self.hits += 1
+            return best
+
+    def register(self, url: str, signatures: list[str], results: list[MatchResult]) -> Optional[FormTemplate]:
+        """Record the mapping of a form that matched no template."""
+        if self.maxsize <= 0 or not signatures:
+            return None
+        mapping = dict(zip(signatures, (tuple(result) for result in results)))
+        template_id = hashlib.blake2b("".join(sorted(mapping)).encode("ascii"), digest_size=6).hexdigest()
+        with self._lock:
+            if template_id in self._templates:
+                return self._templates[template_id]
+            template = FormTemplate(template_id, mapping, url, domains={urlsplit(url).hostname or ""})
+            self._templates[template_id] = template
+            for signature in mapping:
+                self._index[signature].add(template_id)
+            while len(self._templates) > self.maxsize:
+                _, evicted = self._templates.popitem(last=False)
+                self._unindex(evicted)
+            return template
+
+    def _unindex(self, template: FormTemplate) -> None:
+        for signature in template.results:
+            ids = self._index.get(signature)
+            if ids is not None:
+                ids.discard(template.id)
+                if not ids:
+                    del self._index[signature]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._index.clear()
+            self.hits = self.misses = 0
+
+    def stats(self, top: int = 10) -> dict:
+        """Counters, plus the ``top`` templates with the most hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            ranked = sorted(self._templates.values(), key=lambda t: t.hits, reverse=True)
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "templates": len(self._templates),
+                "maxsize": self.maxsize,
+                "similarity": self.similarity,
+                "top": [template.summary() for template in ranked[:top] if template.hits],
+            }
@@ -0,0 +1,114 @@
+"""One-pass capture of a rendered page, its frames and its shadow roots.
+
+``fetch_html_with_selenium`` used to switch into each ``<iframe>`` in turn
+(two WebDriver round trips per frame) and kept only the first HTML holding a
+``<form``. :data:`CAPTURE_SCRIPT` is injected once instead and walks, inside
+the browser:
+
+* the main document;
+* every same-origin ``<iframe>`` / ``<frame>``, nested ones included;
+* every open shadow root, in documents and in other shadow roots.
+
+Each part comes back with its provenance (``main/frame[2]/shadow[0]``...)
+and :func:`merge_snapshot` folds them into a single HTML document where
+every frame or shadow root is wrapped in a ``<div data-frame-path=...>``.
+Cross-origin frames cannot be read from the page; they are only listed, so
+the caller can still switch into them through WebDriver when needed.
+"""
+
+from __future__ import annotations
+
+import re
+from html import escape
+from typing import NamedTuple
+
+CAPTURE_SCRIPT = r"""
+const parts = [];
+const crossOrigin = [];
+function visit(root, path, url, kind) {
+  // Pour une frame, seul le contenu du <body> est gardé : pas de <html>/<body>
+  // imbriqués dans l'instantané fusionné.
+  let html = "";
+  if (kind === "shadow") {
+    html = root.innerHTML;
+  } else if (kind === "frame" && root.body) {
+    html = root.body.innerHTML;
+  } else if (root.documentElement) {
+    html = root.documentElement.outerHTML;
+  }
+  parts.push({path: path, url: url, kind: kind, html: html});
+  let shadowIndex = 0;
+  for (const element of root.querySelectorAll("*")) {
+    if (element.shadowRoot) {
+      visit(element.shadowRoot, path + "/shadow[" + shadowIndex++ + "]", url, "shadow");
+    }
+  }
+  let frameIndex = 0;
+  for (const frame of root.querySelectorAll("iframe, frame")) {
+    const framePath = path + "/frame[" + frameIndex++ + "]";
+    let doc = null;
+    try {
+      doc = frame.contentDocument;
+    } catch (e) {
+      doc = null;
+    }
+    if (doc && doc.documentElement) {
+      visit(doc, framePath, doc.location.href, "frame");
+    } else {
+      crossOrigin.push({path: framePath, url: frame.src || ""});
+    }
+  }
+}
+visit(document, "main", location.href, "document");
+return {parts: parts, crossOrigin: crossOrigin};
+"""
+
+
+class SnapshotPart(NamedTuple):
+    # Chemin du document : "main", "main/frame[0]", "main/frame[0]/shadow[1]"...
+    path: str
+    url: str
+    kind: str  # "document", "frame" ou "shadow"
+    html: str
+
+
+class PageSnapshot(NamedTuple):
+    parts: list[SnapshotPart]
+    # Frames d'une autre origine, illisibles depuis la page : (chemin, src).
+    cross_origin: list[tuple[str, str]]
+
+
+_BODY_END = re.compile(r"</body\s*>", re.IGNORECASE)
+
+
+def capture_snapshot(driver) -> PageSnapshot:
+    """Run :data:`CAPTURE_SCRIPT` in ``driver``: one round trip for the whole page."""
+    result = driver.execute_script(CAPTURE_SCRIPT) or {}
+    parts = [
+        SnapshotPart(p.get("path", ""), p.get("url", ""), p.get("kind", ""), p.get("html") or "")
+        for p in result.get("parts", [])
+    ]
+    cross_origin = [(f.get("path", ""), f.get("url", "")) for f in result.get("crossOrigin", [])]
+    return PageSnapshot(parts, cross_origin)
+
+
+def wrap_part(part: SnapshotPart) -> str:
+    return (
+        f'<div data-frame-path="{escape(part.path)}" data-frame-url="{escape(part.url)}"'
+        f' data-frame-kind="{escape(part.kind)}">{part.html}</div>'
+    )
+
+
+def merge_snapshot(parts: list[SnapshotPart]) -> str:
+    """Fold the parts into one HTML document, frames and shadow roots at the end of ``<body>``."""
+    if not parts:
+        return ""
+    main, extra = parts[0], parts[1:]
+    if not extra:
+        return main.html
+    wrapped = "".join(wrap_part(part) for part in extra)
+    ends = list(_BODY_END.finditer(main.html))
+    if not ends:
+        return main.html + wrapped
+    cut = ends[-1].start()
+    return main.html[:cut] + wrapped + main.html[cut:]
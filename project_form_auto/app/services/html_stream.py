@@ -0,0 +1,165 @@
+"""Streaming read of an HTML response body, straight from bytes.
+
+``fetch_html`` used to download the whole body, decode it through
+``response.text`` (which runs charset detection over the full page when no
+encoding is declared) and then lowercase a full copy just to look for
+``<form``. :func:`read_html` instead:
+
+* reads the body chunk by chunk and feeds the raw bytes to lxml's
+  incremental HTML parser, which reports real ``<form>`` open/close events
+  to a :class:`_FormScanner` target. No tree is built: the page is parsed
+  into a tree once, later, by :class:`~app.services.parsed_page.ParsedPage`;
+* stops at ``max_bytes`` so that huge pages cannot exhaust memory;
+* when the caller only needs form fields, stops downloading once a main form
+  (one with at least :data:`MAIN_FORM_MIN_FIELDS` fillable fields) has been
+  closed, no form is open and ``margin_bytes`` more have been read (enough
+  for labels placed right after a form), or once ``</body>`` is reached. A
+  header search form alone never stops the read: the real form may come
+  further down the page. The page is only marked ``truncated`` when bytes
+  were actually left unread;
+* decodes the bytes once, with the charset of the ``Content-Type`` header,
+  the BOM or the ``<meta charset>`` of the document, UTF‑8 otherwise.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from contextlib import suppress
+from typing import Iterator, NamedTuple
+
+from lxml import etree
+
+CHUNK_SIZE = 64 * 1024
+# Champs remplissables à partir desquels un formulaire est tenu pour le
+# formulaire principal (une recherche d'en-tête n'en a qu'un).
+MAIN_FORM_MIN_FIELDS = 2
+_FIELD_TAGS = ("input", "select", "textarea")
+# Types d'input qui ne se remplissent pas.
+_NON_FILLABLE_TYPES = {"hidden", "submit", "button", "image", "reset"}
+
+_HEADER_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class StreamedHtml(NamedTuple):
+    html: str
+    has_form: bool
+    # Vrai si la lecture s'est arrêtée avant la fin du document.
+    truncated: bool
+    size: int
+
+
+def _known_encoding(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def resolve_encoding(content_type: str | None, head: bytes) -> str:
+    """Pick the charset of a page without scanning the whole body."""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = _HEADER_CHARSET.search(content_type or "")
+    encoding = _known_encoding(match.group(1)) if match else None
+    if encoding:
+        return encoding
+    match = _META_CHARSET.search(head)
+    encoding = _known_encoding(match.group(1).decode("ascii", "ignore")) if match else None
+    return encoding or "utf-8"
+
+
+class _FormScanner:
+    """lxml parser target tracking forms and ``</body>``, without building a tree."""
+
+    def __init__(self) -> None:
+        self.has_form = False
+        # Champs remplissables de chaque formulaire ouvert (formulaires imbriqués compris).
+        self.open_forms: list[int] = []
+        self.main_form_closed = False
+        self.body_closed = False
+
+    def start(self, tag: str, attrib) -> None:
+        if tag == "form":
+            self.has_form = True
+            self.open_forms.append(0)
+        elif (
+            tag in _FIELD_TAGS
+            and self.open_forms
+            and (attrib.get("type") or "").lower() not in _NON_FILLABLE_TYPES
+        ):
+            self.open_forms[-1] += 1
+
+    def end(self, tag: str) -> None:
+        if tag == "form":
+            if self.open_forms and self.open_forms.pop() >= MAIN_FORM_MIN_FIELDS:
+                self.main_form_closed = True
+        elif tag == "body":
+            self.body_closed = True
+
+    def data(self, data: str) -> None:
+        pass
+
+    def close(self) -> None:
+        return None
+
+
+def _has_more(chunks: Iterator[bytes]) -> bool:
+    """Whether the body still has unread bytes."""
+    return any(chunk for chunk in chunks)
+
+
+def read_html(
+    response,
+    *,
+    max_bytes: int,
+    fields_only: bool = False,
+    margin_bytes: int = 16 * 1024,
+) -> StreamedHtml:
+    """Read ``response`` (opened with ``stream=True``) into a ``StreamedHtml``."""
+    body = bytearray()
+    scanner = _FormScanner()
+    parser = etree.HTMLParser(target=scanner)
+    main_form_end = None
+    truncated = False
+
+    chunks = iter(response.iter_content(CHUNK_SIZE))
+    for chunk in chunks:
+        if not chunk:
+            continue
+        room = max_bytes - len(body)
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            truncated = True
+        body.extend(chunk)
+        parser.feed(chunk)
+        if scanner.main_form_closed:
+            scanner.main_form_closed = False
+            main_form_end = len(body)
+
+        if truncated:
+            break
+        if fields_only and not scanner.open_forms and (
+            scanner.body_closed or (main_form_end is not None and len(body) - main_form_end >= margin_bytes)
+        ):
+            # Formulaire principal fermé et marge pour les labels voisins lue,
+            # ou fin du <body> : inutile de télécharger la suite.
+            truncated = _has_more(chunks)
+            break
+
+    # Document vide ou tronqué : seuls les événements déjà reçus comptent.
+    with suppress(etree.LxmlError):
+        parser.close()
+
+    encoding = resolve_encoding(response.headers.get("Content-Type"), bytes(body[:4096]))
+    html = body.decode(encoding, errors="replace")
+    return StreamedHtml(html=html, has_form=scanner.has_form, truncated=truncated, size=len(body))
@@ -0,0 +1,115 @@
+"""Shared HTTP client with keep-alive connection pools.
+
+Every page fetch used to go through a bare ``requests.get`` with
+``Connection: close``, repeating DNS, TCP and TLS setup even for the same
+host. :class:`HttpClient` wraps a single ``requests.Session`` whose adapter
+keeps up to ``pool_maxsize`` open connections per host and retries idempotent
+requests with exponential backoff on connection errors and 429/5xx answers.
+
+Responses are decoded transparently: gzip and deflate by urllib3, brotli as
+well when the optional ``brotli`` (or ``brotlicffi``) package is installed.
+
+:meth:`HttpClient.get` is thread-safe: async code calls it through the
+bounded IO executor (:func:`app.services.executors.run_io`) and shares the
+very same pool.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Codage brotli seulement si un décodeur est disponible côté urllib3.
+_HAS_BROTLI = any(importlib.util.find_spec(m) for m in ("brotli", "brotlicffi"))
+ACCEPT_ENCODING = "gzip, deflate, br" if _HAS_BROTLI else "gzip, deflate"
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """Keep-alive HTTP client shared by the whole application.
+
+    Parameters
+    ----------
+    pool_connections: int
+        Number of per-host pools kept (least recently used hosts are dropped).
+    pool_maxsize: int
+        Maximum number of open connections kept per host.
+    retries: int
+        Number of retries for idempotent requests.
+    backoff_factor: float
+        Base delay of the exponential backoff between retries.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = 32,
+        pool_maxsize: int = 8,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+    ) -> None:
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            # On laisse raise_for_status() décider, comme avant.
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET through the shared pool (same arguments as ``requests``)."""
+        with self._lock:
+            self.requests_sent += 1
+        return self.session.get(url, **kwargs)
+
+    def stats(self) -> dict:
+        """Pool occupancy and connection reuse, aggregated over all hosts."""
+        pools = self._adapter.poolmanager.pools
+        hosts = []
+        # RecentlyUsedContainer refuse l'itération directe : keys() en renvoie
+        # une copie prise sous son verrou.
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # La file d'urllib3 est pré-remplie de ``None`` : seuls les autres
+            # éléments sont de vraies connexions ouvertes au repos.
+            queue = list(pool.pool.queue) if pool.pool is not None else []
+            hosts.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "idle": sum(1 for conn in queue if conn is not None),
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+        opened = sum(h["connections_opened"] for h in hosts)
+        sent = sum(h["requests"] for h in hosts)
+        return {
+            "requests_sent": self.requests_sent,
+            "hosts": hosts,
+            "connections_opened": opened,
+            "reuse_rate": 1 - opened / sent if sent else 0.0,
+        }
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,231 @@
+"""Per-site memo of form mappings, keyed by a structural fingerprint.
+
+Users come back to the same forms again and again, and each ``/form/map``
+used to run every field through the matcher anew. :class:`MappingMemo`
+stores, for each site (scheme, host and path of the URL) and each
+:func:`form_fingerprint` of the fields served there, the matcher version
+that produced the mapping and the ``(matched_key, confidence, reason)`` of
+every field.
+
+Entries are keyed by the ``(site, fingerprint)`` pair: routers such as
+``index.php?page=signup`` and ``index.php?page=contact`` serve several
+forms under one path, and each keeps its own mapping. A form that gained,
+lost or renamed a field gets a new fingerprint and is mapped again, its old
+entry aging out of the LRU; entries written by another matcher version are
+purged when the store is opened.
+
+Entries live in an in-memory LRU in front of a SQLite database in WAL
+mode, so several uvicorn workers can share the file and a repeat visit is
+answered from memory without touching the disk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.models.schemas import FormField
+
+MatchResult = tuple[Optional[str], float, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS form_mappings (
+    site TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    matcher_version TEXT NOT NULL,
+    results TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (site, fingerprint)
+)
+"""
+
+# Empreintes gardées sur disque par site : au-delà, les plus anciennes
+# (formulaires modifiés depuis) sont supprimées.
+MAX_FINGERPRINTS_PER_SITE = 16
+
+# Marque d'un attribut absent, distincte de la chaîne vide.
+_MISSING = "\x00"
+
+
+def site_key(url: str) -> str:
+    """Scheme, host and path of ``url``: query strings and fragments often
+    carry session tokens. Forms that differ under the same path are told
+    apart by their :func:`form_fingerprint`."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{(parts.hostname or '').lower()}{parts.path or '/'}"
+
+
+def form_fingerprint(fields: list[FormField]) -> str:
+    """Hash of the ordered field signatures of a form.
+
+    Each field contributes every attribute the matcher reads (tag, type,
+    name, id, label, placeholder, autocomplete, aria-label), in DOM order.
+    A missing attribute and an empty one hash differently.
+    """
+    digest = hashlib.sha256()
+    for field in fields:
+        signature = "\x1f".join(_MISSING if value is None else value for value in field.model_dump().values())
+        digest.update(signature.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class MappingMemo:
+    """Thread-safe LRU of mappings with an optional SQLite tier.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of ``(site, fingerprint)`` entries kept in memory. ``0`` disables the memo.
+    path: str, optional
+        SQLite database file. Without it the memo only lives in memory.
+    matcher_version: str
+        Version of the matcher; entries stored by another version are ignored
+        and purged from the database.
+    """
+
+    def __init__(self, maxsize: int, path: Optional[str], matcher_version: str) -> None:
+        self.maxsize = maxsize
+        self.path = path
+        self.matcher_version = matcher_version
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], list[MatchResult]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # SQLite tier
+    # ------------------------------------------------------------------
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # Ouverture paresseuse : rien n'est créé sur disque tant que le memo
+        # n'a pas servi. Appelé sous ``_lock``.
+        if self._db is not None or not self.path or self.maxsize <= 0:
+            return self._db
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=1000")
+            # Ancien format, une seule empreinte par site.
+            db.execute("DROP TABLE IF EXISTS mappings")
+            db.execute(_SCHEMA)
+            db.execute("DELETE FROM form_mappings WHERE matcher_version != ?", (self.matcher_version,))
+        except sqlite3.Error:
+            # Base illisible : le memo reste purement en mémoire.
+            self.path = None
+            return None
+        self._db = db
+        return db
+
+    def set_matcher_version(self, version: str) -> None:
+        """Switch to ``version``: entries of the previous one are dropped."""
+        with self._lock:
+            if version == self.matcher_version:
+                return
+            self.matcher_version = version
+            self._entries.clear()
+            if self._db is not None:
+                with suppress(sqlite3.Error):
+                    self._db.execute("DELETE FROM form_mappings WHERE matcher_version != ?", (version,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def get(self, site: str, fingerprint: str) -> Optional[list[MatchResult]]:
+        """Return the mapping stored for the form ``fingerprint`` of ``site``."""
+        if self.maxsize <= 0:
+            return None
+        key = (site, fingerprint)
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return results
+
+            db = self._connect()
+            row = None
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT results FROM form_mappings"
+                        " WHERE site = ? AND fingerprint = ? AND matcher_version = ?",
+                        (site, fingerprint, self.matcher_version),
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            results = [tuple(result) for result in json.loads(row[0])]
+            self._insert(key, results)
+            self.hits += 1
+            self.disk_hits += 1
+            return results
+
+    def put(self, site: str, fingerprint: str, results: list[MatchResult]) -> None:
+        """Store the mapping of the form ``fingerprint`` of ``site``."""
+        if self.maxsize <= 0:
+            return
+        results = [tuple(result) for result in results]
+        with self._lock:
+            self._insert((site, fingerprint), results)
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO form_mappings VALUES (?, ?, ?, ?, ?)",
+                    (site, fingerprint, self.matcher_version, json.dumps(results), time.time()),
+                )
+                db.execute(
+                    "DELETE FROM form_mappings WHERE site = ? AND fingerprint NOT IN"
+                    " (SELECT fingerprint FROM form_mappings WHERE site = ? ORDER BY updated_at DESC, rowid DESC LIMIT ?)",
+                    (site, site, MAX_FINGERPRINTS_PER_SITE),
+                )
+            except sqlite3.Error:
+                # Base verrouillée trop longtemps : l'entrée reste en mémoire.
+                pass
+
+    def _insert(self, key: tuple[str, str], results: list[MatchResult]) -> None:
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "path": self.path,
+                "matcher_version": self.matcher_version,
+            }
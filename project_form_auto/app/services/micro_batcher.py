@@ -0,0 +1,138 @@
+"""Cross-request micro-batching of encoder calls.
+
+Concurrent ``/form/map`` requests run in different threads of the CPU pool
+and used to call the encoder each on their own, every call paying the fixed
+cost of a forward pass and all of them fighting for the same cores.
+:class:`MicroBatcher` puts the calls in a queue instead. A single worker
+thread takes the first pending call, keeps collecting the calls that arrive
+within ``window_ms`` (or until ``max_batch`` texts are gathered), encodes
+the deduplicated texts of the whole batch in one forward pass and hands each
+caller its own rows back.
+
+Batch sizes and the time calls spent queued are exported through
+:meth:`MicroBatcher.stats`.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+
+class _Pending(NamedTuple):
+    texts: list[str]
+    future: Future
+    submitted: float
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``encode`` calls into batched forward passes.
+
+    Parameters
+    ----------
+    encode: callable
+        Function encoding a list of texts into one row per text.
+    window_ms: float
+        How long the first call of a batch waits for others. ``0`` disables
+        batching: each call goes straight to ``encode``.
+    max_batch: int
+        Number of texts after which a batch is encoded without waiting for
+        the end of the window.
+    """
+
+    def __init__(self, encode: Callable[[list[str]], np.ndarray], window_ms: float, max_batch: int) -> None:
+        self._encode = encode
+        self.window = window_ms / 1000
+        self.max_batch = max(max_batch, 1)
+        self._queue: queue.SimpleQueue[_Pending] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.calls = 0
+        self.texts = 0
+        self.max_texts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode ``texts`` as part of the next batch and wait for the result."""
+        if self.window <= 0 or not texts:
+            return self._encode(texts)
+        pending = _Pending(list(texts), Future(), time.perf_counter())
+        self._start()
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def _start(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="encoder-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            # ``_flush`` ne lève pas : une erreur ne tue jamais le thread.
+            batch = [self._queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.perf_counter() + self.window
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            self._flush(batch)
+
+    def _flush(self, batch: list[_Pending]) -> None:
+        started = time.perf_counter()
+        # Les requêtes concurrentes partagent souvent des blobs : chaque texte
+        # n'est encodé qu'une fois par lot.
+        texts = list(dict.fromkeys(text for pending in batch for text in pending.texts))
+        waits = [started - pending.submitted for pending in batch]
+        with self._lock:
+            self.batches += 1
+            self.calls += len(batch)
+            self.texts += len(texts)
+            self.max_texts = max(self.max_texts, len(texts))
+            self.wait_seconds += sum(waits)
+            self.max_wait_seconds = max(self.max_wait_seconds, *waits)
+
+        # Toute erreur (encodeur, nombre de lignes inattendu...) est remise aux
+        # appelants du lot : le thread doit survivre pour les lots suivants.
+        try:
+            vectors = np.asarray(self._encode(texts))
+            if len(vectors) != len(texts):
+                raise ValueError(f"Encoder returned {len(vectors)} rows for {len(texts)} texts")
+            rows = {text: i for i, text in enumerate(texts)}
+            for pending in batch:
+                pending.future.set_result(vectors[[rows[text] for text in pending.texts]])
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+
+    def stats(self) -> dict:
+        """Batch sizes (calls and distinct texts) and queue waits, in milliseconds."""
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "calls": self.calls,
+                "avg_calls_per_batch": round(self.calls / self.batches, 2) if self.batches else 0.0,
+                "avg_texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "max_texts_per_batch": self.max_texts,
+                "avg_wait_ms": round(self.wait_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
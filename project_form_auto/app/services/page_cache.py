@@ -0,0 +1,135 @@
+"""URL-keyed cache of fetched pages.
+
+``/form/detect``, ``/form/analyze`` and ``/form/map`` often fetch the same URL
+one after the other, and the extension calls ``/form/map`` each time its
+popup opens. :class:`PageCache` keeps, for each URL, the final HTML, the HTTP
+status, whether Selenium had to render the page, and the ``ETag`` /
+``Last-Modified`` validators of the response.
+
+A fresh entry (younger than the TTL) is served without any network access.
+A stale entry is revalidated by :func:`app.services.scraper.fetch_html` with
+a conditional request; on ``304 Not Modified`` the stored HTML is reused and
+the headless browser is skipped even when the page originally needed it.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class CachedPage:
+    status: int
+    html: str
+    rendered: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Page lue partiellement (fin des formulaires atteinte) : ne convient
+    # qu'aux appelants qui ne veulent que les champs.
+    truncated: bool = False
+    # Raison de la décision de rendu (voir app.services.render_decision).
+    render_reason: Optional[str] = None
+    # Erreur réseau de la requête HTTP : la page (vide, ou rendue par Selenium
+    # en recours) n'est pas mise en cache.
+    fetch_error: Optional[str] = None
+    stored_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    def validators(self) -> dict[str, str]:
+        """Headers for a conditional request revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def parse_cache_control(value: Optional[str]) -> dict[str, Optional[str]]:
+    """Parse a ``Cache-Control`` header into ``{directive: argument}``.
+
+    >>> parse_cache_control("no-cache, max-age=60")
+    {'no-cache': None, 'max-age': '60'}
+    """
+    directives: dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+class PageCache:
+    """Thread-safe LRU of :class:`CachedPage` entries with a TTL.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of URLs kept. ``0`` disables the cache.
+    ttl: float
+        Seconds during which an entry is served without revalidation.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._entries.get(url)
+            if page is not None:
+                self._entries.move_to_end(url)
+            return page
+
+    def put(self, url: str, page: CachedPage) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[url] = page
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as fresh again after a ``304 Not Modified``."""
+        with self._lock:
+            page = self._entries.get(url)
+            if page is not None:
+                page.stored_at = time.monotonic()
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: ``hit``, ``revalidated`` or ``miss``."""
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
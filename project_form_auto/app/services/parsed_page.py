@@ -0,0 +1,249 @@
+"""A page parsed once and shared by the detector, the analyzer and the mapper.
+
+``detect_form`` and ``extract_form_fields`` used to parse the same HTML twice
+(``html.parser`` then ``lxml``) and each rescanned the tree for every lookup.
+:class:`ParsedPage` holds a single tree plus indexes computed lazily on first
+use:
+
+* elements by tag name, in document order;
+* ``<label>`` elements by their ``for`` attribute.
+
+The tree itself comes from a pluggable parser backend. Subclasses only
+implement a handful of primitives (tag name, parent, text of an element...)
+and the detector and analyzer run unchanged on top of them:
+
+* ``bs4`` (:class:`SoupPage`) is the reference, a BeautifulSoup tree built
+  with the lxml parser;
+* ``lxml`` (:class:`LxmlPage`) keeps the native ``lxml.html`` tree. The
+  document stays in C and Python proxies are only created for the nodes the
+  analyzer actually visits (forms, fields, their labels and parents), which
+  is what a ``SoupStrainer`` would give without losing the label context.
+
+Both backends return identical ``FormField`` lists; the text helpers of
+:class:`LxmlPage` reproduce BeautifulSoup's ``get_text`` rules for that.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Any, Iterable, Iterator
+
+from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+
+from app.config import PARSER_BACKEND
+
+FIELD_TAGS = ("input", "select", "textarea")
+
+
+class ParsedPage(ABC):
+    """Parsed HTML document with lazily built lookup indexes.
+
+    Use :func:`parse_page` (or :meth:`ensure`) to build one with the
+    configured backend.
+    """
+
+    backend = ""
+
+    def __init__(self, html: str) -> None:
+        self.html = html
+        self._find_cache: dict[tuple[str, ...], list[Any]] = {}
+
+    @classmethod
+    def ensure(cls, page: str | ParsedPage, backend: str | None = None) -> ParsedPage:
+        """Return ``page`` as is, or parse it when raw HTML is given."""
+        return page if isinstance(page, ParsedPage) else parse_page(page, backend)
+
+    # ------------------------------------------------------------------
+    # Primitives implemented by each backend
+    # ------------------------------------------------------------------
+    @abstractmethod
+    def _iter_elements(self) -> Iterable[Any]:
+        """Every element of the document, in document order."""
+
+    @abstractmethod
+    def tag(self, element) -> str:
+        """Tag name of ``element``."""
+
+    @abstractmethod
+    def parent(self, element):
+        """Parent element of ``element``."""
+
+    @abstractmethod
+    def find_parent(self, element, tag: str):
+        """Closest ancestor of ``element`` with the given tag name."""
+
+    @abstractmethod
+    def descendants(self, element, tags: tuple[str, ...]) -> Iterable[Any]:
+        """Descendants of ``element`` with one of the given tag names, in document order."""
+
+    @abstractmethod
+    def strings(self, element, strip: bool = False) -> Iterator[str]:
+        """Text nodes of ``element`` with BeautifulSoup's ``_all_strings`` rules."""
+
+    def get_text(self, element, separator: str = "", strip: bool = False) -> str:
+        return separator.join(self.strings(element, strip))
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+    @cached_property
+    def _elements(self) -> list[Any]:
+        # Un seul parcours de l'arbre, en ordre document.
+        return list(self._iter_elements())
+
+    @cached_property
+    def _by_tag(self) -> dict[str, list[Any]]:
+        by_tag: dict[str, list[Any]] = {}
+        for element in self._elements:
+            by_tag.setdefault(self.tag(element), []).append(element)
+        return by_tag
+
+    def find_all(self, *tags: str) -> list[Any]:
+        """Elements with one of the given tag names, in document order."""
+        if len(tags) == 1:
+            return self._by_tag.get(tags[0], [])
+        if tags not in self._find_cache:
+            names = set(tags)
+            self._find_cache[tags] = [e for e in self._elements if self.tag(e) in names]
+        return self._find_cache[tags]
+
+    @cached_property
+    def labels_by_for(self) -> dict[str, Any]:
+        """First ``<label>`` for each ``for`` value, like ``soup.find`` would return."""
+        labels: dict[str, Any] = {}
+        for label in self.find_all("label"):
+            target = label.get("for")
+            if target and target not in labels:
+                labels[target] = label
+        return labels
+
+    def label_for(self, field_id: str | None):
+        if not field_id:
+            return None
+        return self.labels_by_for.get(field_id)
+
+    @property
+    def fields(self) -> list[Any]:
+        return self.find_all(*FIELD_TAGS)
+
+
+class SoupPage(ParsedPage):
+    """Reference backend: a BeautifulSoup tree built with the lxml parser."""
+
+    backend = "bs4"
+
+    def __init__(self, html: str) -> None:
+        super().__init__(html)
+        self.soup = BeautifulSoup(html, "lxml")
+
+    def _iter_elements(self):
+        return self.soup.find_all(True)
+
+    def tag(self, element) -> str:
+        return element.name
+
+    def parent(self, element):
+        return element.parent
+
+    def find_parent(self, element, tag: str):
+        return element.find_parent(tag)
+
+    def descendants(self, element, tags: tuple[str, ...]):
+        return element.find_all(list(tags))
+
+    def strings(self, element, strip: bool = False) -> Iterator[str]:
+        return element.stripped_strings if strip else element.strings
+
+    def get_text(self, element, separator: str = "", strip: bool = False) -> str:
+        return element.get_text(separator, strip=strip)
+
+
+# Balises dont BeautifulSoup range le texte dans une classe à part (Script,
+# Stylesheet, TemplateString, Ruby*), ignorée par get_text() sur un parent.
+_SPECIAL_STRING_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+_UTF8_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+class LxmlPage(ParsedPage):
+    """Fast backend working directly on the ``lxml.html`` tree."""
+
+    backend = "lxml"
+
+    def __init__(self, html: str) -> None:
+        super().__init__(html)
+        try:
+            self.root = self._parse(html)
+        except etree.ParserError:
+            # Document vide : on garde un arbre vide, comme bs4.
+            self.root = lxml_html.document_fromstring("<html></html>")
+
+    @staticmethod
+    def _parse(html: str):
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # lxml refuse une chaîne unicode qui déclare son encodage
+            # (<?xml ... encoding=...?>) : on repasse par des octets UTF-8.
+            return lxml_html.document_fromstring(html.encode("utf-8"), parser=_UTF8_PARSER)
+
+    def _iter_elements(self):
+        return self.root.iter(etree.Element)
+
+    def find_all(self, *tags: str) -> list[Any]:
+        # Filtrage côté C : seuls les nœuds demandés deviennent des objets Python.
+        if tags not in self._find_cache:
+            self._find_cache[tags] = list(self.root.iter(*tags))
+        return self._find_cache[tags]
+
+    def tag(self, element) -> str:
+        return element.tag
+
+    def parent(self, element):
+        return element.getparent()
+
+    def find_parent(self, element, tag: str):
+        return next(element.iterancestors(tag), None)
+
+    def descendants(self, element, tags: tuple[str, ...]):
+        return element.iterdescendants(*tags)
+
+    def strings(self, element, strip: bool = False) -> Iterator[str]:
+        for text in self._texts(element, element.tag in _SPECIAL_STRING_CONTAINERS):
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            yield text
+
+    def _texts(self, element, inside_special: bool) -> Iterator[str]:
+        # Ordre document : texte de l'élément, puis chaque enfant suivi de son
+        # ``tail``. Les commentaires et instructions ne donnent que leur tail.
+        if element.text and not inside_special:
+            yield element.text
+        for child in element:
+            if isinstance(child.tag, str):
+                child_special = inside_special or child.tag in _SPECIAL_STRING_CONTAINERS
+                yield from self._texts(child, child_special)
+            if child.tail and not inside_special:
+                yield child.tail
+
+
+PARSER_BACKENDS: dict[str, type[ParsedPage]] = {
+    SoupPage.backend: SoupPage,
+    LxmlPage.backend: LxmlPage,
+}
+
+
+def parse_page(html: str, backend: str | None = None) -> ParsedPage:
+    """Parse ``html`` with ``backend`` (defaults to the ``PARSER_BACKEND`` setting)."""
+    name = backend or PARSER_BACKEND
+    try:
+        page_class = PARSER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend: {name!r}") from None
+    return page_class(html)
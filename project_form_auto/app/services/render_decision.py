@@ -0,0 +1,186 @@
+"""Decide whether a statically fetched page needs a headless render.
+
+``fetch_html`` used to start Selenium whenever the static HTML was under
+1000 bytes or had no ``<form`` tag, including pages whose form is built
+from ``div`` elements and is already visible in the source.
+:class:`RenderAdvisor` replaces that rule:
+
+1. a ``<form>`` tag in the static HTML, or fields that
+   :func:`~app.services.form_detector.is_probable_form` recognises without
+   one, means the static page is enough;
+2. otherwise the memory of the domain is checked: once rendering has been
+   tried ``min_samples`` times without ever finding more fields than the
+   static HTML, the domain is no longer rendered; a domain where it did find
+   more fields keeps being rendered;
+3. otherwise the HTML is scored for signs of client-side rendering (SPA root
+   element, ``<noscript>`` asking for JavaScript, iframes the browser can
+   look into, script bundle, almost no text) and rendered when the score reaches :data:`RENDER_SCORE_THRESHOLD`.
+
+Every decision carries a short reason, kept on the cached page and counted
+in :meth:`RenderAdvisor.stats`.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from app.services.form_analyzer import extract_form_fields
+from app.services.form_detector import is_probable_form
+from app.services.parsed_page import ParsedPage, parse_page
+
+# Racines d'applications monopages (React, Vue, Next, Nuxt, Angular, Svelte...).
+_SPA_ROOT = re.compile(
+    r"""<[a-z]+[^>]*\bid=["']?(?:root|app|__next|__nuxt|svelte)\b"""
+    r"""|\bng-app\b|<app-root\b|\bdata-reactroot\b|\bdata-server-rendered\b""",
+    re.IGNORECASE,
+)
+_JAVASCRIPT_HINT = re.compile(r"javascript|\bjs\b", re.IGNORECASE)
+_SCRIPT_SRC = re.compile(r"<script[^>]+\bsrc=", re.IGNORECASE)
+
+# Texte visible en dessous duquel la page est considérée comme une coquille vide.
+LITTLE_TEXT_CHARS = 200
+RENDER_SCORE_THRESHOLD = 2
+
+
+class RenderDecision(NamedTuple):
+    render: bool
+    reason: str
+    # Champs trouvés dans le HTML statique, comparés ensuite au rendu.
+    static_fields: int = 0
+
+
+@dataclass
+class _DomainStats:
+    renders: int = 0
+    gains: int = 0
+
+
+def _domain(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+def count_fields(html: str | ParsedPage) -> int:
+    """Number of user-fillable fields of a page, as the analyzer sees them."""
+    # Parseur lxml : le comptage ne sert qu'à comparer statique et rendu.
+    return len(extract_form_fields(ParsedPage.ensure(html, "lxml")))
+
+
+def render_score(html: str, page: ParsedPage) -> tuple[int, list[str]]:
+    """Score the signs that ``html`` is filled in by JavaScript."""
+    score = 0
+    signs: list[str] = []
+    if _SPA_ROOT.search(html):
+        score += 2
+        signs.append("SPA root element")
+    if any(_JAVASCRIPT_HINT.search(page.get_text(n, " ")) for n in page.find_all("noscript")):
+        score += 2
+        signs.append("<noscript> asks for JavaScript")
+    if page.find_all("iframe"):
+        # Le rendu Selenium inspecte aussi le contenu des iframes.
+        score += 2
+        signs.append("iframe")
+    if _SCRIPT_SRC.search(html):
+        score += 1
+        signs.append("script bundle")
+    body = page.find_all("body")
+    text = page.get_text(body[0], "", strip=True) if body else ""
+    if len(text) < LITTLE_TEXT_CHARS:
+        score += 1
+        signs.append("almost no static text")
+    return score, signs
+
+
+class RenderAdvisor:
+    """Render decisions with a per-domain memory of what rendering brought.
+
+    Parameters
+    ----------
+    maxsize: int
+        Number of domains remembered (LRU). ``0`` disables the memory.
+    min_samples: int
+        Renders without extra fields after which a domain stops being rendered.
+    """
+
+    def __init__(self, maxsize: int, min_samples: int) -> None:
+        self.maxsize = maxsize
+        self.min_samples = min_samples
+        self._domains: OrderedDict[str, _DomainStats] = OrderedDict()
+        self._lock = threading.Lock()
+        self._reasons: Counter[str] = Counter()
+        self.renders = 0
+        self.skipped = 0
+
+    def decide(self, url: str, html: str, has_form: bool) -> RenderDecision:
+        decision = self._decide(url, html, has_form)
+        with self._lock:
+            self._reasons[decision.reason] += 1
+            if decision.render:
+                self.renders += 1
+            else:
+                self.skipped += 1
+        return decision
+
+    def _decide(self, url: str, html: str, has_form: bool) -> RenderDecision:
+        if not html:
+            return RenderDecision(True, "static fetch failed")
+        if has_form:
+            return RenderDecision(False, "form tag in static HTML")
+
+        page = parse_page(html, "lxml")
+        static_fields = count_fields(page)
+        if is_probable_form(page):
+            return RenderDecision(False, "fields without form tag in static HTML", static_fields)
+
+        memory = self._memory(url)
+        if memory is not None and memory.gains:
+            return RenderDecision(True, "rendering found extra fields on this domain", static_fields)
+        if memory is not None and memory.renders >= self.min_samples:
+            return RenderDecision(False, "rendering never found extra fields on this domain", static_fields)
+
+        score, signs = render_score(html, page)
+        if score >= RENDER_SCORE_THRESHOLD:
+            return RenderDecision(True, ", ".join(signs), static_fields)
+        return RenderDecision(False, "static HTML without form or rendering hints", static_fields)
+
+    def _memory(self, url: str) -> _DomainStats | None:
+        with self._lock:
+            memory = self._domains.get(_domain(url))
+            return _DomainStats(memory.renders, memory.gains) if memory is not None else None
+
+    def record(self, url: str, decision: RenderDecision, rendered_html: str) -> bool:
+        """Remember whether rendering ``url`` found more fields than the static HTML."""
+        gained = count_fields(rendered_html) > decision.static_fields
+        if self.maxsize <= 0 or decision.reason == "static fetch failed":
+            # Sans HTML statique, la comparaison n'a pas de sens.
+            return gained
+        domain = _domain(url)
+        with self._lock:
+            memory = self._domains.setdefault(domain, _DomainStats())
+            self._domains.move_to_end(domain)
+            memory.renders += 1
+            memory.gains += int(gained)
+            while len(self._domains) > self.maxsize:
+                self._domains.popitem(last=False)
+        return gained
+
+    def clear(self) -> None:
+        with self._lock:
+            self._domains.clear()
+            self._reasons.clear()
+            self.renders = 0
+            self.skipped = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "skipped": self.skipped,
+                "reasons": dict(self._reasons),
+                "domains": len(self._domains),
+                "domains_with_gains": sum(1 for m in self._domains.values() if m.gains),
+            }
@@ -0,0 +1,96 @@
+"""Rendering profiles for the Selenium sessions of the driver pool.
+
+* ``full``: the historical profile: Chrome with a window, every resource
+  downloaded, ``driver.get`` returning after the ``load`` event.
+* ``lean``: headless, ``eager`` page load strategy (``driver.get`` returns
+  at ``DOMContentLoaded``), images disabled, and every request matching
+  ``RENDER_BLOCKLIST`` (fonts, media, analytics and ad domains...) blocked
+  through the DevTools protocol. Forms only need the DOM and the scripts
+  that build it.
+
+:class:`RenderMetrics` records, per profile, how long each page took to
+render and how many bytes it transferred (Resource Timing API), so both
+profiles can be compared on the same URLs through ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+from app.config import RENDER_BLOCKLIST, RENDER_PROFILE
+
+RENDER_PROFILES = ("full", "lean")
+
+# Octets transférés par la page : document et sous-ressources. ``transferSize``
+# vaut 0 pour les ressources d'autres origines sans Timing-Allow-Origin ; on se
+# rabat alors sur ``encodedBodySize`` (qui peut être nul lui aussi).
+_TRANSFERRED_BYTES_SCRIPT = r"""
+let total = 0;
+for (const entry of performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"))) {
+  total += entry.transferSize || entry.encodedBodySize || 0;
+}
+return total;
+"""
+
+
+def configure_options(options: Options, profile: str) -> bool:
+    """Apply ``profile`` to Chrome ``options``; returns whether to run headless."""
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {profile!r}")
+    if profile != "lean":
+        return False
+    options.page_load_strategy = "eager"
+    options.add_experimental_option(
+        "prefs", {"profile.managed_default_content_settings.images": 2}
+    )
+    return True
+
+
+def apply_blocklist(driver, profile: str) -> None:
+    """Block the ``RENDER_BLOCKLIST`` URL patterns in a freshly started session."""
+    if profile != "lean" or not RENDER_BLOCKLIST:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(RENDER_BLOCKLIST)})
+
+
+class RenderMetrics:
+    """Render time and transferred bytes per page, aggregated per profile."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: dict[str, dict[str, float]] = {}
+
+    def record(self, profile: str, seconds: float, transferred: int) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(profile, {"pages": 0, "seconds": 0.0, "bytes": 0})
+            totals["pages"] += 1
+            totals["seconds"] += seconds
+            totals["bytes"] += transferred
+
+    def measure(self, driver, started: float, profile: str = RENDER_PROFILE) -> None:
+        """Record a page opened at ``started`` (``time.perf_counter()``)."""
+        seconds = time.perf_counter() - started
+        try:
+            transferred = int(driver.execute_script(_TRANSFERRED_BYTES_SCRIPT) or 0)
+        except WebDriverException:
+            transferred = 0
+        self.record(profile, seconds, transferred)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                profile: {
+                    "pages": totals["pages"],
+                    "avg_seconds": round(totals["seconds"] / totals["pages"], 3),
+                    "avg_bytes": int(totals["bytes"] / totals["pages"]),
+                }
+                for profile, totals in self._totals.items()
+            }
+
+
+RENDER_METRICS = RenderMetrics()
@@ -1,5 +1,10 @@
 # Récupération du HTML brut.
+import atexit
 import random
+import re
+import time
+from functools import lru_cache, partial
+from http import HTTPStatus
 
 import requests
 from selenium import webdriver
@@ -10,6 +15,36 @@ from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+from app.config import (
+    DRIVER_POOL_ACQUIRE_TIMEOUT,
+    DRIVER_POOL_MAX_PAGES,
+    DRIVER_POOL_MAX_SIZE,
+    DRIVER_POOL_MIN_SIZE,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_RETRIES,
+    MAX_PAGE_BYTES,
+    PAGE_CACHE_SIZE,
+    PAGE_CACHE_TTL,
+    RENDER_MEMORY_MIN_SAMPLES,
+    RENDER_MEMORY_SIZE,
+    RENDER_PROFILE,
+    SELENIUM_CAPTURE_MODE,
+    STREAM_FORM_MARGIN_BYTES,
+)
+from app.services.driver_pool import DriverPool
+from app.services.executors import run_cpu, run_io, run_render
+from app.services.frame_capture import SnapshotPart, capture_snapshot, merge_snapshot
+from app.services.html_stream import read_html
+from app.services.http_client import HttpClient
+from app.services.page_cache import CachedPage, PageCache, parse_cache_control
+from app.services.render_decision import RenderAdvisor, RenderDecision
+from app.services.render_profile import (
+    RENDER_METRICS,
+    apply_blocklist,
+    configure_options,
+)
+
 TIMEOUT = 15
 
 # Différents user agent pour simuler des navigateurs variés. Récupérés depuis https://useragentstring.com
@@ -20,26 +55,79 @@ USER_AGENTS = [
 ]
 
 
+# Client HTTP partagé : une seule pool de connexions keep-alive pour toute l'API.
+HTTP_CLIENT = HttpClient(
+    pool_connections=HTTP_POOL_CONNECTIONS,
+    pool_maxsize=HTTP_POOL_MAXSIZE,
+    retries=HTTP_RETRIES,
+)
+atexit.register(HTTP_CLIENT.close)
+
+# Cache des pages par URL, revalidé par requêtes conditionnelles (ETag / Last-Modified).
+PAGE_CACHE = PageCache(PAGE_CACHE_SIZE, PAGE_CACHE_TTL)
+
+# Décide si une page doit passer par Selenium, avec mémoire par domaine.
+RENDER_ADVISOR = RenderAdvisor(RENDER_MEMORY_SIZE, RENDER_MEMORY_MIN_SAMPLES)
+
+
+# Présence d'une balise <form>, sans copier toute la page en minuscules.
+_FORM_TAG = re.compile(r"<form", re.IGNORECASE)
+
+
+def has_form_markup(html: str) -> bool:
+    return _FORM_TAG.search(html) is not None
+
+
 # Récupération du contenu HTML d'une page web.
 
 
-def create_driver(headless: bool = False) -> webdriver.Chrome:
+# Le binaire chromedriver n'est résolu (et téléchargé si besoin) qu'une seule fois.
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    return ChromeDriverManager().install()
+
+
+# ``profile`` : "full" (profil historique) ou "lean" (headless, chargement
+# "eager", ressources lourdes et traceurs bloqués), voir render_profile.
+def create_driver(headless: bool = False, profile: str = "full") -> webdriver.Chrome:
     options = Options()
+    headless = configure_options(options, profile) or headless
     if headless:
         options.add_argument("--headless")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
-    return webdriver.Chrome(
+    driver = webdriver.Chrome(
         options=options,
-        service=Service(ChromeDriverManager().install())
+        service=Service(chromedriver_path())
     )
+    try:
+        apply_blocklist(driver, profile)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+# Navigateurs gardés au chaud et prêtés requête par requête, avec le profil RENDER_PROFILE.
+DRIVER_POOL = DriverPool(
+    partial(create_driver, profile=RENDER_PROFILE),
+    min_size=DRIVER_POOL_MIN_SIZE,
+    max_size=DRIVER_POOL_MAX_SIZE,
+    max_pages=DRIVER_POOL_MAX_PAGES,
+    acquire_timeout=DRIVER_POOL_ACQUIRE_TIMEOUT,
+)
+atexit.register(DRIVER_POOL.close)
 
 
 # Cas des pages avec du JavaScript dynamique (formulaire non accessible avec le code source) .
-def load_main_page(driver: webdriver.Chrome, url: str, wait_seconds: int) -> str:
+def open_page(driver: webdriver.Chrome, url: str, wait_seconds: int) -> None:
     driver.get(url)
     WebDriverWait(driver, wait_seconds).until(
         ec.presence_of_element_located((By.TAG_NAME, "body")))
+
+
+def load_main_page(driver: webdriver.Chrome, url: str, wait_seconds: int) -> str:
+    open_page(driver, url, wait_seconds)
     return driver.page_source
 
 
@@ -55,51 +143,228 @@ def load_iframe_html(driver: webdriver.Chrome, iframe) -> str:
     return html
 
 
-def fetch_html_with_selenium(url: str, wait_seconds: int = 10) -> str:
-    driver = create_driver()
+# Mode "frames" : une bascule WebDriver par iframe, premier HTML avec un formulaire.
+def capture_frames(driver: webdriver.Chrome) -> str:
+    main_html = driver.page_source
 
-    try:
-        main_html = load_main_page(driver, url, wait_seconds)
+    # Cas simple : formulaire dans le DOM principal
+    if has_form_markup(main_html):
+        return main_html
 
-        # Cas simple : formulaire dans le DOM principal
-        if "<form" in main_html.lower():
-            return main_html
+    # Recherche éventuelle dans les iframes
+    iframes = get_iframes(driver)
 
-        # Recherche éventuelle dans les iframes
-        iframes = get_iframes(driver)
+    for iframe in iframes:
+        iframe_html = load_iframe_html(driver, iframe)
 
-        for iframe in iframes:
-            iframe_html = load_iframe_html(driver, iframe)
+        if has_form_markup(iframe_html):
+            return iframe_html
 
-            if "<form" in iframe_html.lower():
-                return iframe_html
+    return main_html
 
-        return main_html
 
-    finally:
-        driver.quit()
+# Frames de premier niveau dans l'instantané : "main/frame[3]".
+_TOP_FRAME_PATH = re.compile(r"^main/frame\[(\d+)\]$")
+
+
+# Mode "snapshot" : document, frames de même origine (imbriquées comprises) et
+# shadow roots ouverts en un seul script, fusionnés avec leur provenance.
+def capture_page(driver: webdriver.Chrome) -> str:
+    snapshot = capture_snapshot(driver)
+    parts = snapshot.parts
+    html = merge_snapshot(parts)
+    if has_form_markup(html) or not snapshot.cross_origin:
+        return html
+
+    # Aucun formulaire lisible depuis la page : on entre dans les frames d'une
+    # autre origine par WebDriver, comme le mode "frames".
+    frames = driver.find_elements(By.CSS_SELECTOR, "iframe, frame")
+    for path, frame_url in snapshot.cross_origin:
+        match = _TOP_FRAME_PATH.match(path)
+        if match is None or int(match.group(1)) >= len(frames):
+            continue
+        frame_html = load_iframe_html(driver, frames[int(match.group(1))])
+        if has_form_markup(frame_html):
+            return merge_snapshot([*parts, SnapshotPart(path, frame_url, "frame", frame_html)])
+    return html
+
+
+def fetch_html_with_selenium(url: str, wait_seconds: int = 10) -> str:
+    with DRIVER_POOL.lease() as driver:
+        started = time.perf_counter()
+        open_page(driver, url, wait_seconds)
+        RENDER_METRICS.measure(driver, started)
+        if SELENIUM_CAPTURE_MODE == "frames":
+            return capture_frames(driver)
+        return capture_page(driver)
 
 
 # Fonction principale de récupération du HTML.
+# ``cache_control`` reprend la syntaxe de l'en-tête HTTP Cache-Control :
+# ``no-cache`` force la revalidation, ``no-store`` contourne le cache,
+# ``max-age=N`` remplace la durée de fraîcheur par défaut.
+# Le corps est lu en streaming, au plus ``MAX_PAGE_BYTES`` octets. Avec
+# ``fields_only=True`` (appelants qui n'ont besoin que des champs), la lecture
+# s'arrête une fois les formulaires fermés : le HTML renvoyé peut être tronqué.
+#
+# La récupération se fait en trois étapes, partagées par la version synchrone
+# et la version asynchrone : cache, requête HTTP, rendu Selenium si
+# RENDER_ADVISOR le juge utile. ``fetch_page`` renvoie l'entrée complète
+# (statut, HTML, rendu ou non et pourquoi), ``fetch_html`` le couple (statut, HTML).
+# Une requête en échec n'est rendue que pour les refus de type anti-bot
+# (``_RENDER_AFTER_ERROR``) ; sinon la page garde le statut de l'erreur (502
+# sans réponse du serveur) et son message dans ``fetch_error``.
+
+def _lookup_cache(url: str, directives: dict, fields_only: bool) -> tuple[CachedPage | None, bool]:
+    """Return the usable cache entry and whether it is fresh enough to serve."""
+    if "no-store" in directives:
+        return None, False
+    cached = PAGE_CACHE.get(url)
+    if cached is None or (cached.truncated and not fields_only):
+        # Une page partielle ne suffit pas à qui veut le document complet.
+        return None, False
+    if "no-cache" in directives:
+        return cached, False
+    try:
+        max_age = float(directives.get("max-age") or PAGE_CACHE.ttl)
+    except ValueError:
+        max_age = PAGE_CACHE.ttl
+    if cached.age < max_age:
+        PAGE_CACHE.record("hit")
+        return cached, True
+    return cached, False
+
 
-def fetch_html(url: str, timeout: int = TIMEOUT) -> tuple[int, str]:
+# Refus qu'un navigateur headless contourne souvent (anti-bot, limitation de
+# débit) : la page est alors rendue malgré l'erreur HTTP.
+_RENDER_AFTER_ERROR = {HTTPStatus.FORBIDDEN, HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE}
+
+
+def _fetch_static(
+    url: str, timeout: int, cached: CachedPage | None, fields_only: bool
+) -> tuple[CachedPage, RenderDecision | None]:
+    """Plain HTTP fetch. Returns the page and the render decision (``None`` on 304)."""
     headers = {
         "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Connection": "close",
     }
+    if cached is not None:
+        headers.update(cached.validators())
 
     try:
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        html = response.text
-        html_lower = html.lower()
-        limit_size = 1000
-        if len(html) < limit_size or "<form" not in html_lower:
-            html = fetch_html_with_selenium(url)
-        return response.status_code, html
-
-    except requests.RequestException:
+        with HTTP_CLIENT.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if cached is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+                # Page inchangée : ni téléchargement, ni navigateur headless.
+                PAGE_CACHE.touch(url)
+                PAGE_CACHE.record("revalidated")
+                return cached, None
+
+            response.raise_for_status()
+            PAGE_CACHE.record("miss")
+            body = read_html(
+                response,
+                max_bytes=MAX_PAGE_BYTES,
+                fields_only=fields_only,
+                margin_bytes=STREAM_FORM_MARGIN_BYTES,
+            )
+        page = CachedPage(
+            status=response.status_code,
+            html=body.html,
+            rendered=False,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            truncated=body.truncated,
+        )
+        has_form = body.has_form
+
+    except requests.RequestException as e:
+        PAGE_CACHE.record("miss")
+        response = getattr(e, "response", None)
+        status = response.status_code if response is not None else HTTPStatus.BAD_GATEWAY
+        page = CachedPage(status=status, html="", rendered=False, fetch_error=str(e) or type(e).__name__)
+        if status not in _RENDER_AFTER_ERROR:
+            # Hôte injoignable ou page absente : un navigateur n'y ferait pas mieux.
+            return page, None
+        has_form = False
+
+    decision = RENDER_ADVISOR.decide(url, page.html, has_form)
+    page.render_reason = decision.reason
+    return page, decision
+
+
+def _with_rendered_html(page: CachedPage, html: str) -> CachedPage:
+    page.html = html
+    page.rendered = True
+    page.truncated = False
+    return page
+
+
+def _store(url: str, page: CachedPage, directives: dict) -> CachedPage:
+    # Une erreur passagère ne doit pas être resservie comme une page valide.
+    if "no-store" not in directives and page.fetch_error is None:
+        PAGE_CACHE.put(url, page)
+    return page
+
+
+def fetch_page(
+    url: str,
+    timeout: int = TIMEOUT,
+    cache_control: str | None = None,
+    *,
+    fields_only: bool = False,
+) -> CachedPage:
+    directives = parse_cache_control(cache_control)
+    cached, fresh = _lookup_cache(url, directives, fields_only)
+    if fresh:
+        return cached
+
+    page, decision = _fetch_static(url, timeout, cached, fields_only)
+    if decision is not None and decision.render:
         html = fetch_html_with_selenium(url)
-        return 200, html
+        RENDER_ADVISOR.record(url, decision, html)
+        page = _with_rendered_html(page, html)
+    return _store(url, page, directives)
+
+
+def fetch_html(
+    url: str,
+    timeout: int = TIMEOUT,
+    cache_control: str | None = None,
+    *,
+    fields_only: bool = False,
+) -> tuple[int, str]:
+    page = fetch_page(url, timeout, cache_control, fields_only=fields_only)
+    return page.status, page.html
+
+
+# Version asynchrone : le réseau et le rendu tournent dans des pools dédiés et bornés.
+async def fetch_page_async(
+    url: str,
+    timeout: int = TIMEOUT,
+    cache_control: str | None = None,
+    *,
+    fields_only: bool = False,
+) -> CachedPage:
+    directives = parse_cache_control(cache_control)
+    cached, fresh = _lookup_cache(url, directives, fields_only)
+    if fresh:
+        return cached
+
+    page, decision = await run_io(_fetch_static, url, timeout, cached, fields_only)
+    if decision is not None and decision.render:
+        html = await run_render(fetch_html_with_selenium, url)
+        await run_cpu(RENDER_ADVISOR.record, url, decision, html)
+        page = _with_rendered_html(page, html)
+    return _store(url, page, directives)
+
+
+async def fetch_html_async(
+    url: str,
+    timeout: int = TIMEOUT,
+    cache_control: str | None = None,
+    *,
+    fields_only: bool = False,
+) -> tuple[int, str]:
+    page = await fetch_page_async(url, timeout, cache_control, fields_only=fields_only)
+    return page.status, page.html
@@ -0,0 +1,125 @@
+"""Synonyms of every ``UserData`` key and the candidate texts built from them.
+
+Kept apart from :mod:`app.services.field_mapper`, which opens the mapping
+memo and the embedding cache when imported: the encoder process of
+:mod:`app.services.embedding_server` only needs the candidate texts.
+"""
+
+from typing import List
+
+# --------------------------------------------------------------------------------------
+# Définitions des candidats et liste de synonymes
+# --------------------------------------------------------------------------------------
+#
+# Bien que la correspondance repose désormais principalement sur la similarité
+# sémantique, nous conservons une liste de synonymes soigneusement sélectionnés
+# pour chaque clé UserData. Cela permet de constituer un ensemble d’expressions
+# représentatives à comparer avec le modèle d’embeddings, et sert également de
+# stratégie de correspondance de secours lorsque le modèle n’est pas disponible.
+# Les clés correspondent aux champs du modèle :class:`~app.models.schemas.UserData`.
+
+SYNONYMS: dict[str, List[str]] = {
+    "email": [
+        "email",
+        "e mail",
+        "mail",
+        "courriel",
+        "email address",
+        "adresse mail",
+    ],
+    "phone": [
+        "phone",
+        "tel",
+        "telephone",
+        "téléphone",
+        "mobile",
+        "gsm",
+        "cell",
+        "cellphone",
+        "phone number",
+    ],
+    "first_name": [
+        "first name",
+        "firstname",
+        "f name",
+        "prenom",
+        "prénom",
+        "given name",
+        "forename",
+    ],
+    "last_name": [
+        "last name",
+        "lastname",
+        "l name",
+        "nom",
+        "surname",
+        "family name",
+        "nom de famille",
+    ],
+    "full_name": [
+        "name",
+        "full name",
+        "fullname",
+        "nom complet",
+        "nom complet",
+    ],
+    "street": ["street", "rue", "road", "voie", "address 1"],
+    "street_number": ["street number", "number", "numero"],
+    "postal_code": [
+        "zip",
+        "zip code",
+        "postal code",
+        "postal",
+        "code postal",
+    ],
+    "city": ["city", "ville", "town", "commune"],
+    "country": ["country", "pays", "nation"],
+    "address": [
+        "address",
+        "adresse",
+        "full address",
+        "billing address",
+        "shipping address",
+    ],
+    "company": [
+        "company",
+        "societe",
+        "société",
+        "enterprise",
+        "organisation",
+        "organization",
+    ],
+    "birth_date": [
+        "birth date",
+        "birthdate",
+        "dob",
+        "date of birth",
+        "date de naissance",
+    ],
+    "gender": ["gender", "sexe", "sex", "civility", "civilité", "title"],
+    "birth_day": ["day", "jour", "birthday day", "jour naissance"],
+    "birth_month": ["month", "mois", "birthday month", "mois naissance"],
+    "birth_year": ["year", "année", "birthday year", "année naissance"],
+    "age": ["age", "âge", "years", "ans"],
+
+
+    "username": [
+    "username",
+    "user name",
+    "login",
+    "user id",
+    "userid",
+    "pseudo",
+    "nickname",
+]
+}
+
+# Build a flat list of representative phrases and their corresponding keys.  These
+# phrases will be encoded by the embedding model to create candidate vectors.
+CANDIDATE_TEXTS: list[str] = []
+CANDIDATE_KEYS: list[str] = []
+for _key, _tokens in SYNONYMS.items():
+    for _token in _tokens:
+        # Normalize underscores to spaces for more natural phrasing
+        CANDIDATE_TEXTS.append(_token.replace("_", " "))
+        CANDIDATE_KEYS.append(_key)
@@ -0,0 +1,100 @@
+"""Eager warm-up of the expensive components, run before the API takes traffic.
+
+Without it the first ``/form/map`` after a deploy pays for importing
+sentence-transformers, loading MiniLM and computing the candidate embeddings,
+and the first rendered page pays for resolving the chromedriver binary.
+:func:`run_warmup` runs every step in parallel threads and records, for each
+component, its state and how long it took; ``/ready`` reports that state.
+The API starts it with :func:`start_warmup` as a background task, so that
+``/ready`` answers ``503`` while it runs instead of the whole server being
+unreachable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Callable
+
+from app.services import field_mapper
+from app.services.scraper import DRIVER_POOL, chromedriver_path
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_STATE: dict[str, dict] = {}
+_LOCK = threading.Lock()
+
+
+def _load_model() -> None:
+    if not field_mapper._load_embedding_model():
+        # Le mapper retombe sur les heuristiques de tokens, on le signale.
+        raise RuntimeError("Embedding model unavailable, token fallback in use")
+
+
+def _warm_driver_pool() -> None:
+    chromedriver_path()
+    DRIVER_POOL.warm()
+
+
+# Étapes de préchauffage, exécutées en parallèle.
+COMPONENTS: dict[str, Callable[[], None]] = {
+    "embedding_model": _load_model,
+    "webdriver": _warm_driver_pool,
+}
+
+
+def _set(name: str, **values) -> None:
+    with _LOCK:
+        _STATE.setdefault(name, {"status": PENDING, "duration_ms": None, "error": None}).update(values)
+
+
+def _run_component(name: str, step: Callable[[], None]) -> None:
+    start = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        _set(name, status=FAILED, error=str(e))
+    else:
+        _set(name, status=READY)
+    _set(name, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+def _reset(status: str) -> None:
+    for name in COMPONENTS:
+        _set(name, status=status, duration_ms=None, error=None)
+
+
+async def run_warmup() -> None:
+    """Run every warm-up step concurrently and wait for all of them."""
+    _reset(PENDING)
+    await asyncio.gather(
+        *(asyncio.to_thread(_run_component, name, step) for name, step in COMPONENTS.items())
+    )
+
+
+def start_warmup() -> asyncio.Task:
+    """Mark every component pending and run :func:`run_warmup` in the background."""
+    # Marqués avant de rendre la main : /ready ne voit jamais un état vide.
+    _reset(PENDING)
+    return asyncio.create_task(run_warmup())
+
+
+def skip_warmup() -> None:
+    """Mark every component as skipped: each one loads on first use."""
+    _reset(SKIPPED)
+
+
+def readiness() -> tuple[bool, dict[str, dict]]:
+    """Return whether warm-up has finished and a copy of each component state.
+
+    A failed component does not block readiness: the API degrades (token
+    matching, browser started on demand) rather than never taking traffic.
+    """
+    with _LOCK:
+        state = {name: dict(values) for name, values in _STATE.items()}
+    ready = all(c["status"] != PENDING for c in state.values())
+    return ready, state
@@ -0,0 +1,64 @@
+# Doublures partagées par les tests.
+import zlib
+from http import HTTPStatus
+
+import numpy as np
+import requests
+
+from app.services.encoders import Encoder
+
+
+class HashingEncoder(Encoder):
+    """Deterministic bag-of-words encoder, stands in for a real model."""
+
+    name = "hashing"
+
+    def __init__(self, noise: float = 0.0) -> None:
+        self.noise = noise
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                vectors[row, zlib.crc32(word.encode()) % 64] += 1.0
+            vectors[row] += self.noise
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+
+class FakeResponse:
+    """Streamed ``requests`` response with a fixed body."""
+
+    def __init__(self, status_code=200, html="", headers=None):
+        self.status_code = status_code
+        self.body = html.encode("utf-8")
+        self.headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= HTTPStatus.BAD_REQUEST:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+    def iter_content(self, size):
+        yield self.body
+
+
+class FakeClient:
+    """Stands in for ``HttpClient``: answers in turn, or by URL with ``by_url``."""
+
+    def __init__(self, *responses, by_url=None):
+        self.responses = list(responses)
+        self.by_url = by_url
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        response = self.by_url[url] if self.by_url is not None else self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
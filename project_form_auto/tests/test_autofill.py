@@ -0,0 +1,32 @@
+from app.models.schemas import FormField, UserData
+from app.services.autofiller import SnapshotField, _fill_plan
+
+
+def snapshot_field(handle, tag="input", type="text", visible=True, **attributes):
+    return SnapshotField(handle, None, FormField(tag=tag, type=type, **attributes), visible)
+
+
+def test_plan_skips_checkable_and_non_text_inputs():
+    snapshot = [
+        snapshot_field("0", name="email", type="email"),
+        snapshot_field("1", name="gender", type="radio"),
+        snapshot_field("2", name="gender", type="RADIO"),
+        snapshot_field("3", name="newsletter", type="checkbox"),
+        snapshot_field("4", name="email", type="hidden"),
+        snapshot_field("5", tag="select", type="select-one", name="gender"),
+        snapshot_field("6", name="city", visible=False),
+    ]
+    matches = [
+        ("email", 0.95, ""),
+        ("gender", 0.98, ""),
+        ("gender", 0.98, ""),
+        ("email", 0.6, ""),
+        ("email", 0.98, ""),
+        ("gender", 0.98, ""),
+        ("city", 0.98, ""),
+    ]
+    user = UserData(email="jane@example.com", gender="F", city="Lyon")
+
+    plan = _fill_plan(snapshot, matches, user)
+
+    assert [(item.handle, value) for item, value in plan] == [("0", "jane@example.com"), ("5", "F")]
@@ -0,0 +1,47 @@
+from app.services.consent import ConsentCache, accept_cookie_banner
+
+
+class FakeDriver:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append(args)
+        return self.result
+
+
+def test_selector_results_count_as_hits_and_are_cached():
+    cache = ConsentCache(8)
+
+    assert accept_cookie_banner(FakeDriver({"selector": "#onetrust-accept-btn-handler", "source": "known"}),
+                                "https://www.example.com/a", cache)
+
+    assert cache.get("www.example.com") == "#onetrust-accept-btn-handler"
+    assert cache.stats()["hits"] == 1
+
+
+def test_keyword_fallback_and_no_banner_count_as_misses():
+    cache = ConsentCache(8)
+
+    calls = [
+        (FakeDriver({"selector": None, "source": "keyword"}), "https://a.example/"),
+        (FakeDriver(None), "https://b.example/"),
+    ]
+
+    assert [accept_cookie_banner(driver, url, cache) for driver, url in calls] == [True, False]
+    assert cache.stats()["misses"] == len(calls)
+    assert cache.get("a.example") is None
+
+
+def test_stale_cached_selector_is_dropped():
+    cache = ConsentCache(8)
+    cache.put("a.example", "#gone")
+    driver = FakeDriver({"selector": None, "source": "keyword"})
+
+    accept_cookie_banner(driver, "https://a.example/", cache)
+
+    assert driver.calls[0][2] == "#gone"
+    # La recherche par mot-clé est bornée aux conteneurs de bannière.
+    assert "[role='dialog']" in driver.calls[0][3]
+    assert cache.get("a.example") is None
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import pytest
+
+from app.services.driver_pool import DriverPool, DriverPoolTimeout
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+    def default_content(self):
+        pass
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for the pool: windows, cookies, storage."""
+
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.switch_to = FakeSwitchTo(self)
+        self.cookies = {"session": "1"}
+        self.storage = {"https://example.com": "localStorage", "https://tracker.example": "IndexedDB"}
+        self.cdp = True
+        self.url = "https://example.com/"
+        self.healthy = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError("browser crashed")
+
+    def execute_cdp_cmd(self, command, params):
+        if not self.cdp:
+            raise RuntimeError("CDP unavailable")
+        if command == "Network.clearBrowserCookies":
+            self.cookies.clear()
+        elif (command, params) == ("Storage.clearDataForOrigin", {"origin": "*", "storageTypes": "all"}):
+            self.storage.clear()
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def get(self, url):
+        self.url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(**kwargs):
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    return DriverPool(factory, **kwargs), drivers
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition never met"
+        time.sleep(0.005)
+
+
+def test_acquire_reuses_released_driver_after_reset():
+    pool, drivers = make_pool(max_size=2)
+
+    driver = pool.acquire()
+    driver.window_handles.append("popup")
+    pool.release(driver)
+
+    assert pool.acquire() is driver
+    assert driver.window_handles == ["main"]
+    assert driver.cookies == {}
+    assert driver.storage == {}
+    assert driver.url == "about:blank"
+    assert len(drivers) == 1
+
+
+def test_reset_without_cdp_still_clears_cookies():
+    pool, _ = make_pool(max_size=1)
+    driver = pool.acquire()
+    driver.cdp = False
+
+    pool.release(driver)
+
+    assert pool.acquire() is driver
+    assert driver.cookies == {}
+
+
+def test_acquire_times_out_when_pool_is_full():
+    pool, _ = make_pool(max_size=1)
+    pool.acquire()
+
+    with pytest.raises(DriverPoolTimeout):
+        pool.acquire(timeout=0.05)
+
+
+def test_release_wakes_a_waiting_acquire():
+    pool, _ = make_pool(max_size=1)
+    driver = pool.acquire()
+    threading.Timer(0.05, pool.release, (driver,)).start()
+
+    assert pool.acquire(timeout=2) is driver
+
+
+def test_driver_recycled_after_max_pages():
+    pool, drivers = make_pool(max_size=1, max_pages=2)
+
+    for _ in range(2):
+        with pool.lease() as driver:
+            assert driver is drivers[0]
+
+    assert drivers[0].quit_called
+    with pool.lease() as driver:
+        assert driver is drivers[1]
+    assert pool.stats()["recycled"] == 1
+
+
+def test_crashed_idle_driver_is_replaced():
+    pool, drivers = make_pool(max_size=1)
+    with pool.lease() as driver:
+        pass
+    driver.healthy = False
+
+    assert pool.acquire() is drivers[1]
+    assert driver.quit_called
+
+
+def test_lease_releases_on_error():
+    pool, _ = make_pool(max_size=1)
+
+    with pytest.raises(ValueError), pool.lease():
+        raise ValueError("page failed")
+
+    assert pool.stats()["idle"] == 1
+
+
+def test_recycling_refills_up_to_min_size():
+    min_size = 2
+    pool, drivers = make_pool(min_size=min_size, max_size=3, max_pages=1)
+    pool.warm()
+
+    with pool.lease():
+        pass
+
+    wait_for(lambda: pool.stats()["total"] == min_size)
+    assert pool.stats()["idle"] == min_size
+    # Les deux du préchauffage, plus le remplaçant du navigateur recyclé.
+    assert len(drivers) == min_size + 1
+
+
+def test_concurrent_releases_count_every_use():
+    pool, drivers = make_pool(max_size=8, max_pages=1000)
+    leased = [pool.acquire() for _ in range(8)]
+    for driver in leased:
+        pool.release(driver)
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(50):
+            with pool.lease():
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(pool._uses.values()) == 8 + 8 * 50
+    pool.close()
+    assert all(driver.quit_called for driver in drivers)
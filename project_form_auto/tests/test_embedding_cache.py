@@ -0,0 +1,84 @@
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+
+
+def vectors(*values):
+    return np.array([[value, value + 0.5] for value in values], dtype=np.float32)
+
+
+def test_get_many_returns_hits_and_misses_in_order():
+    cache = EmbeddingCache(8)
+    stored = ["email", "city"]
+    cache.put_many(stored, vectors(1, 2))
+
+    found = cache.get_many(["city", "phone", "email"])
+
+    np.testing.assert_array_equal(found[0], vectors(2)[0])
+    assert found[1] is None
+    np.testing.assert_array_equal(found[2], vectors(1)[0])
+    assert cache.stats()["hits"] == len(stored)
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    maxsize = 2
+    cache = EmbeddingCache(maxsize)
+    cache.put_many(["a", "b"], vectors(1, 2))
+    cache.get_many(["a"])
+
+    cache.put_many(["c"], vectors(3))
+
+    assert cache.get_many(["a", "b", "c"])[1] is None
+    assert cache.stats()["size"] == maxsize
+
+
+def test_zero_size_disables_the_cache():
+    cache = EmbeddingCache(0)
+    cache.put_many(["a"], vectors(1))
+
+    assert cache.get_many(["a"]) == [None]
+
+
+def test_persist_and_reload(tmp_path):
+    path = str(tmp_path / "cache" / "embeddings.npy")
+    cache = EmbeddingCache(8, path)
+    cache.put_many(["email", "x" * 300], vectors(1, 2))
+
+    assert cache.persist() == 1
+
+    reloaded = EmbeddingCache(8, path)
+    found = reloaded.get_many(["email", "x" * 300])
+    np.testing.assert_array_equal(found[0], vectors(1)[0])
+    assert found[1] is None
+    assert reloaded.stats()["disk_hits"] == 1
+
+
+def test_workers_persisting_in_turn_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+    first, second = EmbeddingCache(8, path), EmbeddingCache(8, path)
+    keys = ["email", "city"]
+    first.put_many(keys[:1], vectors(1))
+    second.put_many(keys[1:], vectors(2))
+
+    first.persist()
+    second.persist()
+
+    reloaded = EmbeddingCache(8, path)
+    assert reloaded.stats()["disk_size"] == len(keys)
+    assert all(vector is not None for vector in reloaded.get_many(keys))
+
+
+def test_persist_keeps_the_most_recent_entries(tmp_path):
+    path = str(tmp_path / "embeddings.npy")
+    old = EmbeddingCache(2, path)
+    old.put_many(["a", "b"], vectors(1, 2))
+    old.persist()
+
+    cache = EmbeddingCache(2, path)
+    cache.put_many(["c"], vectors(3))
+    cache.persist()
+
+    reloaded = EmbeddingCache(2, path)
+    assert reloaded.get_many(["a"]) == [None]
+    assert all(vector is not None for vector in reloaded.get_many(["b", "c"]))
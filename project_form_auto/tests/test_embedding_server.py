@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.embedding_server import EncoderServer
+from app.services.encoders import RemoteEncoder
+from tests.helpers import HashingEncoder
+
+CANDIDATES = ["email", "prénom", "code postal", "ville"]
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = str(tmp_path / "encoder.sock")
+    server = EncoderServer(socket_path, HashingEncoder(), CANDIDATES)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_remote_encoder_matches_server_encoder(server):
+    remote = RemoteEncoder(server.server_address)
+    texts = ["input text email votre email", "input text city ville", ""]
+
+    np.testing.assert_array_equal(remote.encode(texts), HashingEncoder().encode(texts))
+
+
+def test_candidates_are_shared_read_only(server):
+    remote = RemoteEncoder(server.server_address)
+
+    vectors = remote.encode_candidates(CANDIDATES)
+
+    np.testing.assert_array_equal(vectors, HashingEncoder().encode(CANDIDATES))
+    assert not vectors.flags.writeable
+    # Textes différents de ceux du serveur : encodés par la socket.
+    other = remote.encode_candidates(["pays"])
+    assert other.shape == (1, 64)
+
+
+def test_remote_encoder_from_many_threads(server):
+    remote = RemoteEncoder(server.server_address)
+    expected = HashingEncoder().encode(["email"])
+    results = []
+
+    def work():
+        results.append(remote.encode(["email"]))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == len(threads)
+    for vectors in results:
+        np.testing.assert_array_equal(vectors, expected)
+
+
+def test_remote_encoder_requires_running_server(tmp_path):
+    with pytest.raises(OSError):
+        RemoteEncoder(str(tmp_path / "missing.sock"))
+
+
+def test_caches_are_keyed_by_server_backend(server, monkeypatch):
+    from app.services import field_mapper
+
+    remote = RemoteEncoder(server.server_address)
+    monkeypatch.setattr(field_mapper, "_MODEL", remote)
+
+    assert remote.model_backend == HashingEncoder.name
+    assert field_mapper._cache_keys(["email"]) == ["hashing:email"]
+    assert field_mapper._matcher_version().split(":")[1] == "hashing"
+
+
+def test_backend_switch_is_detected(server):
+    remote = RemoteEncoder(server.server_address)
+    server.encoder = type("OtherEncoder", (HashingEncoder,), {"name": "other"})()
+
+    with pytest.raises(RuntimeError, match="switched backend"):
+        remote.encode(["email"])
@@ -0,0 +1,194 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config import EMBEDDING_ONNX_PATH
+from app.models.schemas import FormField
+from app.services import field_mapper
+from app.services.embedding_cache import EmbeddingCache
+from app.services.encoders import ONNX_MODEL_FILE
+from app.services.field_mapper import (
+    _CANDIDATE_KEYS,
+    SYNONYMS,
+    _match_by_autocomplete,
+    _match_by_exact_attribute,
+    _match_by_tokens,
+    _normalize,
+    build_mapped_fields,
+    match_fields_batch,
+    parity_report,
+)
+from app.services.form_templates import TemplateRegistry
+from app.services.mapping_memo import MappingMemo
+from tests.helpers import HashingEncoder
+
+# Corpus étiqueté : champ -> clé UserData attendue (None = aucun rapprochement).
+MAPPING_CORPUS = [
+    (FormField(tag="input", type="email", name="mail"), "email"),
+    (FormField(tag="input", type="text", name="courriel", label="Adresse e-mail"), "email"),
+    (FormField(tag="input", type="tel", name="phone"), "phone"),
+    (FormField(tag="input", type="text", name="mobile", label="Téléphone portable"), "phone"),
+    (FormField(tag="input", type="text", name="firstname", label="Prénom"), "first_name"),
+    (FormField(tag="input", type="text", id="given-name", placeholder="First name"), "first_name"),
+    (FormField(tag="input", type="text", name="lastname", label="Nom de famille"), "last_name"),
+    (FormField(tag="input", type="text", name="surname", placeholder="Surname"), "last_name"),
+    (FormField(tag="input", type="text", name="fullname", label="Nom complet"), "full_name"),
+    (FormField(tag="input", type="text", name="zip", label="Code postal"), "postal_code"),
+    (FormField(tag="input", type="text", name="postcode", placeholder="Postal code"), "postal_code"),
+    (FormField(tag="input", type="text", name="city", label="Ville"), "city"),
+    (FormField(tag="input", type="text", name="town", placeholder="Town"), "city"),
+    (FormField(tag="select", type="select-one", name="country", label="Pays"), "country"),
+    (FormField(tag="input", type="text", name="address", label="Adresse"), "address"),
+    (FormField(tag="input", type="text", name="street", label="Rue"), "street"),
+    (FormField(tag="input", type="text", name="company", label="Société"), "company"),
+    (FormField(tag="input", type="date", name="dob"), "birth_date"),
+    (FormField(tag="input", type="text", name="birthdate", label="Date de naissance"), "birth_date"),
+    (FormField(tag="select", type="select-one", name="civility", label="Civilité"), "gender"),
+    (FormField(tag="input", type="text", name="login", label="Identifiant"), "username"),
+    (FormField(tag="input", type="text", name="pseudo", placeholder="Pseudo"), "username"),
+    (FormField(tag="input", type="password", name="password"), None),
+]
+
+
+@pytest.mark.parametrize(
+    "field, key",
+    [
+        (FormField(tag="input", name="email"), "email"),
+        (FormField(tag="input", name="postal_code"), "postal_code"),
+        (FormField(tag="input", id="firstName"), "first_name"),
+        (FormField(tag="input", name="x", label="Code postal"), "postal_code"),
+        (FormField(tag="input", name="q", placeholder="Rechercher"), None),
+        # Synonymes ambigus : laissés au modèle.
+        (FormField(tag="input", name="title"), None),
+        (FormField(tag="input", name="number"), None),
+        (FormField(tag="input", name="name"), None),
+        (FormField(tag="input", id="year"), None),
+    ],
+)
+def test_exact_attribute_tier(field, key):
+    result = _match_by_exact_attribute(field)
+    assert (result[0] if result else None) == key
+
+
+@pytest.mark.parametrize(
+    "autocomplete, result",
+    [
+        ("given-name", ("first_name", 1.0, "Matched by autocomplete=given-name")),
+        ("section-a shipping postal-code", ("postal_code", 1.0, "Matched by autocomplete=postal-code")),
+        ("home tel webauthn", ("phone", 1.0, "Matched by autocomplete=tel")),
+        ("BDAY-DAY", ("birth_day", 1.0, "Matched by autocomplete=bday-day")),
+        ("cc-number", (None, 0.0, "autocomplete=cc-number has no UserData key")),
+        ("off", None),
+        (None, None),
+    ],
+)
+def test_autocomplete_tier(autocomplete, result):
+    field = FormField(tag="input", name="q", autocomplete=autocomplete)
+    assert _match_by_autocomplete(field) == result
+
+
+def test_autocomplete_tier_comes_first():
+    fields = [
+        FormField(tag="input", type="email", name="contact", autocomplete="username"),
+        FormField(tag="input", name="email", autocomplete="new-password"),
+        FormField(tag="input", name="x", aria_label="Ville"),
+    ]
+    assert [key for key, _, _ in match_fields_batch(fields)] == ["username", None, "city"]
+
+
+def test_exact_attribute_skips_model():
+    # Aucun modèle chargé n'est nécessaire pour ces champs.
+    assert match_fields_batch([FormField(tag="input", name="city")])[0][0] == "city"
+
+
+@pytest.mark.parametrize(
+    "blob",
+    ["input text user zip code", "nom prenom", "votre adresse mail", "titre", "jour mois année", "emailmobile", ""],
+)
+def test_compiled_tokens_follow_synonym_order(blob):
+    expected = (None, 0.0, "No match found")
+    if "email" in blob and "mobile" in blob:
+        expected = ("email", 0.85, "Matched by combined email/mobile label")
+    else:
+        for key, tokens in SYNONYMS.items():
+            token = next((t for t in tokens if _normalize(t) and _normalize(t) in blob), None)
+            if token is not None:
+                expected = (key, 0.7, f"Matched by token '{token}' in field attributes")
+                break
+    assert _match_by_tokens(blob) == expected
+
+
+def test_parity_report_identical_encoders_agree():
+    report = parity_report(MAPPING_CORPUS, HashingEncoder(), HashingEncoder())
+
+    assert report["fields"] == len(MAPPING_CORPUS)
+    assert report["agreement"] == 1
+    assert report["mismatches"] == []
+    assert report["reference_accuracy"] == report["candidate_accuracy"]
+
+
+class ConstantEncoder(HashingEncoder):
+    """Maps every text to the same vector: the first candidate always wins."""
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        vectors[:, 0] = 1.0
+        return vectors
+
+
+def test_parity_report_compares_every_field_on_the_embedding_tier():
+    report = parity_report(MAPPING_CORPUS, HashingEncoder(), ConstantEncoder())
+
+    # Les tiers rapides sont ignorés : même le champ type=tel, décidé sans
+    # modèle en production, est comparé sur l'encodeur.
+    assert {mismatch["candidate"] for mismatch in report["mismatches"]} == {_CANDIDATE_KEYS[0]}
+    assert "input tel phone" in {mismatch["field"] for mismatch in report["mismatches"]}
+    assert len(report["mismatches"]) >= len(MAPPING_CORPUS) // 2
+    assert report["agreement"] == 1 - len(report["mismatches"]) / len(MAPPING_CORPUS)
+    assert report["candidate_accuracy"] < report["reference_accuracy"]
+
+
+def test_onnx_backend_keeps_match_decisions():
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+    if not (Path(EMBEDDING_ONNX_PATH) / ONNX_MODEL_FILE).exists():
+        pytest.skip(f"ONNX export missing: run app.services.encoders.export_onnx({EMBEDDING_ONNX_PATH!r})")
+    from app.services.encoders import OnnxEncoder, SentenceTransformerEncoder
+
+    report = parity_report(MAPPING_CORPUS, SentenceTransformerEncoder(), OnnxEncoder())
+
+    assert report["fields"] == len(MAPPING_CORPUS)
+    assert report["mismatches"] == [], report
+
+
+class FailingEncoder(HashingEncoder):
+    """Encoder whose server went away after the candidates were loaded."""
+
+    def encode(self, texts):
+        raise ConnectionError("encoder socket closed")
+
+
+@pytest.fixture
+def fresh_stores(monkeypatch):
+    monkeypatch.setattr(field_mapper, "_CANDIDATE_EMBEDDINGS", HashingEncoder().encode(field_mapper._CANDIDATE_TEXTS))
+    monkeypatch.setattr(field_mapper, "_EMBEDDING_CACHE", EmbeddingCache(0))
+    monkeypatch.setattr(field_mapper, "_MAPPING_MEMO", MappingMemo(16, None, "test"))
+    monkeypatch.setattr(field_mapper, "_TEMPLATES", TemplateRegistry(16, 0.8))
+    return monkeypatch
+
+
+def test_encoder_failure_results_are_not_memoised(fresh_stores):
+    fields = [FormField(tag="input", name="q1", label="Où habitez-vous ?")]
+    fresh_stores.setattr(field_mapper, "_MODEL", FailingEncoder())
+
+    build_mapped_fields(fields, "https://example.com/signup")
+
+    assert field_mapper._MAPPING_MEMO.stats()["size"] == 0
+    assert field_mapper._TEMPLATES.stats()["templates"] == 0
+
+    fresh_stores.setattr(field_mapper, "_MODEL", HashingEncoder())
+    build_mapped_fields(fields, "https://example.com/signup")
+
+    assert field_mapper._MAPPING_MEMO.stats()["size"] == 1
+    assert field_mapper._TEMPLATES.stats()["templates"] == 1
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.form_analyzer import extract_form_fields
+from app.services.form_detector import detect_form
+from app.services.parsed_page import PARSER_BACKENDS
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Corpus partagé : les deux parseurs doivent produire exactement les mêmes résultats.
+CORPUS = {
+    "sample_form": (ROOT / "sample_form.html").read_text(encoding="utf-8"),
+    "labels": """<html><body><form><label for="em">Email</label><input id="em" name="email">
+        <label>Prénom <input name="fn"></label><div>Nom<input name="ln"></div>
+        <input type=hidden name=csrf><input type=submit><textarea name=msg placeholder="Message"></textarea>
+        <select name=country><option>FR</option></select></form>
+        <div><p>Ville</p><input id=city placeholder=Ville></div><label for=city>City</label><label for=city>dup</label>
+        <button>Envoyer</button></body></html>""",
+    "text_rules": """<html><body><form>
+        <label for=a>  Adresse <!-- c --> <b>e</b>-mail&nbsp;<script>var x=1;</script><style>.a{}</style> </label><input id=a>
+        <div>Nom <template><p>tpl</p></template><ruby>漢<rt>kan</rt><rp>(</rp></ruby> <input name=n></div>
+        <span> City <i>town</i></span><input name=c>
+        <label><span>First</span><span>name</span><input name=f></label>
+        <td>Code<br>postal<input name=z></td>
+        <button>sign<b>up</b></button></form></body></html>""",
+    "div_form": """<div><label for=a>Adresse</label><input id=a><span>Code postal</span><input name=zip><button>Valider</button></div>""",
+    "types": """<form><input type=search name=s><input type=Text name=t><input type=number name=num>
+        <input type=date name=d><input name=gtm_id><input id=csrf_token name=x><textarea></textarea></form>""",
+    "malformed": """<form><table><tr><td>Prénom<input name=p></td></tr></table><p>Nom<input name=n><form><label>Zip<input name=z>""",
+    "long_parent": "<div>" + "texte " * 50 + "<input name=q></div>",
+    "xml_declaration": "<?xml version='1.0' encoding='utf-8'?><html><body><form><input name=a placeholder=b></form></body></html>",
+    "empty": "",
+}
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_backends_extract_identical_fields(name):
+    html = CORPUS[name]
+    results = {backend: extract_form_fields(html, backend) for backend in PARSER_BACKENDS}
+    assert results["lxml"] == results["bs4"]
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_backends_detect_identically(name):
+    html = CORPUS[name]
+    results = {backend: detect_form(html, backend) for backend in PARSER_BACKENDS}
+    assert results["lxml"] == results["bs4"]
+
+
+def test_sample_form_fields():
+    fields = extract_form_fields(CORPUS["sample_form"])
+    assert fields
+    assert all(field.tag in {"input", "textarea"} for field in fields)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        extract_form_fields("<form></form>", "html5lib")
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import FormMapResponse
+from app.routers import form_map
+from app.services import field_mapper, scraper
+from app.services.executors import REQUEST_LIMITER
+from app.services.mapping_memo import MappingMemo
+from app.services.page_cache import PageCache
+from app.services.render_decision import RenderAdvisor
+from tests.helpers import FakeClient, FakeResponse
+
+OK_PAGE = "<html><body><form><input type='email' name='email'><input type='text' name='q'></form></body></html>"
+DELAYS = {"https://slow.example/": 0.2, "https://fast.example/": 0.0}
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    """Replace the fetch/extract/map pipeline and record its concurrency."""
+    state = {"running": 0, "peak": 0}
+
+    async def fake_map_url(url, cache_control, parser):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(DELAYS.get(url, 0.02))
+            return FormMapResponse(url=url, total_fields=0, matched_fields=0, fields=[])
+        finally:
+            state["running"] -= 1
+
+    monkeypatch.setattr(form_map, "_map_url", fake_map_url)
+    return state
+
+
+def post_batch(urls, parallelism=None):
+    client = TestClient(app)
+    body = {"urls": urls, "user_data": {}}
+    if parallelism:
+        body["parallelism"] = parallelism
+    response = client.post("/form/map/batch", json=body)
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_lines_follow_completion_order(fake_pages):
+    lines = post_batch(["https://slow.example/", "https://fast.example/"], parallelism=2)
+
+    assert [line["url"] for line in lines] == ["https://fast.example/", "https://slow.example/"]
+
+
+@pytest.fixture
+def real_fetch(monkeypatch):
+    """Run the real fetch/extract/map pipeline over a fake HTTP client."""
+    client = FakeClient(by_url={
+        "https://down.example/": requests.ConnectionError("connection refused"),
+        "https://missing.example/": FakeResponse(status_code=HTTPStatus.NOT_FOUND),
+        "https://ok.example/": FakeResponse(html=OK_PAGE),
+    })
+    rendered = []
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", client)
+    monkeypatch.setattr(scraper, "PAGE_CACHE", PageCache(16, 300))
+    monkeypatch.setattr(scraper, "RENDER_ADVISOR", RenderAdvisor(16, 3))
+    monkeypatch.setattr(scraper, "fetch_html_with_selenium", lambda url: rendered.append(url) or "")
+    monkeypatch.setattr(field_mapper, "_MAPPING_MEMO", MappingMemo(16, None, "test"))
+    return rendered
+
+
+def test_failed_pages_produce_error_lines(real_fetch):
+    lines = post_batch(["https://down.example/", "https://missing.example/", "https://ok.example/"])
+
+    by_url = {line["url"]: line for line in lines}
+    assert by_url["https://down.example/"]["status_code"] == HTTPStatus.BAD_GATEWAY
+    assert by_url["https://down.example/"]["error"] == "connection refused"
+    assert by_url["https://missing.example/"]["status_code"] == HTTPStatus.NOT_FOUND
+    assert by_url["https://ok.example/"]["matched_fields"] == 1
+    # Aucune page en échec ne part au rendu Selenium.
+    assert real_fetch == []
+
+
+def test_parallelism_is_capped(fake_pages, monkeypatch):
+    cap = 3
+    monkeypatch.setattr(form_map, "BATCH_MAX_PARALLELISM", cap)
+    urls = [f"https://site{i}.example/" for i in range(4 * cap)]
+
+    lines = post_batch(urls, parallelism=10)
+
+    assert sorted(line["url"] for line in lines) == sorted(urls)
+    assert fake_pages["peak"] == cap
+
+
+def test_batch_pages_hold_limiter_slots(fake_pages, monkeypatch):
+    max_inflight = 2
+    monkeypatch.setattr(REQUEST_LIMITER, "max_inflight", max_inflight)
+    urls = [f"https://site{i}.example/" for i in range(8)]
+
+    lines = post_batch(urls, parallelism=len(urls))
+
+    assert len(lines) == len(urls)
+    # Le créneau de la requête plus un seul créneau libre.
+    assert fake_pages["peak"] == max_inflight
+    assert REQUEST_LIMITER.inflight == 0
+
+
+def test_limiter_acquire_waits_for_release():
+    async def scenario():
+        limiter = type(REQUEST_LIMITER)(1, 1)
+        assert limiter.try_acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        cancelled = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert not limiter.try_acquire()
+
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.inflight == 1
+        assert limiter.stats()["waiting"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+from app.models.schemas import FormField
+from app.services.form_templates import TemplateRegistry, field_signature
+
+CHECKOUT = [
+    FormField(tag="input", type="email", name="checkout[email]", autocomplete="email"),
+    FormField(tag="input", type="text", name="checkout[shipping_address][first_name]", autocomplete="given-name"),
+    FormField(tag="input", type="text", name="checkout[shipping_address][last_name]", autocomplete="family-name"),
+    FormField(tag="input", type="text", name="checkout[shipping_address][address1]", autocomplete="address-line1"),
+    FormField(tag="input", type="text", name="checkout[shipping_address][city]", autocomplete="address-level2"),
+    FormField(tag="input", type="text", name="checkout[shipping_address][zip]", autocomplete="postal-code"),
+    FormField(tag="input", type="tel", name="checkout[shipping_address][phone]", autocomplete="tel"),
+]
+RESULTS = [(f"key{i}", 1.0, "reason") for i in range(len(CHECKOUT))]
+
+
+def signatures(fields):
+    return [field_signature(field) for field in fields]
+
+
+def test_identical_form_on_another_domain_hits():
+    registry = TemplateRegistry(16, 0.8)
+    urls = ["https://shop-a.example/checkout", "https://shop-b.example/checkouts/42"]
+    registry.register(urls[0], signatures(CHECKOUT), RESULTS)
+
+    template = registry.match(urls[1], signatures(CHECKOUT))
+
+    assert template is not None
+    assert [template.results[s] for s in signatures(CHECKOUT)] == RESULTS
+    stats = registry.stats()
+    assert stats["hits"] == 1
+    assert stats["top"][0]["domains"] == len(urls)
+
+
+def test_near_identical_form_within_tolerance():
+    registry = TemplateRegistry(16, 0.8)
+    registry.register("https://shop-a.example/checkout", signatures(CHECKOUT), RESULTS)
+    extra = FormField(tag="input", type="text", name="checkout[note]")
+
+    # 7 champs communs sur 8 : similarité 0.875.
+    template = registry.match("https://shop-b.example/checkout", signatures(CHECKOUT + [extra]))
+    assert template is not None
+    assert field_signature(extra) not in template.results
+
+    # 4 champs communs sur 7 : en deçà de la tolérance.
+    assert registry.match("https://shop-c.example/checkout", signatures(CHECKOUT[:4])) is None
+    assert registry.stats()["misses"] == 1
+
+
+def test_eviction_drops_index_entries():
+    registry = TemplateRegistry(1, 0.8)
+    registry.register("https://a.example/", signatures(CHECKOUT), RESULTS)
+    registry.register("https://b.example/", signatures(CHECKOUT[:1]), RESULTS[:1])
+
+    assert registry.match("https://c.example/", signatures(CHECKOUT)) is None
+    assert registry.stats()["templates"] == 1
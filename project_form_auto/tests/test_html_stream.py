@@ -0,0 +1,71 @@
+from app.services.form_analyzer import extract_form_fields
+from app.services.html_stream import CHUNK_SIZE, read_html
+
+
+class FakeResponse:
+    def __init__(self, html: str) -> None:
+        self.body = html.encode("utf-8")
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+    def iter_content(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+SEARCH_FORM = '<form action="/search"><input type="search" name="q"><button>Go</button></form>'
+MAIN_FORM = (
+    '<form action="/signup"><input type="hidden" name="csrf" value="x">'
+    '<input type="email" name="email"><input type="text" name="city"></form>'
+)
+FILLER = "<p>" + "lorem ipsum " * 20 + "</p>\n"
+
+
+def page(*parts: str) -> str:
+    return "<html><body>" + "".join(parts) + "</body></html>"
+
+
+def test_search_form_does_not_stop_the_read():
+    html = page(SEARCH_FORM, FILLER * 1000, MAIN_FORM, FILLER * 10)
+    assert len(html) > 3 * CHUNK_SIZE
+
+    streamed = read_html(FakeResponse(html), max_bytes=10**7, fields_only=True)
+
+    assert extract_form_fields(streamed.html) == extract_form_fields(html)
+    assert [f.name for f in extract_form_fields(streamed.html)] == ["email", "city"]
+
+
+def test_read_stops_after_main_form_margin():
+    html = page(MAIN_FORM, FILLER * 2000)
+
+    streamed = read_html(FakeResponse(html), max_bytes=10**7, fields_only=True, margin_bytes=1024)
+
+    assert streamed.truncated
+    assert streamed.size < len(html)
+    assert [f.name for f in extract_form_fields(streamed.html)] == ["email", "city"]
+
+
+def test_full_read_without_fields_only():
+    html = page(MAIN_FORM, FILLER * 2000)
+
+    streamed = read_html(FakeResponse(html), max_bytes=10**7)
+
+    assert not streamed.truncated
+    assert streamed.size == len(html.encode("utf-8"))
+
+
+def test_read_ending_at_body_close_is_not_truncated():
+    html = page(SEARCH_FORM, FILLER * 10)
+
+    streamed = read_html(FakeResponse(html), max_bytes=10**7, fields_only=True)
+
+    assert not streamed.truncated
+    assert streamed.html == html
+
+
+def test_max_bytes_truncates():
+    html = page(MAIN_FORM, FILLER * 200)
+
+    streamed = read_html(FakeResponse(html), max_bytes=CHUNK_SIZE // 2)
+
+    assert streamed.truncated
+    assert streamed.size == CHUNK_SIZE // 2
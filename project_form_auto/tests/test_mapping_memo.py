@@ -0,0 +1,102 @@
+from app.models.schemas import FormField
+from app.services import mapping_memo
+from app.services.mapping_memo import MappingMemo, form_fingerprint, site_key
+
+FIELDS = [
+    FormField(tag="input", type="email", name="email"),
+    FormField(tag="input", type="text", name="city", label="Ville"),
+]
+RESULTS = [("email", 0.95, "Matched by input type 'email'"), ("city", 0.9, "Matched by exact attribute 'city'")]
+
+
+def test_fingerprint_follows_field_structure():
+    fingerprint = form_fingerprint(FIELDS)
+
+    assert form_fingerprint([f.model_copy() for f in FIELDS]) == fingerprint
+    assert form_fingerprint(FIELDS[::-1]) != fingerprint
+    assert form_fingerprint(FIELDS[:1]) != fingerprint
+    assert form_fingerprint([FIELDS[0], FIELDS[1].model_copy(update={"label": "Town"})]) != fingerprint
+
+
+def test_fingerprint_tells_missing_from_empty_attributes():
+    assert form_fingerprint([FormField(tag="input", name="q")]) != form_fingerprint(
+        [FormField(tag="input", name="q", label="")]
+    )
+
+
+def test_site_key_ignores_query_and_fragment():
+    assert site_key("https://Example.com/signup?session=1#top") == "https://example.com/signup"
+    assert site_key("https://example.com") == "https://example.com/"
+
+
+def test_memo_survives_restart(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    fingerprint = form_fingerprint(FIELDS)
+    memo = MappingMemo(16, path, "1")
+    memo.put("https://example.com/signup", fingerprint, RESULTS)
+    memo.close()
+
+    reopened = MappingMemo(16, path, "1")
+    lookups = [reopened.get("https://example.com/signup", fingerprint) for _ in range(2)]
+    assert lookups == [RESULTS, RESULTS]
+    # Seule la première lecture va jusqu'à SQLite.
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["hits"] == len(lookups)
+
+
+def test_memo_invalidated_by_fingerprint_and_version(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    memo = MappingMemo(16, path, "1")
+    memo.put("https://example.com/signup", form_fingerprint(FIELDS), RESULTS)
+
+    assert memo.get("https://example.com/signup", form_fingerprint(FIELDS[:1])) is None
+    memo.close()
+
+    bumped = MappingMemo(16, path, "2")
+    assert bumped.get("https://example.com/signup", form_fingerprint(FIELDS)) is None
+
+
+def test_forms_sharing_a_path_keep_their_own_mapping(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    signup, contact = "https://example.com/index.php?page=signup", "https://example.com/index.php?page=contact"
+    contact_fields = [FormField(tag="textarea", name="message")]
+    contact_results = [("message", 0.9, "Matched by exact attribute 'message'")]
+    memo = MappingMemo(16, path, "1")
+    memo.put(site_key(signup), form_fingerprint(FIELDS), RESULTS)
+    memo.put(site_key(contact), form_fingerprint(contact_fields), contact_results)
+
+    assert memo.get(site_key(signup), form_fingerprint(FIELDS)) == RESULTS
+    assert memo.get(site_key(contact), form_fingerprint(contact_fields)) == contact_results
+    memo.close()
+
+    reopened = MappingMemo(16, path, "1")
+    assert reopened.get(site_key(signup), form_fingerprint(FIELDS)) == RESULTS
+    assert reopened.get(site_key(contact), form_fingerprint(contact_fields)) == contact_results
+
+
+def test_disk_keeps_recent_fingerprints_per_site(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapping_memo, "MAX_FINGERPRINTS_PER_SITE", 2)
+    path = str(tmp_path / "memo.sqlite3")
+    forms = [[FormField(tag="input", name=f"field{i}")] for i in range(3)]
+    memo = MappingMemo(16, path, "1")
+    for fields in forms:
+        memo.put("https://example.com/", form_fingerprint(fields), RESULTS[:1])
+    memo.close()
+
+    reopened = MappingMemo(16, path, "1")
+    assert reopened.get("https://example.com/", form_fingerprint(forms[0])) is None
+    assert reopened.get("https://example.com/", form_fingerprint(forms[2])) == RESULTS[:1]
+
+
+def test_version_switch_drops_entries(tmp_path):
+    memo = MappingMemo(16, str(tmp_path / "memo.sqlite3"), "1:remote:x")
+    fingerprint = form_fingerprint(FIELDS)
+    memo.put("https://example.com/signup", fingerprint, RESULTS)
+
+    memo.set_matcher_version("1:onnx:x")
+
+    assert memo.get("https://example.com/signup", fingerprint) is None
+    memo.close()
+    assert MappingMemo(16, str(tmp_path / "memo.sqlite3"), "1:remote:x").get(
+        "https://example.com/signup", fingerprint
+    ) is None
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+from tests.helpers import HashingEncoder
+
+
+class CountingEncoder(HashingEncoder):
+    """Records the size of every forward pass."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[int] = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        time.sleep(0.005)
+        return super().encode(texts)
+
+
+def run_concurrently(batcher, requests):
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def work(i):
+        barrier.wait()
+        results[i] = batcher.encode(requests[i])
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_forward_passes():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder.encode, window_ms=20, max_batch=1000)
+    requests = [[f"field {i}", "email"] for i in range(16)]
+
+    results = run_concurrently(batcher, requests)
+
+    for texts, vectors in zip(requests, results):
+        np.testing.assert_array_equal(vectors, HashingEncoder().encode(texts))
+    assert len(encoder.calls) < len(requests)
+    stats = batcher.stats()
+    assert stats["calls"] == len(requests)
+    assert stats["batches"] == len(encoder.calls)
+    # "email" n'est encodé qu'une fois par lot.
+    assert sum(encoder.calls) == len(requests) + len(encoder.calls)
+    assert stats["max_wait_ms"] > 0
+
+
+def test_max_batch_flushes_before_window():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder.encode, window_ms=10_000, max_batch=2)
+
+    started = time.perf_counter()
+    batcher.encode(["a", "b"])
+
+    assert time.perf_counter() - started < 1
+    assert encoder.calls == [2]
+
+
+def test_zero_window_calls_encoder_directly():
+    encoder = CountingEncoder()
+    batcher = MicroBatcher(encoder.encode, window_ms=0, max_batch=8)
+
+    batcher.encode(["a"])
+
+    assert encoder.calls == [1]
+    assert batcher.stats()["batches"] == 0
+
+
+def test_errors_reach_every_caller():
+    def failing(texts):
+        time.sleep(0.005)
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(failing, window_ms=20, max_batch=1000)
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def work(i):
+        barrier.wait()
+        try:
+            batcher.encode([f"field {i}"])
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == ["model unavailable"] * len(threads)
+    assert batcher.stats()["calls"] == len(threads)
+
+
+def test_worker_survives_malformed_encoder_output():
+    outputs = [np.zeros((1, 4), dtype=np.float32)]
+
+    def encode(texts):
+        # Première réponse : une ligne de moins que de textes.
+        return outputs.pop() if outputs else np.ones((len(texts), 4), dtype=np.float32)
+
+    batcher = MicroBatcher(encode, window_ms=1, max_batch=8)
+
+    with pytest.raises(ValueError):
+        batcher.encode(["a", "b"])
+    np.testing.assert_array_equal(batcher.encode(["a", "b"]), np.ones((2, 4)))
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+from app.services import scraper
+from app.services.page_cache import CachedPage, PageCache, parse_cache_control
+from app.services.render_decision import RenderAdvisor
+from tests.helpers import FakeClient, FakeResponse
+
+RENDERED_PAGE = "<html>rendered</html>"
+FORM_PAGE = (
+    "<html><body><form><input type='email' name='email'><input name='city'></form>"
+    + "<p>" + "texte " * 100 + "</p></body></html>"
+)
+
+
+@pytest.fixture
+def page_cache(monkeypatch):
+    cache = PageCache(16, 300)
+    monkeypatch.setattr(scraper, "PAGE_CACHE", cache)
+    monkeypatch.setattr(scraper, "RENDER_ADVISOR", RenderAdvisor(16, 3))
+    monkeypatch.setattr(scraper, "fetch_html_with_selenium", lambda url: RENDERED_PAGE)
+    return cache
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('No-Cache, max-age="60", private') == {
+        "no-cache": None,
+        "max-age": "60",
+        "private": None,
+    }
+    assert parse_cache_control(None) == {}
+
+
+def test_page_cache_lru():
+    maxsize = 2
+    cache = PageCache(maxsize, 300)
+    for url in ("a", "b", "c"):
+        cache.put(url, CachedPage(status=200, html=url, rendered=False))
+
+    assert cache.get("a") is None
+    assert cache.get("c").html == "c"
+    assert cache.stats()["size"] == maxsize
+
+
+def test_fresh_entry_served_without_network(page_cache, monkeypatch):
+    client = FakeClient(FakeResponse(html=FORM_PAGE, headers={"ETag": '"v1"'}))
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", client)
+
+    first = scraper.fetch_page("https://example.com/")
+    second = scraper.fetch_page("https://example.com/")
+
+    assert second is first
+    assert len(client.requests) == 1
+    assert page_cache.stats()["hits"] == 1
+
+
+def test_max_age_zero_revalidates_with_304(page_cache, monkeypatch):
+    client = FakeClient(
+        FakeResponse(html=FORM_PAGE, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        FakeResponse(status_code=HTTPStatus.NOT_MODIFIED),
+    )
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", client)
+
+    first = scraper.fetch_page("https://example.com/")
+    second = scraper.fetch_page("https://example.com/", cache_control="max-age=0")
+
+    assert second is first
+    assert client.requests[1]["If-None-Match"] == '"v1"'
+    assert client.requests[1]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert page_cache.stats()["revalidated"] == 1
+
+
+def test_no_store_bypasses_cache(page_cache, monkeypatch):
+    responses = [FakeResponse(html=FORM_PAGE), FakeResponse(html=FORM_PAGE)]
+    client = FakeClient(*responses)
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", client)
+
+    for _ in responses:
+        scraper.fetch_page("https://example.com/", cache_control="no-store")
+
+    assert len(client.requests) == len(responses)
+    assert page_cache.get("https://example.com/") is None
+
+
+def test_network_error_is_not_cached(page_cache, monkeypatch):
+    client = FakeClient(requests.ConnectionError("reset"), FakeResponse(html=FORM_PAGE))
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", client)
+
+    failed = scraper.fetch_page("https://example.com/")
+    assert failed.fetch_error == "reset"
+    assert page_cache.get("https://example.com/") is None
+
+    recovered = scraper.fetch_page("https://example.com/")
+    assert recovered.fetch_error is None
+    assert "email" in recovered.html
+    assert page_cache.get("https://example.com/") is recovered
+
+
+def test_missing_page_keeps_its_status_and_is_not_rendered(page_cache, monkeypatch):
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", FakeClient(FakeResponse(status_code=HTTPStatus.NOT_FOUND)))
+
+    page = scraper.fetch_page("https://example.com/gone")
+
+    assert page.status == HTTPStatus.NOT_FOUND
+    assert page.fetch_error == "404 error"
+    assert not page.rendered
+
+
+def test_unreachable_host_is_a_bad_gateway(page_cache, monkeypatch):
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", FakeClient(requests.ConnectionError("refused")))
+
+    page = scraper.fetch_page("https://down.example/")
+
+    assert page.status == HTTPStatus.BAD_GATEWAY
+    assert not page.rendered
+
+
+def test_bot_refusal_falls_back_to_rendering(page_cache, monkeypatch):
+    monkeypatch.setattr(scraper, "HTTP_CLIENT", FakeClient(FakeResponse(status_code=HTTPStatus.FORBIDDEN)))
+
+    page = scraper.fetch_page("https://example.com/")
+
+    assert page.rendered
+    assert page.html == RENDERED_PAGE
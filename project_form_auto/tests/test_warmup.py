@@ -0,0 +1,60 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import warmup
+
+
+@pytest.fixture
+def blocked_warmup(monkeypatch):
+    """Replace the warm-up steps with one that waits for the test to release it."""
+    release = threading.Event()
+
+    def step():
+        if not release.wait(5):
+            raise RuntimeError("never released")
+
+    monkeypatch.setattr(warmup, "COMPONENTS", {"embedding_model": step})
+    monkeypatch.setattr(warmup, "_STATE", {})
+    return release
+
+
+def _wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/ready")
+        if response.status_code == HTTPStatus.OK:
+            return response
+        time.sleep(0.01)
+    raise AssertionError("warm-up never finished")
+
+
+def test_ready_is_503_while_warmup_runs(blocked_warmup, monkeypatch):
+    monkeypatch.setattr(main, "WARMUP_ON_STARTUP", True)
+
+    with TestClient(main.app) as client:
+        pending = client.get("/ready")
+        assert pending.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert pending.json() == {
+            "ready": False,
+            "components": {"embedding_model": {"status": "pending", "duration_ms": None, "error": None}},
+        }
+
+        blocked_warmup.set()
+        ready = _wait_ready(client)
+
+    assert ready.json()["components"]["embedding_model"]["status"] == "ready"
+
+
+def test_ready_reports_skipped_components_when_warmup_is_disabled(blocked_warmup, monkeypatch):
+    monkeypatch.setattr(main, "WARMUP_ON_STARTUP", False)
+
+    with TestClient(main.app) as client:
+        response = client.get("/ready")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["components"]["embedding_model"]["status"] == "skipped"